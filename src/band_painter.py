@@ -6,12 +6,71 @@ Post-processing module for applying painting effects to gradient bands.
 
 import numpy as np
 from PIL import Image, ImageFilter, ImageEnhance
-import random
 import math
 
+from comprehensive_wave_generator import band_positions, load_band_info
+from grain_engine import add_gaussian_grain, add_noise, combined_sigma, gaussian_noise, interior
+from random_streams import RngLike, make_rng
+
+
+def _band_edge_sigma(bands: dict, shape: tuple, distance: int, sigma: float,
+                     edge_sigma: float) -> np.ndarray:
+    """
+    Per-pixel (height, width, 1) noise sigma from a band info dict: sigma inside the bands,
+    edge_sigma within distance rows of a band edge.
+    """
+    labels = bands['labels']
+    if labels.shape != shape:
+        raise ValueError("Band map does not match the image area inside the border")
+    from_top, from_bottom = band_positions(labels, bands['top'], bands['bottom'])
+    near_edge = (from_top < distance) | (from_bottom + 1 < distance)
+    return np.where(near_edge, np.float32(edge_sigma), np.float32(sigma))[..., None]
+
+
+def stroke_points(start_y: np.ndarray, start_x: np.ndarray, lengths: np.ndarray,
+                  step_y: np.ndarray, step_x: np.ndarray):
+    """
+    Pixel positions of straight strokes, all strokes at once.
+    
+    Point i of stroke k lies at (int(start_y + i * step_y), int(start_x + i * step_x)),
+    truncated toward zero, for i < lengths[k].
+    
+    Returns:
+        (ys, xs, stroke) int64 arrays with one entry per point, stroke by stroke
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    stroke = np.repeat(np.arange(len(lengths)), lengths)
+    # Position of every point within its stroke
+    i = np.arange(len(stroke)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    ys = (np.asarray(start_y)[stroke] + i * np.asarray(step_y)[stroke]).astype(np.int64)
+    xs = (np.asarray(start_x)[stroke] + i * np.asarray(step_x)[stroke]).astype(np.int64)
+    return ys, xs, stroke
+
+
+def rasterize_strokes(shape: tuple, ys: np.ndarray, xs: np.ndarray, values: np.ndarray,
+                      brush_size: int = 1) -> np.ndarray:
+    """
+    Scatter-add stroke points into a float32 (height, width) layer.
+    
+    Every point adds its value to the brush_size x brush_size square to its lower right;
+    pixels outside the layer are dropped and overlapping squares sum up.
+    """
+    height, width = shape
+    offsets = np.arange(max(0, int(brush_size)))
+    dy = np.repeat(offsets, len(offsets))
+    dx = np.tile(offsets, len(offsets))
+    target_y = (ys[:, None] + dy).ravel()
+    target_x = (xs[:, None] + dx).ravel()
+    weights = np.repeat(values, len(dy))
+    inside = (target_y >= 0) & (target_y < height) & (target_x >= 0) & (target_x < width)
+    layer = np.bincount(target_y[inside] * width + target_x[inside], weights=weights[inside],
+                        minlength=height * width)
+    return layer.astype(np.float32).reshape(height, width)
+
 
 def apply_crayon_effect(image: Image.Image, intensity: float = 0.3, 
-                        roughness: float = 0.5, border_size: int = 0) -> Image.Image:
+                        roughness: float = 0.5, border_size: int = 0,
+                        rng: RngLike = None, bands: dict = None) -> Image.Image:
     """
     Apply crayon-like effect to gradient bands.
     
@@ -20,44 +79,31 @@ def apply_crayon_effect(image: Image.Image, intensity: float = 0.3,
         intensity: Effect intensity (0.0 to 1.0)
         roughness: Edge roughness (0.0 to 1.0)
         border_size: Border size to exclude from effect
+        rng: Seed or numpy Generator for the random draws
+        bands: Band info of the render; confines edge roughness and bleeding to 5 rows
+            around each band edge (without it they apply everywhere)
     
     Returns:
         PIL Image with crayon effect applied
     """
     img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Create crayon texture with much stronger effect
-    crayon_texture = np.random.normal(0, intensity * 100, (height, width, channels))
     
-    # Exclude border if specified
-    if border_size > 0:
-        crayon_texture[:border_size, :] = 0
-        crayon_texture[-border_size:, :] = 0
-        crayon_texture[:, :border_size] = 0
-        crayon_texture[:, -border_size:] = 0
-    
-    # Add roughness to band edges
-    if roughness > 0:
-        # Create edge noise
-        edge_noise = np.random.normal(0, roughness * 60, (height, width, channels))
-        crayon_texture += edge_noise
-    
-    # Apply crayon effect
-    result = img_array.astype(np.float32) + crayon_texture
-    
-    # Add slight color bleeding between bands
-    bleeding = np.random.normal(0, intensity * 40, (height, width, channels))
-    result += bleeding
-    
-    # Clamp values
-    result = np.clip(result, 0, 255)
-    
-    return Image.fromarray(result.astype(np.uint8))
+    # Crayon texture, edge roughness and color bleeding between bands are independent
+    # Gaussians, so they are drawn as one noise field with the combined spread
+    sigma = combined_sigma(intensity * 100, roughness * 60 if roughness > 0 else 0, intensity * 40)
+    if bands is None:
+        add_gaussian_grain(img_array, sigma, border_size, rng=rng)
+    else:
+        weights = _band_edge_sigma(bands, interior(img_array, border_size).shape[:2], 5,
+                                   intensity * 100, sigma)
+        add_gaussian_grain(img_array, 1.0, border_size, weights=weights, rng=rng)
+    
+    return Image.fromarray(img_array)
 
 
 def apply_pencil_effect(image: Image.Image, intensity: float = 0.4, 
-                       stroke_direction: str = 'horizontal', border_size: int = 0) -> Image.Image:
+                       stroke_direction: str = 'horizontal', border_size: int = 0,
+                       rng: RngLike = None, bands: dict = None) -> Image.Image:
     """
     Apply pencil/crayon stroke effect to gradient bands.
     
@@ -66,54 +112,75 @@ def apply_pencil_effect(image: Image.Image, intensity: float = 0.4,
         intensity: Effect intensity (0.0 to 1.0)
         stroke_direction: 'horizontal', 'vertical', or 'diagonal'
         border_size: Border size to exclude from effect
+        rng: Seed or numpy Generator for the random draws
+        bands: Band info of the render; horizontal strokes then follow each band's wave
     
     Returns:
         PIL Image with pencil effect applied
     """
+    rng = make_rng(rng)
     img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Create pencil strokes
-    strokes = np.zeros((height, width, channels))
     
-    if stroke_direction == 'horizontal':
-        # Horizontal pencil strokes
-        for y in range(0, height, 3):  # Every 3 pixels
-            stroke_intensity = np.random.normal(0, intensity * 40, width)
-            for c in range(channels):
-                strokes[y:y+2, :, c] += stroke_intensity
+    # Pencil strokes are drawn for the area inside the border only, as one field that is
+    # broadcast across the channels
+    region = interior(img_array, border_size)
+    if region.size == 0:
+        return Image.fromarray(img_array)
+    region_h, region_w = region.shape[:2]
+    
+    if stroke_direction == 'horizontal' and bands is not None:
+        labels = bands['labels']
+        if labels.shape != (region_h, region_w):
+            raise ValueError("Band map does not match the image area inside the border")
+        # Two-row strokes every 3 rows from each band's top edge; both rows of a stroke
+        # take the value drawn for its first row
+        from_top, _ = band_positions(labels, bands['top'], bands['bottom'])
+        phase = from_top % 3
+        stroke_rows = np.arange(region_h)[:, None] - phase
+        stroke_intensity = gaussian_noise((region_h, region_w), intensity * 40, rng=rng)
+        strokes = stroke_intensity[stroke_rows, np.arange(region_w)]
+        strokes *= phase < 2
+    elif stroke_direction == 'horizontal':
+        # Horizontal pencil strokes: two rows out of every 3 (counted from the image top),
+        # with one value per stroke and column
+        image_rows = np.arange(border_size, border_size + region_h)
+        first = image_rows[0] // 3
+        stroke_intensity = gaussian_noise((image_rows[-1] // 3 - first + 1, region_w),
+                                          intensity * 40, rng=rng)
+        strokes = stroke_intensity[image_rows // 3 - first]
+        strokes *= (image_rows % 3 < 2)[:, None]
     elif stroke_direction == 'vertical':
-        # Vertical pencil strokes
-        for x in range(0, width, 3):
-            stroke_intensity = np.random.normal(0, intensity * 40, height)
-            for c in range(channels):
-                strokes[:, x:x+2, c] += stroke_intensity
+        # Vertical pencil strokes: two columns out of every 3, one value per stroke and row
+        image_cols = np.arange(border_size, border_size + region_w)
+        first = image_cols[0] // 3
+        stroke_intensity = gaussian_noise((region_h, image_cols[-1] // 3 - first + 1),
+                                          intensity * 40, rng=rng)
+        strokes = stroke_intensity[:, image_cols // 3 - first]
+        strokes *= image_cols % 3 < 2
     elif stroke_direction == 'diagonal':
-        # Diagonal pencil strokes
-        for i in range(0, max(height, width), 4):
-            stroke_intensity = np.random.normal(0, intensity * 30)
-            for c in range(channels):
-                # Create diagonal strokes
-                for j in range(min(3, height-i), min(3, width-i)):
-                    if i+j < height and j < width:
-                        strokes[i+j, j, c] += stroke_intensity
-    
-    # Exclude border if specified
-    if border_size > 0:
-        strokes[:border_size, :] = 0
-        strokes[-border_size:, :] = 0
-        strokes[:, :border_size] = 0
-        strokes[:, -border_size:] = 0
+        # Diagonal pencil strokes along every 4th diagonal, one value per stroke; strokes
+        # start on the top and left edges of the area
+        top_x = np.arange(0, region_w, 4)
+        left_y = np.arange(4, region_h, 4)
+        start_x = np.concatenate([top_x, np.zeros_like(left_y)])
+        start_y = np.concatenate([np.zeros_like(top_x), left_y])
+        lengths = np.minimum(region_h - start_y, region_w - start_x)
+        ones = np.ones(len(lengths))
+        ys, xs, stroke = stroke_points(start_y, start_x, lengths, ones, ones)
+        stroke_intensity = rng.normal(0, intensity * 30, len(lengths))
+        strokes = rasterize_strokes((region_h, region_w), ys, xs, stroke_intensity[stroke])
+    else:
+        return Image.fromarray(img_array)
     
     # Apply pencil effect
-    result = img_array.astype(np.float32) + strokes
-    result = np.clip(result, 0, 255)
+    add_noise(region, strokes[..., None])
     
-    return Image.fromarray(result.astype(np.uint8))
+    return Image.fromarray(img_array)
 
 
 def apply_watercolor_effect(image: Image.Image, intensity: float = 0.3, 
-                           bleeding: float = 0.4, border_size: int = 0) -> Image.Image:
+                           bleeding: float = 0.4, border_size: int = 0,
+                           rng: RngLike = None, bands: dict = None) -> Image.Image:
     """
     Apply watercolor-like effect to gradient bands.
     
@@ -122,46 +189,34 @@ def apply_watercolor_effect(image: Image.Image, intensity: float = 0.3,
         intensity: Effect intensity (0.0 to 1.0)
         bleeding: Color bleeding amount (0.0 to 1.0)
         border_size: Border size to exclude from effect
+        rng: Seed or numpy Generator for the random draws
+        bands: Band info of the render; confines the soft bleeding edges to 3 rows around
+            each band edge (without it they apply everywhere)
     
     Returns:
         PIL Image with watercolor effect applied
     """
     img_array = np.array(image)
-    height, width, channels = img_array.shape
     
-    # Create watercolor bleeding effect
-    watercolor_noise = np.random.normal(0, intensity * 30, (height, width, channels))
-    
-    # Add color bleeding between bands
-    if bleeding > 0:
-        # Create soft edges
-        soft_edges = np.random.normal(0, bleeding * 25, (height, width, channels))
-        watercolor_noise += soft_edges
-    
-    # Exclude border if specified
-    if border_size > 0:
-        watercolor_noise[:border_size, :] = 0
-        watercolor_noise[-border_size:, :] = 0
-        watercolor_noise[:, :border_size] = 0
-        watercolor_noise[:, -border_size:] = 0
-    
-    # Apply watercolor effect
-    result = img_array.astype(np.float32) + watercolor_noise
+    # Watercolor noise plus soft bleeding edges, drawn as one field with the combined spread
+    sigma = combined_sigma(intensity * 30, bleeding * 25 if bleeding > 0 else 0)
+    if bands is None:
+        add_gaussian_grain(img_array, sigma, border_size, rng=rng)
+    else:
+        weights = _band_edge_sigma(bands, interior(img_array, border_size).shape[:2], 3,
+                                   intensity * 30, sigma)
+        add_gaussian_grain(img_array, 1.0, border_size, weights=weights, rng=rng)
     
     # Add slight blur for watercolor feel
     if intensity > 0.2:
-        # Convert to PIL for blur
-        temp_img = Image.fromarray(result.astype(np.uint8))
-        temp_img = temp_img.filter(ImageFilter.GaussianBlur(radius=0.5))
-        result = np.array(temp_img)
+        return Image.fromarray(img_array).filter(ImageFilter.GaussianBlur(radius=0.5))
     
-    result = np.clip(result, 0, 255)
-    
-    return Image.fromarray(result.astype(np.uint8))
+    return Image.fromarray(img_array)
 
 
 def apply_oil_paint_effect(image: Image.Image, intensity: float = 0.4, 
-                          brush_size: float = 2.0, border_size: int = 0) -> Image.Image:
+                          brush_size: float = 2.0, border_size: int = 0,
+                          rng: RngLike = None, num_strokes: int = None) -> Image.Image:
     """
     Apply oil paint-like effect to gradient bands.
     
@@ -170,52 +225,40 @@ def apply_oil_paint_effect(image: Image.Image, intensity: float = 0.4,
         intensity: Effect intensity (0.0 to 1.0)
         brush_size: Brush stroke size (1.0 to 4.0)
         border_size: Border size to exclude from effect
+        rng: Seed or numpy Generator for the random draws
+        num_strokes: Number of brush strokes (default: intensity * 100)
     
     Returns:
         PIL Image with oil paint effect applied
     """
+    rng = make_rng(rng)
     img_array = np.array(image)
     height, width, channels = img_array.shape
     
-    # Create oil paint texture
-    oil_texture = np.random.normal(0, intensity * 40, (height, width, channels))
-    
-    # Add brush stroke effects
-    brush_strokes = np.zeros((height, width, channels))
-    stroke_size = int(brush_size)
-    
-    for _ in range(int(intensity * 100)):  # Number of brush strokes
-        # Random brush stroke
-        start_x = random.randint(0, width-1)
-        start_y = random.randint(0, height-1)
-        length = random.randint(10, 30)
-        angle = random.uniform(0, 2 * math.pi)
-        
-        for i in range(length):
-            x = int(start_x + i * math.cos(angle))
-            y = int(start_y + i * math.sin(angle))
-            
-            if 0 <= x < width and 0 <= y < height:
-                stroke_intensity = random.uniform(-intensity * 30, intensity * 30)
-                for c in range(channels):
-                    brush_strokes[y:y+stroke_size, x:x+stroke_size, c] += stroke_intensity
-    
-    # Exclude border if specified
-    if border_size > 0:
-        oil_texture[:border_size, :] = 0
-        oil_texture[-border_size:, :] = 0
-        oil_texture[:, :border_size] = 0
-        oil_texture[:, -border_size:] = 0
-        brush_strokes[:border_size, :] = 0
-        brush_strokes[-border_size:, :] = 0
-        brush_strokes[:, :border_size] = 0
-        brush_strokes[:, -border_size:] = 0
-    
-    # Apply oil paint effect
-    result = img_array.astype(np.float32) + oil_texture + brush_strokes
-    result = np.clip(result, 0, 255)
-    
-    return Image.fromarray(result.astype(np.uint8))
+    # Random brush strokes, all drawn at once; each point of a stroke adds its own value
+    # over a brush-sized square
+    if num_strokes is None:
+        num_strokes = int(intensity * 100)
+    start_x = rng.integers(0, width, size=num_strokes)
+    start_y = rng.integers(0, height, size=num_strokes)
+    lengths = rng.integers(10, 31, size=num_strokes)
+    angles = rng.uniform(0, 2 * math.pi, size=num_strokes)
+    ys, xs, _ = stroke_points(start_y, start_x, lengths, np.sin(angles), np.cos(angles))
+    
+    # Points off the image are skipped, as they would be when painting on it
+    on_image = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    ys, xs = ys[on_image], xs[on_image]
+    stroke_intensity = rng.uniform(-intensity * 30, intensity * 30, size=len(ys))
+    
+    # Oil paint texture is drawn for the area inside the border only
+    region = interior(img_array, border_size)
+    if region.size:
+        oil_texture = gaussian_noise(region.shape, intensity * 40, rng=rng)
+        oil_texture += rasterize_strokes(region.shape[:2], ys - border_size, xs - border_size,
+                                         stroke_intensity, int(brush_size))[..., None]
+        add_noise(region, oil_texture)
+    
+    return Image.fromarray(img_array)
 
 
 def main():
@@ -231,6 +274,8 @@ def main():
                        help='Effect intensity (0.0-1.0)')
     parser.add_argument('--border-size', type=int, default=0, 
                        help='Border size to exclude from effect')
+    parser.add_argument('--seed', type=int, 
+                       help='Seed for reproducible output')
     parser.add_argument('--roughness', type=float, default=0.5, 
                        help='Edge roughness for crayon effect')
     parser.add_argument('--stroke-direction', choices=['horizontal', 'vertical', 'diagonal'], 
@@ -239,21 +284,35 @@ def main():
                        help='Color bleeding for watercolor effect')
     parser.add_argument('--brush-size', type=float, default=2.0, 
                        help='Brush size for oil paint effect')
+    parser.add_argument('--num-strokes', type=int, 
+                       help='Number of brush strokes for oil paint effect (default: intensity * 100)')
+    parser.add_argument('--band-map', 
+                       help='Band map (.npz) written by the generator, for band-aware effects')
     
     args = parser.parse_args()
     
-    # Load image
+    # Load image (palette PNGs from the generator are expanded to RGB)
     image = Image.open(args.input)
+    if image.mode == 'P':
+        image = image.convert('RGB')
+    bands = None
+    if args.band_map:
+        bands = load_band_info(args.band_map)
+        args.border_size = bands['border']
     
     # Apply effect based on type
     if args.effect == 'crayon':
-        result = apply_crayon_effect(image, args.intensity, args.roughness, args.border_size)
+        result = apply_crayon_effect(image, args.intensity, args.roughness, args.border_size,
+                                     rng=args.seed, bands=bands)
     elif args.effect == 'pencil':
-        result = apply_pencil_effect(image, args.intensity, args.stroke_direction, args.border_size)
+        result = apply_pencil_effect(image, args.intensity, args.stroke_direction, args.border_size,
+                                     rng=args.seed, bands=bands)
     elif args.effect == 'watercolor':
-        result = apply_watercolor_effect(image, args.intensity, args.bleeding, args.border_size)
+        result = apply_watercolor_effect(image, args.intensity, args.bleeding, args.border_size,
+                                         rng=args.seed, bands=bands)
     elif args.effect == 'oil':
-        result = apply_oil_paint_effect(image, args.intensity, args.brush_size, args.border_size)
+        result = apply_oil_paint_effect(image, args.intensity, args.brush_size, args.border_size,
+                                        rng=args.seed, num_strokes=args.num_strokes)
     
     # Save result
     result.save(args.output)
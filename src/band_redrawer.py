@@ -3,13 +3,18 @@
 Band Redrawer - Artistic Band Redrawing
 Takes existing wave images and redraws the bands with artistic texture.
 Does not modify original wave generation code.
+Bands are labelled over the whole image (following the wave in every column)
+and textured in one array operation from a block of float32 noise.
 """
 
 import numpy as np
 from PIL import Image, ImageFilter
-import random
 import math
 
+from comprehensive_wave_generator import band_extents, band_positions, load_band_info
+from grain_engine import combined_sigma, gaussian_noise, interior
+from random_streams import RngLike, make_rng
+
 
 def detect_bands(image: Image.Image, border_size: int = 0) -> list:
     """
@@ -54,8 +59,138 @@ def detect_bands(image: Image.Image, border_size: int = 0) -> list:
     return band_boundaries
 
 
-def redraw_bands_crayon(image: Image.Image, intensity: float = 0.5, 
-                        roughness: float = 0.7, border_size: int = 0) -> Image.Image:
+def detect_band_map(image: Image.Image, border_size: int = 0, threshold: float = 30,
+                    sample_rows: int = 64, blended_edges: bool = False) -> np.ndarray:
+    """
+    Label every interior pixel with the band it belongs to.
+    
+    Boundaries are found in every column at once, where the summed absolute color
+    difference to the pixel above exceeds threshold (one np.diff pass). A band can be a
+    single row tall (steps close to the image height); with blended_edges, a one-row step
+    whose color lies between the rows above and below it is instead taken as an
+    anti-aliased edge pixel and merged into the band above. Bands are counted down each
+    column, and the counts of neighbouring columns are aligned so a band keeps its label
+    as the wave moves it: the shift between two columns is the median label difference
+    over sampled rows where both columns show the same color. Grained images should be
+    labelled before the grain is added (or with a higher threshold).
+    
+    Args:
+        image: PIL Image with gradient bands
+        border_size: Border size to exclude from detection
+        threshold: Minimum color change (sum over channels) for a boundary
+        sample_rows: Number of rows used to align neighbouring columns
+        blended_edges: Merge blended one-row edges (anti-aliased renders) into their bands
+    
+    Returns:
+        int32 (height, width) label map of the interior, labels counting up from 0
+    """
+    region = interior(np.asarray(image.convert('RGB')), border_size)
+    height, width = region.shape[:2]
+    labels = np.zeros((height, width), dtype=np.int32)
+    if region.size == 0:
+        return labels
+    
+    # Color changes between vertically adjacent pixels, for the whole interior at once
+    pixels = region.astype(np.int16)
+    change = np.abs(np.diff(pixels, axis=0)).sum(axis=2) > threshold
+    if blended_edges and height > 2:
+        # A change right after another, at a pixel colored between its two neighbours,
+        # is a blended edge pixel (anti-aliasing) rather than a one-row band
+        above, middle, below = pixels[:-2], pixels[1:-1], pixels[2:]
+        between = ((middle >= np.minimum(above, below)) &
+                   (middle <= np.maximum(above, below))).all(axis=2)
+        # Clear the step above the blended pixel so it joins the band above, as in
+        # hard_band_map (the mask is taken from the unmodified changes)
+        merge = change[1:] & change[:-1] & between
+        change[:-1] &= ~merge
+    np.cumsum(change, axis=0, out=labels[1:])
+    
+    if width > 1:
+        # Align each column with its left neighbour on rows where both show the same band
+        rows = np.linspace(0, height - 1, min(sample_rows, height)).astype(np.int64)
+        sampled = region[rows].astype(np.int16)
+        same = np.abs(sampled[:, 1:] - sampled[:, :-1]).sum(axis=2) <= threshold
+        shift = np.where(same, labels[rows, :-1] - labels[rows, 1:], np.nan)
+        shift[:, ~same.any(axis=0)] = 0
+        offsets = np.zeros(width, dtype=np.int32)
+        np.cumsum(np.rint(np.nanmedian(shift, axis=0)).astype(np.int32), out=offsets[1:])
+        labels += offsets
+        labels -= labels.min()
+    return labels
+
+
+def band_boundary_table(labels: np.ndarray):
+    """
+    Per-column extent of every band of a label map from detect_band_map.
+    
+    Returns:
+        (top, bottom) int32 (num_bands, width) arrays: band l covers rows
+        top[l, x]:bottom[l, x] of column x (none where top == bottom)
+    """
+    return band_extents(labels, int(labels.max()) + 1 if labels.size else 0)
+
+
+def band_means(region: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """float32 (num_bands, channels) average color of every band of a label map."""
+    flat_labels = labels.ravel()
+    counts = np.maximum(np.bincount(flat_labels), 1)
+    pixels = region.reshape(-1, region.shape[2])
+    sums = [np.bincount(flat_labels, weights=pixels[:, c], minlength=len(counts))
+            for c in range(pixels.shape[1])]
+    return (np.stack(sums, axis=1) / counts[:, None]).astype(np.float32)
+
+
+def _redraw_bands(image: Image.Image, border_size: int, draw, bands: dict = None,
+                  num_bands: int = 20) -> Image.Image:
+    """
+    Redraw every band of an image in one pass over the interior.
+    
+    Bands come from the generator's band info when given (see generate_wave_variation's
+    return_bands), otherwise from detect_band_map.
+    
+    draw(avg_color, from_top, from_bottom, rows, cols) returns the float32 texture of the
+    interior; avg_color holds each pixel's band average, from_top / from_bottom its
+    distance in rows to the first / last row of its band in its column, and rows / cols
+    the absolute row and column indices of the interior.
+    """
+    img_array = np.array(image)
+    region = interior(img_array, border_size)
+    if region.size == 0:
+        return image
+    height, width = region.shape[:2]
+    
+    if bands is not None:
+        labels, top, bottom = bands['labels'], bands['top'], bands['bottom']
+        if labels.shape != (height, width):
+            raise ValueError("Band map does not match the image area inside the border")
+    else:
+        labels = detect_band_map(image, border_size)
+        if not labels.any():
+            # Fallback: create bands based on height
+            band_height = max(1, height // num_bands)
+            labels = np.repeat(np.minimum(np.arange(height) // band_height, num_bands - 1)[:, None],
+                               width, axis=1).astype(np.int32)
+        top, bottom = band_boundary_table(labels)
+    
+    # Position of every pixel within its band, from the per-column band extents
+    from_top, from_bottom = band_positions(labels, top, bottom)
+    avg_color = band_means(region, labels)[labels]
+    
+    texture = draw(avg_color, from_top, from_bottom,
+                   np.arange(border_size, border_size + height), np.arange(border_size, border_size + width))
+    np.clip(texture, 0, 255, out=texture)
+    region[...] = texture
+    return Image.fromarray(img_array)
+
+
+def _near_edge(from_top: np.ndarray, from_bottom: np.ndarray, distance: int) -> np.ndarray:
+    """Mask of the pixels less than distance rows below the top or above the end of their band."""
+    return (from_top < distance) | (from_bottom + 1 < distance)
+
+
+def redraw_bands_crayon(image: Image.Image, intensity: float = 0.5,
+                        roughness: float = 0.7, border_size: int = 0,
+                        rng: RngLike = None, bands: dict = None) -> Image.Image:
     """
     Redraw gradient bands with crayon-like texture.
     
@@ -64,67 +199,34 @@ def redraw_bands_crayon(image: Image.Image, intensity: float = 0.5,
         intensity: Crayon effect intensity (0.0 to 1.0)
         roughness: Edge roughness (0.0 to 1.0)
         border_size: Border size to exclude from redrawing
+        rng: Seed or numpy Generator for the random draws
+        bands: Band info of the render (skips band detection)
     
     Returns:
         PIL Image with crayon-redrawn bands
     """
-    img_array = np.array(image)
-    height, width, channels = img_array.shape
+    rng = make_rng(rng)
     
-    # Detect band boundaries
-    band_boundaries = detect_bands(image, border_size)
+    def draw(avg_color, from_top, from_bottom, rows, cols):
+        # Crayon texture: irregular, waxy
+        crayon_noise = gaussian_noise(avg_color.shape, intensity * 50, rng=rng)
     
-    if not band_boundaries:
-        # Fallback: create bands based on height
-        num_bands = 20  # Default number of bands
-        band_height = (height - 2 * border_size) // num_bands
-        band_boundaries = [border_size + i * band_height for i in range(1, num_bands)]
+        # Add roughness to edges: one random factor per pixel within 5 rows of a band edge
+        edge_factor = np.where(_near_edge(from_top, from_bottom, 5),
+                               1.0 + roughness * gaussian_noise(from_top.shape, 0.3, rng=rng),
+                               np.float32(1.0))
     
-    # Create new image
-    result = np.copy(img_array)
+        # Apply crayon effect
+        crayon_noise *= edge_factor[..., None]
+        crayon_noise += avg_color
+        return crayon_noise
     
-    # Redraw each band with crayon texture
-    for i in range(len(band_boundaries) + 1):
-        # Determine band boundaries
-        if i == 0:
-            start_y = border_size
-        else:
-            start_y = band_boundaries[i-1]
-        
-        if i == len(band_boundaries):
-            end_y = height - border_size
-        else:
-            end_y = band_boundaries[i]
-        
-        if start_y >= end_y:
-            continue
-        
-        # Get the average color of this band
-        band_region = img_array[start_y:end_y, border_size:width-border_size, :]
-        avg_color = np.mean(band_region, axis=(0, 1))
-        
-        # Add crayon texture to this band
-        for y in range(start_y, end_y):
-            for x in range(border_size, width - border_size):
-                # Crayon texture: irregular, waxy
-                crayon_noise = np.random.normal(0, intensity * 50, channels)
-                
-                # Add roughness to edges
-                edge_factor = 1.0
-                if y - start_y < 5 or end_y - y < 5:  # Near band edges
-                    edge_factor = 1.0 + roughness * np.random.normal(0, 0.3)
-                
-                # Apply crayon effect
-                new_color = avg_color + crayon_noise * edge_factor
-                new_color = np.clip(new_color, 0, 255)
-                
-                result[y, x] = new_color
-    
-    return Image.fromarray(result.astype(np.uint8))
+    return _redraw_bands(image, border_size, draw, bands)
 
 
-def redraw_bands_pencil(image: Image.Image, intensity: float = 0.6, 
-                       stroke_direction: str = 'horizontal', border_size: int = 0) -> Image.Image:
+def redraw_bands_pencil(image: Image.Image, intensity: float = 0.6,
+                       stroke_direction: str = 'horizontal', border_size: int = 0,
+                       rng: RngLike = None, bands: dict = None) -> Image.Image:
     """
     Redraw gradient bands with pencil-like strokes.
     
@@ -133,75 +235,40 @@ def redraw_bands_pencil(image: Image.Image, intensity: float = 0.6,
         intensity: Pencil effect intensity (0.0 to 1.0)
         stroke_direction: 'horizontal', 'vertical', or 'diagonal'
         border_size: Border size to exclude from redrawing
+        rng: Seed or numpy Generator for the random draws
+        bands: Band info of the render (skips band detection)
     
     Returns:
         PIL Image with pencil-redrawn bands
     """
-    img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Detect band boundaries
-    band_boundaries = detect_bands(image, border_size)
+    rng = make_rng(rng)
+    
+    def draw(avg_color, from_top, from_bottom, rows, cols):
+        # Pencil stroke texture: the same value on every channel of a stroke pixel
+        if stroke_direction == 'horizontal':
+            # Horizontal pencil strokes, every 3rd row of each band (following the wave)
+            strokes, sigma = from_top % 3 == 0, intensity * 40
+        elif stroke_direction == 'vertical':
+            # Vertical pencil strokes, every 3rd column
+            strokes, sigma = ((cols - cols[0]) % 3 == 0)[None, :], intensity * 40
+        elif stroke_direction == 'diagonal':
+            # Diagonal pencil strokes
+            strokes, sigma = (rows[:, None] + cols[None, :]) % 4 == 0, intensity * 30
+        else:
+            strokes, sigma = np.zeros((1, 1), dtype=bool), 0.0
     
-    if not band_boundaries:
-        # Fallback: create bands based on height
-        num_bands = 20
-        band_height = (height - 2 * border_size) // num_bands
-        band_boundaries = [border_size + i * band_height for i in range(1, num_bands)]
+        stroke_intensity = gaussian_noise(from_top.shape, sigma, rng=rng)
+        stroke_intensity *= strokes
     
-    # Create new image
-    result = np.copy(img_array)
+        # Apply pencil effect
+        return stroke_intensity[..., None] + avg_color
     
-    # Redraw each band with pencil strokes
-    for i in range(len(band_boundaries) + 1):
-        # Determine band boundaries
-        if i == 0:
-            start_y = border_size
-        else:
-            start_y = band_boundaries[i-1]
-        
-        if i == len(band_boundaries):
-            end_y = height - border_size
-        else:
-            end_y = band_boundaries[i]
-        
-        if start_y >= end_y:
-            continue
-        
-        # Get the average color of this band
-        band_region = img_array[start_y:end_y, border_size:width-border_size, :]
-        avg_color = np.mean(band_region, axis=(0, 1))
-        
-        # Add pencil strokes to this band
-        for y in range(start_y, end_y):
-            for x in range(border_size, width - border_size):
-                # Pencil stroke texture
-                stroke_intensity = 0
-                
-                if stroke_direction == 'horizontal':
-                    # Horizontal pencil strokes
-                    if (y - start_y) % 3 == 0:  # Every 3rd row
-                        stroke_intensity = np.random.normal(0, intensity * 40)
-                elif stroke_direction == 'vertical':
-                    # Vertical pencil strokes
-                    if (x - border_size) % 3 == 0:  # Every 3rd column
-                        stroke_intensity = np.random.normal(0, intensity * 40)
-                elif stroke_direction == 'diagonal':
-                    # Diagonal pencil strokes
-                    if (x + y) % 4 == 0:
-                        stroke_intensity = np.random.normal(0, intensity * 30)
-                
-                # Apply pencil effect
-                new_color = avg_color + stroke_intensity
-                new_color = np.clip(new_color, 0, 255)
-                
-                result[y, x] = new_color
-    
-    return Image.fromarray(result.astype(np.uint8))
+    return _redraw_bands(image, border_size, draw, bands)
 
 
-def redraw_bands_watercolor(image: Image.Image, intensity: float = 0.4, 
-                           bleeding: float = 0.6, border_size: int = 0) -> Image.Image:
+def redraw_bands_watercolor(image: Image.Image, intensity: float = 0.4,
+                           bleeding: float = 0.6, border_size: int = 0,
+                           rng: RngLike = None, bands: dict = None) -> Image.Image:
     """
     Redraw gradient bands with watercolor-like bleeding.
     
@@ -210,63 +277,28 @@ def redraw_bands_watercolor(image: Image.Image, intensity: float = 0.4,
         intensity: Watercolor effect intensity (0.0 to 1.0)
         bleeding: Color bleeding amount (0.0 to 1.0)
         border_size: Border size to exclude from redrawing
+        rng: Seed or numpy Generator for the random draws
+        bands: Band info of the render (skips band detection)
     
     Returns:
         PIL Image with watercolor-redrawn bands
     """
-    img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Detect band boundaries
-    band_boundaries = detect_bands(image, border_size)
-    
-    if not band_boundaries:
-        # Fallback: create bands based on height
-        num_bands = 20
-        band_height = (height - 2 * border_size) // num_bands
-        band_boundaries = [border_size + i * band_height for i in range(1, num_bands)]
-    
-    # Create new image
-    result = np.copy(img_array)
-    
-    # Redraw each band with watercolor bleeding
-    for i in range(len(band_boundaries) + 1):
-        # Determine band boundaries
-        if i == 0:
-            start_y = border_size
-        else:
-            start_y = band_boundaries[i-1]
-        
-        if i == len(band_boundaries):
-            end_y = height - border_size
-        else:
-            end_y = band_boundaries[i]
-        
-        if start_y >= end_y:
-            continue
-        
-        # Get the average color of this band
-        band_region = img_array[start_y:end_y, border_size:width-border_size, :]
-        avg_color = np.mean(band_region, axis=(0, 1))
-        
-        # Add watercolor bleeding to this band
-        for y in range(start_y, end_y):
-            for x in range(border_size, width - border_size):
-                # Watercolor bleeding effect
-                bleeding_noise = np.random.normal(0, intensity * 30, channels)
-                
-                # Add color bleeding at edges
-                edge_bleeding = 0
-                if y - start_y < 3 or end_y - y < 3:  # Near band edges
-                    edge_bleeding = np.random.normal(0, bleeding * 25, channels)
-                
-                # Apply watercolor effect
-                new_color = avg_color + bleeding_noise + edge_bleeding
-                new_color = np.clip(new_color, 0, 255)
-                
-                result[y, x] = new_color
-    
-    return Image.fromarray(result.astype(np.uint8))
+    rng = make_rng(rng)
+    
+    def draw(avg_color, from_top, from_bottom, rows, cols):
+        # Watercolor bleeding noise, plus independent edge bleeding within 3 rows of a band
+        # edge: the sum of the two is drawn at once with their combined sigma
+        sigma = np.where(_near_edge(from_top, from_bottom, 3),
+                         np.float32(combined_sigma(intensity * 30, bleeding * 25)),
+                         np.float32(intensity * 30))
+        bleeding_noise = gaussian_noise(avg_color.shape, rng=rng)
+        bleeding_noise *= sigma[..., None]
+    
+        # Apply watercolor effect
+        bleeding_noise += avg_color
+        return bleeding_noise
+    
+    return _redraw_bands(image, border_size, draw, bands)
 
 
 def main():
@@ -282,25 +314,38 @@ def main():
                        help='Effect intensity (0.0-1.0)')
     parser.add_argument('--border-size', type=int, default=0, 
                        help='Border size to exclude from redrawing')
+    parser.add_argument('--seed', type=int, 
+                       help='Seed for reproducible output')
     parser.add_argument('--roughness', type=float, default=0.7, 
                        help='Edge roughness for crayon effect')
     parser.add_argument('--stroke-direction', choices=['horizontal', 'vertical', 'diagonal'], 
                        default='horizontal', help='Stroke direction for pencil effect')
     parser.add_argument('--bleeding', type=float, default=0.6, 
                        help='Color bleeding for watercolor effect')
+    parser.add_argument('--band-map', 
+                       help='Band map (.npz) written by the generator; skips band detection')
     
     args = parser.parse_args()
     
-    # Load image
+    # Load image (palette PNGs from the generator are expanded to RGB)
     image = Image.open(args.input)
+    if image.mode == 'P':
+        image = image.convert('RGB')
+    bands = None
+    if args.band_map:
+        bands = load_band_info(args.band_map)
+        args.border_size = bands['border']
     
     # Apply effect based on type
     if args.effect == 'crayon':
-        result = redraw_bands_crayon(image, args.intensity, args.roughness, args.border_size)
+        result = redraw_bands_crayon(image, args.intensity, args.roughness, args.border_size,
+                                     rng=args.seed, bands=bands)
     elif args.effect == 'pencil':
-        result = redraw_bands_pencil(image, args.intensity, args.stroke_direction, args.border_size)
+        result = redraw_bands_pencil(image, args.intensity, args.stroke_direction, args.border_size,
+                                     rng=args.seed, bands=bands)
     elif args.effect == 'watercolor':
-        result = redraw_bands_watercolor(image, args.intensity, args.bleeding, args.border_size)
+        result = redraw_bands_watercolor(image, args.intensity, args.bleeding, args.border_size,
+                                         rng=args.seed, bands=bands)
     
     # Save result
     result.save(args.output)
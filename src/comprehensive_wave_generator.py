@@ -6,13 +6,16 @@ Generates all 16 wave variations (1A-1D, 2A-2D, 3A-3H) with vertical flipping su
 """
 
 import argparse
+from functools import lru_cache
 from typing import List, Tuple
 from PIL import Image
 import numpy as np
-import math
 import json
 import os
-import random
+import shutil
+
+from wave_registry import WAVE_STYLES, compile_wave_style, is_flipped
+from render_cache import RenderCache, save_with_params
 
 
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
@@ -21,240 +24,360 @@ def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
 
-def generate_wave_variation(width: int, height: int, colors: List[str], steps: int,
-                          wave_type: str, border: int = 0, border_color: str = None, 
-                          wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
-                          center_shift: float = 0.0, asymmetry: float = 0.0,
-                          organic_jitter: float = 0.0, random_seed: int = None) -> Image.Image:
-    """Generate a specific wave variation (1A-1D, 2A-2D, 3A-3H)."""
+def band_color_table(colors: List[str], steps: int) -> np.ndarray:
+    """Average the palette evenly into one RGB color per step (steps x 3, uint8)."""
+    colors_per_step = len(colors) / steps
+    rgb = np.array([hex_to_rgb(color) for color in colors], dtype=np.int64)
+    table = np.zeros((steps, 3), dtype=np.uint8)
+    for step in range(steps):
+        start_idx = int(step * colors_per_step)
+        end_idx = max(start_idx + 1, int((step + 1) * colors_per_step))
+        slice_rgb = rgb[start_idx:end_idx]
+        if len(slice_rgb) == 0:
+            table[step] = rgb[0]  # Fallback to first color
+        else:
+            table[step] = slice_rgb.sum(axis=0) // len(slice_rgb)
+    # Black bands are treated as unfilled and take the top band color (first color)
+    table[~table.any(axis=1)] = rgb[0]
+    return table
+
+
+def organic_noise(grad_width: int, random_seed: int = None) -> np.ndarray:
+    """Smooth random noise across x in [-1, 1] for organic jitter."""
+    # A private RandomState draws the same knots the old global np.random.seed() call did,
+    # so seeded presets keep their exact shapes without touching global RNG state
+    knot_rng = np.random.RandomState(None if random_seed is None else int(random_seed))
+    x_coords = np.arange(grad_width)
+    # Choose knot spacing ~80px, at least 2 knots
+    n_knots = max(2, grad_width // 80)
+    knot_positions = np.linspace(0, grad_width - 1, n_knots)
+    knot_values = knot_rng.uniform(-1.0, 1.0, size=n_knots)
+    # Interpolate to full width
+    smooth_noise = np.interp(x_coords, knot_positions, knot_values)
+    # Light smoothing
+    kernel = np.array([0.25, 0.5, 0.25])
+    return np.convolve(smooth_noise, kernel, mode='same')
+
+
+@lru_cache(maxsize=64)
+def _memoized_column_offsets(*args) -> np.ndarray:
+    offsets = _column_offsets(*args)
+    offsets.setflags(write=False)
+    return offsets
+
+
+def _column_shift_components(grad_width: int, grad_height: int, wave_type: str,
+                             wave_amplitude: float, amplitude_scale: float, center_shift: float,
+                             asymmetry: float, organic_jitter: float,
+                             random_seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sub-pixel wave and jitter shifts per column (jitter is None when disabled)."""
+    normalized_x = np.arange(grad_width) / grad_width
+    amplitude_profile = compile_wave_style(wave_type)
+    current_amp, wave_frequency = amplitude_profile(normalized_x, wave_amplitude, amplitude_scale,
+                                                    center_shift, asymmetry)
+    wave_shift = current_amp * grad_height * np.sin(2 * np.pi * wave_frequency * normalized_x)
+    jitter_shift = None
+    # Add organic jitter component if enabled
+    if organic_jitter and organic_jitter != 0.0 and grad_width > 1:
+        smooth_noise = organic_noise(grad_width, random_seed)
+        jitter_shift = organic_jitter * grad_height * smooth_noise
+    return wave_shift, jitter_shift
+
+
+def _column_offsets(*args) -> np.ndarray:
+    wave_shift, jitter_shift = _column_shift_components(*args)
+    wave_offset = np.trunc(wave_shift).astype(np.int64)
+    if jitter_shift is not None:
+        wave_offset += np.trunc(jitter_shift).astype(np.int64)
+    # Apply vertical flip if needed
+    if is_flipped(args[2]):
+        wave_offset = -wave_offset
+    return wave_offset
+
+
+def compute_column_offsets(grad_width: int, grad_height: int, wave_type: str,
+                           wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                           center_shift: float = 0.0, asymmetry: float = 0.0,
+                           organic_jitter: float = 0.0, random_seed: int = None) -> np.ndarray:
+    """
+    Compute the signed per-column band shift in pixels (vertical flip applied).
+
+    Results are memoized across renders unless unseeded organic jitter makes them random;
+    memoized arrays are read-only.
+    """
+    args = (grad_width, grad_height, wave_type, float(wave_amplitude), float(amplitude_scale),
+            float(center_shift), float(asymmetry), float(organic_jitter),
+            None if random_seed is None else int(random_seed))
+    if organic_jitter and random_seed is None:
+        return _column_offsets(*args)
+    return _memoized_column_offsets(*args)
+
+
+def band_index_map(grad_height: int, steps: int, offsets: np.ndarray,
+                   row_start: int = 0, row_stop: int = None) -> np.ndarray:
+    """Build the map of band indices for rows [row_start, row_stop) of the gradient area."""
+    if row_stop is None:
+        row_stop = grad_height
+    # Every pixel reads its band from a lookup over the shifted row (y + offset), so the
+    # float step math only runs once per distinct shifted row instead of once per pixel.
+    low = min(row_start, row_start + int(offsets.min()))
+    high = row_stop + max(0, int(offsets.max()))
+    adjusted_y = np.arange(low, high)
+    step = np.trunc(adjusted_y / grad_height * steps)
+    lookup = np.clip(step, 0, steps - 1).astype(np.uint8 if steps <= 256 else np.uint16)
+    rows = np.arange(row_start, row_stop)[:, None] - low
+    return lookup[rows + offsets[None, :]]
+
+
+def compute_column_shift(grad_width: int, grad_height: int, wave_type: str,
+                         wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                         center_shift: float = 0.0, asymmetry: float = 0.0,
+                         organic_jitter: float = 0.0, random_seed: int = None) -> np.ndarray:
+    """Compute the signed per-column band shift in pixels without truncation (float64)."""
+    wave_shift, jitter_shift = _column_shift_components(grad_width, grad_height, wave_type,
+                                                        wave_amplitude, amplitude_scale,
+                                                        center_shift, asymmetry,
+                                                        organic_jitter, random_seed)
+    shift = wave_shift if jitter_shift is None else wave_shift + jitter_shift
+    return -shift if is_flipped(wave_type) else shift
+
+
+def hard_band_map(grad_height: int, steps: int, shift: np.ndarray) -> np.ndarray:
+    """
+    Band index map for untruncated per-column shifts: band k starts at the first row at
+    or below y = k * grad_height / steps - shift in each column.
+    """
+    grad_width = len(shift)
+    columns = np.arange(grad_width)
+    edges = np.arange(1, steps)[:, None] * (grad_height / steps) - shift[None, :]
+    first_rows = np.clip(np.ceil(edges), 0, grad_height).astype(np.int64)
+    delta = np.zeros((grad_height + 1, grad_width), dtype=np.uint8 if steps <= 256 else np.uint16)
+    np.add.at(delta, (first_rows, np.broadcast_to(columns, first_rows.shape)), 1)
+    return np.cumsum(delta[:grad_height], axis=0, dtype=delta.dtype)
+
+
+def antialiased_band_image(grad_height: int, color_table: np.ndarray,
+                           shift: np.ndarray, bands: np.ndarray = None) -> np.ndarray:
+    """
+    Render the gradient area with band edges blended by their sub-pixel coverage.
+
+    Band k starts at y = k * grad_height / steps - shift in each column. Pixels are filled
+    with hard bands from those edges (hard_band_map, unless precomputed bands are given),
+    then only the one pixel straddling each edge is blended between the two neighbouring
+    band colors.
+    """
+    steps = len(color_table)
+    edges = np.arange(1, steps)[:, None] * (grad_height / steps) - shift[None, :]
+
+    # Hard bands: the band index steps up by one at the first row at or below each edge
+    if bands is None:
+        bands = hard_band_map(grad_height, steps, shift)
+    image = color_table[bands]
+
+    # The straddling pixel keeps band k-1 above the edge and band k below it
+    edge_rows = np.floor(edges)
+    coverage = edges - edge_rows
+    inside = (coverage > 0) & (edge_rows >= 0) & (edge_rows < grad_height)
+    k, x = np.nonzero(inside)
+    rows = edge_rows[k, x].astype(np.int64)
+    weight = coverage[k, x][:, None]
+    table = color_table.astype(np.float64)
+    image[rows, x] = np.round(table[k] * weight + table[k + 1] * (1 - weight)).astype(np.uint8)
+    return image
+
+
+def band_extents(bands: np.ndarray, num_bands: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-column extent of every band of a band map whose labels grow down each column.
+
+    Returns:
+        (top, bottom) int32 (num_bands, width) arrays: band k covers rows
+        top[k, x]:bottom[k, x] of column x (none where top == bottom)
+    """
+    width = bands.shape[1]
+    counts = np.bincount((bands.astype(np.int64) * width + np.arange(width)).ravel(),
+                         minlength=num_bands * width).reshape(num_bands, width).astype(np.int32)
+    bottom = np.cumsum(counts, axis=0, dtype=np.int32)
+    return bottom - counts, bottom
+
+
+def band_positions(labels: np.ndarray, top: np.ndarray,
+                   bottom: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distance of every pixel, in rows, to the first and to the last row of its band in its
+    column (both 0 for a one-row band).
+    """
+    height, width = labels.shape
+    y = np.arange(height, dtype=np.int32)[:, None]
+    x = np.arange(width)
+    return y - top[labels, x], bottom[labels, x] - 1 - y
+
+
+def band_info(bands: np.ndarray, color_table: np.ndarray, border: int = 0) -> dict:
+    """
+    Band metadata of a render for band-aware effects.
+
+    Args:
+        bands: Band index map of the gradient area (inside the border)
+        color_table: One RGB row per band
+        border: Border around the gradient area in the rendered image
+
+    Returns:
+        Dict with 'labels' (the band map), 'border', 'colors' (steps x 3 uint8),
+        'area' (pixels per band) and per-column 'top' / 'bottom' rows (steps x width int32)
+    """
+    steps = len(color_table)
+    top, bottom = band_extents(bands, steps)
+    return {
+        'labels': bands,
+        'border': border,
+        'colors': np.asarray(color_table[:steps], dtype=np.uint8),
+        'area': (bottom - top).sum(axis=1, dtype=np.int64),
+        'top': top,
+        'bottom': bottom,
+    }
+
+
+def save_band_info(path: str, info: dict) -> None:
+    """Write band metadata to a compressed .npz side file."""
+    np.savez_compressed(path, **info)
+
+
+def load_band_info(path: str) -> dict:
+    """Read band metadata written by save_band_info."""
+    with np.load(path) as data:
+        info = {key: data[key] for key in data.files}
+    info['border'] = int(info['border'])
+    return info
+
+
+def generate_band_map(width: int, height: int, colors: List[str], steps: int,
+                      wave_type: str, border: int = 0, border_color: str = None,
+                      wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                      center_shift: float = 0.0, asymmetry: float = 0.0,
+                      organic_jitter: float = 0.0,
+                      random_seed: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate a wave variation as a band-index map plus its color table.
+
+    Returns:
+        (index_map, color_table): index_map is uint8 (uint16 above 256 entries) and holds
+        one color table row per pixel. When a border is drawn its color is the last row.
+    """
     grad_width = width - 2 * border
     grad_height = height - 2 * border
     
     if grad_width <= 0 or grad_height <= 0:
         raise ValueError("Border too large for image dimensions")
     
-    # Helper to average a slice of the provided palette evenly per step
-    def average_palette_slice(start_idx: int, end_idx: int) -> Tuple[int, int, int]:
-        end_idx = max(start_idx + 1, end_idx)
-        slice_colors = colors[start_idx:end_idx]
-        if not slice_colors:
-            return hex_to_rgb(colors[0])  # Fallback to first color
-        rs = 0
-        gs = 0
-        bs = 0
-        for color in slice_colors:
-            r, g, b = hex_to_rgb(color)
-            rs += r
-            gs += g
-            bs += b
-        return (rs // len(slice_colors), gs // len(slice_colors), bs // len(slice_colors))
+    # Per-column wave offsets and per-step colors are computed once for the whole image
+    offsets = compute_column_offsets(grad_width, grad_height, wave_type, wave_amplitude,
+                                     amplitude_scale, center_shift, asymmetry,
+                                     organic_jitter, random_seed)
+    color_table = band_color_table(colors, steps)
+    bands = band_index_map(grad_height, steps, offsets)
     
-    # Calculate colors per step
-    colors_per_step = len(colors) / steps
+    if not (border > 0 and border_color):
+        return bands, color_table
     
-    # Create gradient array
-    gradient = np.zeros((grad_height, grad_width, 3), dtype=np.uint8)
+    # Border pixels use an extra color table entry after the bands
+    color_table = np.vstack([color_table, np.array(hex_to_rgb(border_color), dtype=np.uint8)])
+    index_map = np.full((height, width), steps,
+                        dtype=np.uint8 if len(color_table) <= 256 else np.uint16)
+    index_map[border:border + grad_height, border:border + grad_width] = bands
+    return index_map, color_table
 
-    # Prepare organic jitter (smooth noise across x) if requested
-    smooth_noise = None
-    if organic_jitter and organic_jitter != 0.0 and grad_width > 1:
-        if random_seed is not None:
-            np.random.seed(int(random_seed))
-            random.seed(int(random_seed))
-        x_coords = np.arange(grad_width)
-        # Choose knot spacing ~80px, at least 2 knots
-        n_knots = max(2, grad_width // 80)
-        knot_positions = np.linspace(0, grad_width - 1, n_knots)
-        knot_values = np.random.uniform(-1.0, 1.0, size=n_knots)
-        # Interpolate to full width
-        smooth_noise = np.interp(x_coords, knot_positions, knot_values)
-        # Light smoothing
-        kernel = np.array([0.25, 0.5, 0.25])
-        smooth_noise = np.convolve(smooth_noise, kernel, mode='same')
-    
-    # Fill the gradient based on wave type
-    for x in range(grad_width):
-        for y in range(grad_height):
-            # Normalize x position (0 to 1) for horizontal progression
-            normalized_x = x / grad_width
-            # Apply center shift (positive shifts center to the right)
-            shifted_x = min(1.0, max(0.0, normalized_x - center_shift))
-            
-            # Determine wave parameters based on type
-            current_amp = 0.0
-            if wave_type == '0.0':  # Straight gradient (no waves)
-                current_amp = 0.0
-                wave_frequency = 1.0
-            elif wave_type == '4A':  # Prime wave (bell curve intensity)
-                # Calculate distance from center (0 at center, 1 at edges)
-                center_distance = abs(shifted_x - 0.5) * 2
-                # Create bell curve intensity (1 at center, 0 at edges)
-                wave_intensity = (1 - center_distance) ** 2
-                # Apply asymmetry exponent: >0 emphasizes left, <0 emphasizes right
-                if asymmetry != 0.0:
-                    if shifted_x < 0.5:
-                        p = 1.0 + abs(asymmetry)
-                        wave_intensity = wave_intensity ** p
-                    else:
-                        p = 1.0 + abs(asymmetry) if asymmetry < 0 else 1.0
-                        wave_intensity = wave_intensity ** p
-                current_amp = wave_amplitude * wave_intensity  # Prime wave amplitude
-                wave_frequency = 1.0  # Single wave cycle
-            elif wave_type == '4B':  # Inverted prime wave (valley curve intensity)
-                # Calculate distance from center (0 at center, 1 at edges)
-                center_distance = abs(shifted_x - 0.5) * 2
-                # Create inverted bell curve intensity (0 at center, 1 at edges)
-                wave_intensity = center_distance ** 2
-                if asymmetry != 0.0:
-                    if shifted_x < 0.5:
-                        p = 1.0 + abs(asymmetry)
-                        wave_intensity = wave_intensity ** p
-                    else:
-                        p = 1.0 + abs(asymmetry) if asymmetry < 0 else 1.0
-                        wave_intensity = wave_intensity ** p
-                current_amp = wave_amplitude * wave_intensity  # Inverted prime wave amplitude
-                wave_frequency = 1.0  # Single wave cycle
-            elif wave_type in ['1A', '1C']:  # Wave on left, straight on right
-                if normalized_x < 0.3:  # Left 30%: wave
-                    progress = normalized_x / 0.3
-                    current_amp = (0.25 * amplitude_scale) * (1 - progress)
-                else:  # Right 70%: flat
-                    current_amp = 0.0
-                wave_frequency = 1.5
-                
-            elif wave_type in ['1B', '1D']:  # Straight on left, wave on right
-                if normalized_x > 0.7:  # Right 30%: wave
-                    progress = (normalized_x - 0.7) / 0.3
-                    current_amp = (0.25 * amplitude_scale) * progress
-                else:  # Left 70%: flat
-                    current_amp = 0.0
-                wave_frequency = 1.5
-                
-            elif wave_type in ['2A', '2C']:  # 50/50 transition
-                if normalized_x < 0.5:  # Left 50%: flat
-                    current_amp = 0.0
-                else:  # Right 50%: wave
-                    progress = (normalized_x - 0.5) / 0.5
-                    current_amp = (0.2 * amplitude_scale) * progress
-                wave_frequency = 1.0
-                
-            elif wave_type in ['2B', '2D']:  # 50/50 transition flipped
-                if normalized_x > 0.5:  # Right 50%: flat
-                    current_amp = 0.0
-                else:  # Left 50%: wave
-                    progress = normalized_x / 0.5
-                    current_amp = (0.2 * amplitude_scale) * (1 - progress)
-                wave_frequency = 1.0
-
-            elif wave_type == '2E':  # Single 2B-style wave shifted to center (0.25-0.75)
-                if normalized_x < 0.25 or normalized_x > 0.75:
-                    current_amp = 0.0  # Flat edges
-                else:
-                    # Map [0.25, 0.75] -> progress [0, 1]
-                    progress = (normalized_x - 0.25) / 0.5
-                    # Same shape as 2B: max at left of region, decays to 0 at right of region
-                    current_amp = (0.2 * amplitude_scale) * (1 - progress)
-                wave_frequency = 1.0
-                
-            else:  # Combined waves (3A-3B)
-                if normalized_x < 0.5:  # Left half
-                    if wave_type == '3A':  # Left half uses 1A (30% wave, 70% straight)
-                        if normalized_x < 0.3:  # Left 30%: wave
-                            progress = normalized_x / 0.3
-                            current_amp = (0.25 * amplitude_scale) * (1 - progress)
-                        else:  # Right 70%: flat
-                            current_amp = 0.0
-                        wave_frequency = 1.5
-                    elif wave_type == '3B':  # Left half uses 1C (30% wave, 70% straight)
-                        if normalized_x < 0.3:  # Left 30%: wave
-                            progress = normalized_x / 0.3
-                            current_amp = (0.25 * amplitude_scale) * (1 - progress)
-                        else:  # Right 70%: flat
-                            current_amp = 0.0
-                        wave_frequency = 1.5
-                    elif wave_type == '3C':  # Left half uses 1C (30% wave, 70% straight)
-                        if normalized_x < 0.3:  # Left 30%: wave
-                            progress = normalized_x / 0.3
-                            current_amp = (0.25 * amplitude_scale) * (1 - progress)
-                        else:  # Right 70%: flat
-                            current_amp = 0.0
-                        wave_frequency = 1.5
-                    elif wave_type == '3D':  # Left half uses 1D (70% straight, 30% wave)
-                        if normalized_x > 0.7:  # Right 30%: wave
-                            progress = (normalized_x - 0.7) / 0.3
-                            current_amp = (0.25 * amplitude_scale) * progress
-                        else:  # Left 70%: flat
-                            current_amp = 0.0
-                        wave_frequency = 1.5
-                else:  # Right half
-                    if wave_type == '3A':  # Right half uses 2A (50% straight, 50% wave)
-                        if normalized_x < 0.5:  # Left 50%: flat
-                            current_amp = 0.0
-                        else:  # Right 50%: wave
-                            progress = (normalized_x - 0.5) / 0.5
-                            current_amp = (0.2 * amplitude_scale) * progress
-                        wave_frequency = 1.0
-                    elif wave_type == '3B':  # Right half uses 2C (50% straight, 50% wave)
-                        if normalized_x < 0.5:  # Left 50%: flat
-                            current_amp = 0.0
-                        else:  # Right 50%: wave
-                            progress = (normalized_x - 0.5) / 0.5
-                            current_amp = (0.2 * amplitude_scale) * progress
-                        wave_frequency = 1.0
-                    elif wave_type == '3C':  # Right half uses 2C (50% straight, 50% wave)
-                        if normalized_x < 0.5:  # Left 50%: flat
-                            current_amp = 0.0
-                        else:  # Right 50%: wave
-                            progress = (normalized_x - 0.5) / 0.5
-                            current_amp = (0.2 * amplitude_scale) * progress
-                        wave_frequency = 1.0
-                    elif wave_type == '3D':  # Right half uses 2D (50% wave, 50% straight)
-                        if normalized_x > 0.5:  # Right 50%: flat
-                            current_amp = 0.0
-                        else:  # Left 50%: wave
-                            progress = normalized_x / 0.5
-                            current_amp = (0.2 * amplitude_scale) * (1 - progress)
-                        wave_frequency = 1.0
-            
-            # Calculate wave offset
-            wave_offset = int(current_amp * grad_height * math.sin(2 * math.pi * wave_frequency * normalized_x))
-            # Add organic jitter component if enabled
-            if smooth_noise is not None:
-                wave_offset += int(organic_jitter * grad_height * smooth_noise[x])
-            
-            # Apply vertical flip if needed
-            if wave_type in ['1C', '1D', '2C', '2D', '3B', '3D']:
-                adjusted_y = y - wave_offset  # Flip vertically
-            else:
-                adjusted_y = y + wave_offset
-            
-            # Determine which step this pixel should belong to
-            step_y = adjusted_y / grad_height
-            step = int(step_y * steps)
-            step = max(0, min(steps - 1, step))
-            
-            # Get the color for this step
-            start_color_idx = int(step * colors_per_step)
-            end_color_idx = int((step + 1) * colors_per_step)
-            avg_color = average_palette_slice(start_color_idx, end_color_idx)
-            
-            gradient[y, x] = avg_color
-    
-    # Fill any remaining black areas with the top band color (first color)
-    top_color = hex_to_rgb(colors[0])
-    for x in range(grad_width):
-        for y in range(grad_height):
-            if np.all(gradient[y, x] == 0):  # If pixel is black (unfilled)
-                gradient[y, x] = top_color
-    
-    # Create final image with border
+
+def generate_wave_variation(width: int, height: int, colors: List[str], steps: int,
+                          wave_type: str, border: int = 0, border_color: str = None, 
+                          wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                          center_shift: float = 0.0, asymmetry: float = 0.0,
+                          organic_jitter: float = 0.0, random_seed: int = None,
+                          palette_mode: bool = False, anti_alias: bool = False,
+                          return_bands: bool = False):
+    """
+    Generate a specific wave variation (1A-1D, 2A-2D, 3A-3H).
+
+    With palette_mode the image is returned in 'P' mode (one byte per pixel) whenever
+    the bands plus border fit in a 256-color palette; grain effects need RGB input.
+    With anti_alias band edges use the untruncated wave shift and their boundary pixels
+    are blended by coverage; the result is always RGB.
+    With return_bands an (image, band_info) pair is returned, so band-aware effects can
+    use the render's own band map instead of detecting bands from colors.
+    """
+    if anti_alias:
+        grad_width = width - 2 * border
+        grad_height = height - 2 * border
+        if grad_width <= 0 or grad_height <= 0:
+            raise ValueError("Border too large for image dimensions")
+        shift = compute_column_shift(grad_width, grad_height, wave_type, wave_amplitude,
+                                     amplitude_scale, center_shift, asymmetry,
+                                     organic_jitter, random_seed)
+        color_table = band_color_table(colors, steps)
+        bands = hard_band_map(grad_height, steps, shift)
+        interior = antialiased_band_image(grad_height, color_table, shift, bands)
+        if not (border > 0 and border_color):
+            image = Image.fromarray(interior)
+            return (image, band_info(bands, color_table)) if return_bands else image
+        canvas = np.empty((height, width, 3), dtype=np.uint8)
+        canvas[...] = hex_to_rgb(border_color)
+        canvas[border:border + grad_height, border:border + grad_width] = interior
+        image = Image.fromarray(canvas)
+        return (image, band_info(bands, color_table, border)) if return_bands else image
+
+    index_map, color_table = generate_band_map(width, height, colors, steps, wave_type, border,
+                                               border_color, wave_amplitude, amplitude_scale,
+                                               center_shift, asymmetry, organic_jitter,
+                                               random_seed)
+    if palette_mode and len(color_table) <= 256:
+        image = Image.frombytes('P', (index_map.shape[1], index_map.shape[0]), index_map.tobytes())
+        image.putpalette(color_table.tobytes())
+    else:
+        image = Image.fromarray(color_table[index_map])
+    if not return_bands:
+        return image
     if border > 0 and border_color:
-        final_image = Image.new('RGB', (width, height), hex_to_rgb(border_color))
-        grad_img = Image.fromarray(gradient)
-        final_image.paste(grad_img, (border, border))
-        return final_image
+        bands = index_map[border:height - border, border:width - border]
+        return image, band_info(bands, color_table[:steps], border)
+    return image, band_info(index_map, color_table)
+
+
+def generate_band_info(width: int, height: int, colors: List[str], steps: int,
+                       wave_type: str, border: int = 0, border_color: str = None,
+                       wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                       center_shift: float = 0.0, asymmetry: float = 0.0,
+                       organic_jitter: float = 0.0, random_seed: int = None,
+                       anti_alias: bool = False) -> dict:
+    """Band metadata of a generate_wave_variation call, without rendering the image."""
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+    wave_args = (grad_width, grad_height, wave_type, wave_amplitude, amplitude_scale,
+                 center_shift, asymmetry, organic_jitter, random_seed)
+    if anti_alias:
+        bands = hard_band_map(grad_height, steps, compute_column_shift(*wave_args))
     else:
-        return Image.fromarray(gradient)
+        bands = band_index_map(grad_height, steps, compute_column_offsets(*wave_args))
+    return band_info(bands, band_color_table(colors, steps), border if border_color else 0)
+
+
+def generate_wave_preview(width: int, height: int, colors: List[str], steps: int,
+                          wave_type: str, border: int = 0, border_color: str = None,
+                          preview_width: int = 200, **wave_params) -> Image.Image:
+    """
+    Render a small preview of a generate_wave_variation call.
+
+    Band offsets are fractions of the gradient height, so the preview is computed
+    directly at the reduced size (border scaled to match) rather than downscaled.
+    """
+    scale = min(1.0, preview_width / width)
+    preview_height = max(1, round(height * scale))
+    preview_border = round(border * scale)
+    if border > 0:
+        preview_border = max(1, preview_border)
+    return generate_wave_variation(max(1, round(width * scale)), preview_height, colors, steps,
+                                   wave_type, preview_border, border_color, **wave_params)
 
 
 def main():
@@ -272,10 +395,14 @@ def main():
     parser.add_argument('--organic-jitter', type=float, default=0.0, help='Organic jitter amount (0.0-0.1 typical)')
     parser.add_argument('--random-seed', type=int, help='Seed for reproducible organic jitter')
     parser.add_argument('--wave-type', required=False, 
-                       choices=['0.0', '1A', '1B', '1C', '1D', '2A', '2B', '2C', '2D', 
-                               '3A', '3B', '3C', '3D', '4A', '4B'],
+                       choices=list(WAVE_STYLES),
                        help='Wave variation type')
     parser.add_argument('--preset', type=str, help='Preset name from presets/wave_styles.json')
+    parser.add_argument('--rgb', action='store_true', help='Save a full RGB image instead of a palette PNG')
+    parser.add_argument('--anti-alias', action='store_true', help='Blend band edges by sub-pixel coverage')
+    parser.add_argument('--cache-dir', default=os.environ.get('HYPERFCK_CACHE_DIR'),
+                        help='Render cache directory (default: $HYPERFCK_CACHE_DIR, disabled if unset)')
+    parser.add_argument('--band-map', help='Also write the band map and per-band metadata (.npz) here')
     parser.add_argument('--output', required=True, help='Output file path')
     
     args = parser.parse_args()
@@ -321,17 +448,52 @@ def main():
         colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
     
     print(f"Loaded {len(colors)} colors: {colors[:3]}...")
+    
+    palette_mode = not args.rgb and not args.anti_alias and args.output.lower().endswith('.png')
+    render_params = {
+        'width': args.width, 'height': args.height, 'colors': colors, 'steps': args.steps,
+        'wave_type': args.wave_type, 'border': args.border, 'border_color': args.border_color,
+        'wave_amplitude': args.wave_amplitude, 'amplitude_scale': args.amplitude_scale,
+        'center_shift': args.center_shift, 'asymmetry': args.asymmetry,
+        'organic_jitter': args.organic_jitter, 'random_seed': args.random_seed,
+        'palette_mode': palette_mode, 'anti_alias': args.anti_alias, 'grain_effect': 'none'
+    }
+    # Unseeded jitter is different every run, so it is never cached
+    cache = None
+    if args.cache_dir and args.output.lower().endswith('.png') and \
+            not (args.organic_jitter and args.random_seed is None):
+        cache = RenderCache(args.cache_dir)
+        cached_path = cache.get(render_params)
+        if cached_path:
+            shutil.copyfile(cached_path, args.output)
+            print(f"Wave {args.wave_type} gradient served from cache as '{args.output}'")
+            if args.band_map:
+                save_band_info(args.band_map, generate_band_info(
+                    args.width, args.height, colors, args.steps, args.wave_type, args.border,
+                    args.border_color, args.wave_amplitude, args.amplitude_scale, args.center_shift,
+                    args.asymmetry, args.organic_jitter, args.random_seed, args.anti_alias))
+                print(f"Band map saved as '{args.band_map}'")
+            return
+    
     print(f"Generating Wave {args.wave_type} with {args.steps} bands")
     
     # Generate gradient
     gradient = generate_wave_variation(
         args.width, args.height, colors, args.steps,
         args.wave_type, args.border, args.border_color, args.wave_amplitude, args.amplitude_scale,
-        args.center_shift, args.asymmetry, args.organic_jitter, args.random_seed
+        args.center_shift, args.asymmetry, args.organic_jitter, args.random_seed,
+        palette_mode=palette_mode, anti_alias=args.anti_alias, return_bands=bool(args.band_map)
     )
+    if args.band_map:
+        gradient, bands = gradient
+        save_band_info(args.band_map, bands)
+        print(f"Band map saved as '{args.band_map}'")
     
-    # Save image
-    gradient.save(args.output)
+    # Save image (with its parameters embedded so the cache can be rebuilt from it)
+    if cache:
+        shutil.copyfile(cache.put(render_params, gradient), args.output)
+    else:
+        save_with_params(gradient, args.output, render_params)
     print(f"Wave {args.wave_type} gradient saved as '{args.output}'")
 
 
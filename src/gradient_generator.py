@@ -10,11 +10,17 @@ Usage:
 """
 
 import argparse
+import os
 from typing import List, Tuple
 from PIL import Image
 import numpy as np
 # Removed import for deleted module
 
+from grain_engine import add_gaussian_grain, linear_mask, radial_mask, use_noise_bank
+from noise_bank import NoiseBank
+from random_streams import RngLike
+from warp_engine import apply_warp
+
 
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     """Convert hex color string to RGB tuple."""
@@ -27,6 +33,23 @@ def rgb_to_hex(rgb: Tuple[int, int, int]) -> str:
     return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
 
 
+def _shifted_band_steps(length: int, steps: int, offsets: np.ndarray) -> np.ndarray:
+    """
+    Step index of every pixel of a wave-shifted band layout (-1 where no band lands).
+
+    Rows run along `length` (the axis the bands are stacked on) and there is one column
+    per offset; pixel p of a column belongs to the step whose base range holds p - offset.
+    """
+    base_starts = (np.arange(steps) / steps * length).astype(np.int64)
+    # Look the step up once per distinct shifted position instead of once per pixel
+    low = min(0, -int(offsets.max()))
+    high = max(length, length - int(offsets.min()))
+    shifted = np.arange(low, high)
+    lookup = np.searchsorted(base_starts, shifted, side='right') - 1
+    lookup[(shifted < 0) | (shifted >= length)] = -1
+    return lookup[np.arange(length)[:, None] - offsets[None, :] - low]
+
+
 def generate_wave_gradient(width: int, height: int, colors: List[str], steps: int,
                           wave_amplitude: float = 0.1, wave_frequency: float = 2.0, 
                           orientation: str = 'horizontal', border: int = 0, border_color: str = None) -> Image.Image:
@@ -55,9 +78,13 @@ def generate_wave_gradient(width: int, height: int, colors: List[str], steps: in
     # Calculate how many colors to average per step for even distribution
     colors_per_step = len(colors) / steps
     
+    # One color per step plus a trailing black row for pixels no band covers
+    color_table = np.zeros((steps + 1, 3), dtype=np.uint8)
+    for step in range(steps):
+        color_table[step] = average_palette_slice(int(step * colors_per_step),
+                                                  int((step + 1) * colors_per_step))
+    
     if orientation == 'horizontal':
-        gradient = np.zeros((grad_height, grad_width, 3), dtype=np.uint8)
-        
         # Create wave function for each column
         x_coords = np.arange(grad_width)
         x_norm = x_coords / grad_width
@@ -69,70 +96,24 @@ def generate_wave_gradient(width: int, height: int, colors: List[str], steps: in
         wave_intensity = wave_intensity ** 2  # Make the fade more gradual
         
         wave_shift = wave_amplitude * np.sin(2 * np.pi * wave_frequency * x_norm) * wave_intensity
+        wave_offsets = np.trunc(wave_shift * grad_height).astype(np.int64)
         
-        for step in range(steps):
-            # Calculate which slice of the palette to use for this step
-            start_color_idx = int(step * colors_per_step)
-            end_color_idx = int((step + 1) * colors_per_step)
-            avg_color = average_palette_slice(start_color_idx, end_color_idx)
-            
-            # Calculate the base y position for this step
-            base_y_start = int((step / steps) * grad_height)
-            base_y_end = int(((step + 1) / steps) * grad_height)
-            
-            # Apply wave displacement to each column
-            for x in range(grad_width):
-                # Calculate the wave offset for this column
-                wave_offset = int(wave_shift[x] * grad_height)
-                
-                # Calculate the actual y positions for this column
-                y_start = base_y_start + wave_offset
-                y_end = base_y_end + wave_offset
-                
-                # Clamp to valid range
-                y_start = max(0, min(grad_height - 1, y_start))
-                y_end = max(0, min(grad_height, y_end))
-                
-                # Fill the band for this column
-                if y_end > y_start:
-                    gradient[y_start:y_end, x] = avg_color
+        gradient = color_table[_shifted_band_steps(grad_height, steps, wave_offsets)]
         
-        # Fill any remaining black areas with first and last colors
+        # Fill any remaining black areas (gaps and black bands) with first and last colors:
+        # top half with the first palette color, bottom half with the last
         first_color = hex_to_rgb(colors[0])  # First color from palette
         last_color = hex_to_rgb(colors[-1])  # Last color from palette
-        
-        for x in range(grad_width):
-            for y in range(grad_height):
-                if np.all(gradient[y, x] == 0):  # If pixel is black (unfilled)
-                    # Fill top half with first color, bottom half with last color
-                    if y < grad_height // 2:
-                        gradient[y, x] = first_color
-                    else:
-                        gradient[y, x] = last_color
+        unfilled = ~gradient.any(axis=2)
+        top_half = (np.arange(grad_height) < grad_height // 2)[:, None]
+        gradient[unfilled & top_half] = first_color
+        gradient[unfilled & ~top_half] = last_color
         
         # Ensure the very top and bottom rows are completely filled with correct colors
-        first_color = hex_to_rgb(colors[0])  # First color from palette
-        last_color = hex_to_rgb(colors[-1])  # Last color from palette
-        
-        for x in range(grad_width):
-            # Fill top row with first color from palette
-            gradient[0, x] = first_color
-            # Fill bottom row with last color from palette
-            gradient[grad_height-1, x] = last_color
-        
-        # Fill any remaining gaps with first and last colors
-        for x in range(grad_width):
-            for y in range(grad_height):
-                if np.all(gradient[y, x] == 0):  # If pixel is still black (unfilled)
-                    # Fill top half with first color, bottom half with last color
-                    if y < grad_height // 2:
-                        gradient[y, x] = first_color
-                    else:
-                        gradient[y, x] = last_color
+        gradient[0] = first_color
+        gradient[grad_height - 1] = last_color
                     
     else:  # vertical - similar but with x displacement
-        gradient = np.zeros((grad_height, grad_width, 3), dtype=np.uint8)
-        
         # Create wave function for each row
         y_coords = np.arange(grad_height)
         y_norm = y_coords / grad_height
@@ -143,33 +124,14 @@ def generate_wave_gradient(width: int, height: int, colors: List[str], steps: in
         wave_intensity = wave_intensity ** 2  # Make the fade more gradual
         
         wave_shift = wave_amplitude * np.sin(2 * np.pi * wave_frequency * y_norm) * wave_intensity
+        wave_offsets = np.trunc(wave_shift * grad_width).astype(np.int64)
         
-        for step in range(steps):
-            # Calculate which slice of the palette to use for this step
-            start_color_idx = int(step * colors_per_step)
-            end_color_idx = int((step + 1) * colors_per_step)
-            avg_color = average_palette_slice(start_color_idx, end_color_idx)
-            
-            # Calculate the base x position for this step
-            base_x_start = int((step / steps) * grad_width)
-            base_x_end = int(((step + 1) / steps) * grad_width)
-            
-            # Apply wave displacement to each row
-            for y in range(grad_height):
-                # Calculate the wave offset for this row
-                wave_offset = int(wave_shift[y] * grad_width)
-                
-                # Calculate the actual x positions for this row
-                x_start = base_x_start + wave_offset
-                x_end = base_x_end + wave_offset
-                
-                # Clamp to valid range
-                x_start = max(0, min(grad_width - 1, x_start))
-                x_end = max(0, min(grad_width, x_end))
-                
-                # Fill the band for this row
-                if x_end > x_start:
-                    gradient[y, x_start:x_end] = avg_color
+        band_steps = _shifted_band_steps(grad_width, steps, wave_offsets).T
+        # Bands pushed past the right edge are clamped onto the last column, where the
+        # last step (drawn last) wins
+        last_start = int((steps - 1) / steps * grad_width)
+        band_steps[last_start + wave_offsets >= grad_width, grad_width - 1] = steps - 1
+        gradient = color_table[band_steps]
     
     # Create final image with border
     border_rgb = hex_to_rgb(border_color) if border_color else hex_to_rgb(colors[0])
@@ -245,249 +207,84 @@ def generate_chunky_gradient(width: int, height: int, colors: List[str], steps:
     return img
 
 
-def apply_grain(image: Image.Image, intensity: float = 0.1, mono: bool = False) -> Image.Image:
+def apply_grain(image: Image.Image, intensity: float = 0.1, mono: bool = False,
+                rng: RngLike = None) -> Image.Image:
     """Apply uniform grain/noise to the image."""
     img_array = np.array(image)
-    height, width = img_array.shape[:2]
-    
-    if mono:
-        # Monochromatic grain
-        grain = np.random.normal(0, intensity * 255, (height, width, 3))
-        grain = grain.astype(np.int16)
-    else:
-        # Color grain
-        grain = np.random.normal(0, intensity * 255, (height, width, 3))
-        grain = grain.astype(np.int16)
-    
-    # Apply grain
-    result = img_array.astype(np.int16) + grain
-    result = np.clip(result, 0, 255).astype(np.uint8)
-    
-    return Image.fromarray(result)
+    add_grain(img_array, intensity, mono, rng)
+    return Image.fromarray(img_array)
+
+
+def add_grain(img_array: np.ndarray, intensity: float = 0.1, mono: bool = False,
+              rng: RngLike = None) -> None:
+    """In-place version of apply_grain for a uint8 RGB array."""
+    # mono has never changed the output: grain is drawn per channel either way
+    add_gaussian_grain(img_array, intensity * 255, dtype=np.int16, rng=rng)
 
 
 def apply_grain_gradient(image: Image.Image, max_intensity: float = 0.3, min_intensity: float = 0.05, 
-                        direction: str = 'vertical', mono: bool = False) -> Image.Image:
+                        direction: str = 'vertical', mono: bool = False,
+                        rng: RngLike = None) -> Image.Image:
     """Apply grain with intensity that varies across the image."""
     img_array = np.array(image)
+    add_grain_gradient(img_array, max_intensity, min_intensity, direction, mono, rng)
+    return Image.fromarray(img_array)
+
+
+def add_grain_gradient(img_array: np.ndarray, max_intensity: float = 0.3, min_intensity: float = 0.05,
+                       direction: str = 'vertical', mono: bool = False,
+                       rng: RngLike = None) -> None:
+    """In-place version of apply_grain_gradient for a uint8 RGB array."""
     height, width = img_array.shape[:2]
     
-    if direction == 'vertical':
-        # Create intensity gradient from top to bottom
-        intensity_gradient = np.linspace(min_intensity, max_intensity, height)
-        intensity_gradient = intensity_gradient.reshape(-1, 1, 1)
-    else:  # horizontal
-        # Create intensity gradient from left to right
-        intensity_gradient = np.linspace(min_intensity, max_intensity, width)
-        intensity_gradient = intensity_gradient.reshape(1, -1, 1)
-    
-    if mono:
-        # Monochromatic grain
-        grain = np.random.normal(0, 1, (height, width, 3))
-        grain = grain * intensity_gradient * 255
-        grain = grain.astype(np.int16)
-    else:
-        # Color grain
-        grain = np.random.normal(0, 1, (height, width, 3))
-        grain = grain * intensity_gradient * 255
-        grain = grain.astype(np.int16)
-    
-    # Apply grain
-    result = img_array.astype(np.int16) + grain
-    result = np.clip(result, 0, 255).astype(np.uint8)
-    
-    return Image.fromarray(result)
+    # Intensity ramp from top to bottom (vertical) or left to right (horizontal), memoized
+    intensity_gradient = linear_mask(height, width, min_intensity, max_intensity,
+                                     'vertical' if direction == 'vertical' else 'horizontal')
+    # Per-channel grain regardless of mono, as in add_grain
+    add_gaussian_grain(img_array, 255, weights=intensity_gradient, dtype=np.int16, rng=rng)
 
 
 def apply_grain_centered(image: Image.Image, max_intensity: float = 0.3, min_intensity: float = 0.05, 
-                        mono: bool = False) -> Image.Image:
+                        mono: bool = False, rng: RngLike = None) -> Image.Image:
     """Apply grain with intensity that peaks in the center and fades towards edges."""
     img_array = np.array(image)
+    add_grain_centered(img_array, max_intensity, min_intensity, mono, rng)
+    return Image.fromarray(img_array)
+
+
+def add_grain_centered(img_array: np.ndarray, max_intensity: float = 0.3, min_intensity: float = 0.05,
+                       mono: bool = False, rng: RngLike = None) -> None:
+    """In-place version of apply_grain_centered for a uint8 RGB array."""
     height, width = img_array.shape[:2]
     
-    # Create distance from center
-    y_center, x_center = height // 2, width // 2
-    y_coords, x_coords = np.ogrid[:height, :width]
-    
-    # Calculate distance from center (normalized to 0-1)
-    distance_from_center = np.sqrt(((y_coords - y_center) / y_center) ** 2 + 
-                                   ((x_coords - x_center) / x_center) ** 2)
-    
-    # Create intensity map (strongest in center, fading to edges)
-    intensity_map = max_intensity * (1 - distance_from_center)
-    intensity_map = np.clip(intensity_map, min_intensity, max_intensity)
-    intensity_map = intensity_map.reshape(height, width, 1)
-    
-    if mono:
-        # Monochromatic grain
-        grain = np.random.normal(0, 1, (height, width, 3))
-        grain = grain * intensity_map * 255
-        grain = grain.astype(np.int16)
-    else:
-        # Color grain
-        grain = np.random.normal(0, 1, (height, width, 3))
-        grain = grain * intensity_map * 255
-        grain = grain.astype(np.int16)
-    
-    # Apply grain
-    result = img_array.astype(np.int16) + grain
-    result = np.clip(result, 0, 255).astype(np.uint8)
-    
-    return Image.fromarray(result)
+    # Intensity map strongest in the center and fading to the edges, memoized
+    intensity_map = radial_mask(height, width, max_intensity, min_intensity)
+    # Per-channel grain regardless of mono, as in add_grain
+    add_gaussian_grain(img_array, 255, weights=intensity_map, dtype=np.int16, rng=rng)
 
 
-def apply_wave_rolling(image: Image.Image, wave_amplitude: float = 0.1, wave_frequency: float = 2.0) -> Image.Image:
+def apply_wave_rolling(image: Image.Image, wave_amplitude: float = 0.1, wave_frequency: float = 2.0,
+                       sampling: str = 'nearest') -> Image.Image:
     """Apply gentle rolling wave distortion to the image."""
-    img_array = np.array(image)
-    height, width = img_array.shape[:2]
-    
-    # Create coordinate grids
-    y_coords, x_coords = np.ogrid[:height, :width]
-    
-    # Normalize coordinates to 0-1
-    y_norm = y_coords / height
-    x_norm = x_coords / width
-    
-    # Create wave displacement
-    wave_y = wave_amplitude * np.sin(2 * np.pi * wave_frequency * x_norm) * height
-    wave_x = wave_amplitude * np.cos(2 * np.pi * wave_frequency * y_norm) * width * 0.3
-    
-    # Apply displacement
-    new_y = (y_coords + wave_y).astype(np.int32)
-    new_x = (x_coords + wave_x).astype(np.int32)
-    
-    # Clamp coordinates to valid range
-    new_y = np.clip(new_y, 0, height - 1)
-    new_x = np.clip(new_x, 0, width - 1)
-    
-    # Create new image with wave distortion
-    result = img_array[new_y, new_x]
-    
-    return Image.fromarray(result)
+    return apply_warp(image, 'rolling', wave_amplitude, wave_frequency, sampling=sampling)
 
 
-def apply_wave_pooling(image: Image.Image, pool_strength: float = 0.3, pool_center_y: float = 0.6) -> Image.Image:
+def apply_wave_pooling(image: Image.Image, pool_strength: float = 0.3, pool_center_y: float = 0.6,
+                       sampling: str = 'nearest') -> Image.Image:
     """Apply dramatic central pooling effect like liquid gathering."""
-    img_array = np.array(image)
-    height, width = img_array.shape[:2]
-    
-    # Create coordinate grids
-    y_coords, x_coords = np.ogrid[:height, :width]
-    
-    # Normalize coordinates
-    y_norm = y_coords / height
-    x_norm = x_coords / width
-    
-    # Create pooling effect - stronger towards center and bottom
-    center_x = 0.5
-    center_y = pool_center_y
-    
-    # Distance from pool center
-    dist_x = (x_norm - center_x) ** 2
-    dist_y = (y_norm - center_y) ** 2
-    distance = np.sqrt(dist_x + dist_y)
-    
-    # Pooling displacement (pulls pixels toward center)
-    pool_factor = pool_strength * (1 - distance) * (1 - y_norm)  # Stronger at bottom
-    pool_factor = np.clip(pool_factor, 0, 1)
-    
-    # Apply displacement
-    displacement_x = (center_x - x_norm) * pool_factor * width * 0.5
-    displacement_y = (center_y - y_norm) * pool_factor * height * 0.3
-    
-    new_x = (x_coords + displacement_x).astype(np.int32)
-    new_y = (y_coords + displacement_y).astype(np.int32)
-    
-    # Clamp coordinates
-    new_x = np.clip(new_x, 0, width - 1)
-    new_y = np.clip(new_y, 0, height - 1)
-    
-    # Create new image
-    result = img_array[new_y, new_x]
-    
-    return Image.fromarray(result)
+    return apply_warp(image, 'pooling', pool_strength, pool_center_y, sampling=sampling)
 
 
-def apply_wave_rippling(image: Image.Image, ripple_amplitude: float = 0.15, ripple_frequency: float = 3.0) -> Image.Image:
+def apply_wave_rippling(image: Image.Image, ripple_amplitude: float = 0.15, ripple_frequency: float = 3.0,
+                        sampling: str = 'nearest') -> Image.Image:
     """Apply rippling/undulating wave pattern."""
-    img_array = np.array(image)
-    height, width = img_array.shape[:2]
-    
-    # Create coordinate grids
-    y_coords, x_coords = np.ogrid[:height, :width]
-    
-    # Normalize coordinates
-    y_norm = y_coords / height
-    x_norm = x_coords / width
-    
-    # Create multiple overlapping ripples
-    ripple1 = ripple_amplitude * np.sin(2 * np.pi * ripple_frequency * x_norm) * np.cos(2 * np.pi * ripple_frequency * y_norm)
-    ripple2 = ripple_amplitude * 0.5 * np.sin(2 * np.pi * ripple_frequency * 1.5 * x_norm) * np.sin(2 * np.pi * ripple_frequency * 1.5 * y_norm)
-    
-    # Combine ripples
-    total_ripple = ripple1 + ripple2
-    
-    # Apply displacement
-    displacement_y = total_ripple * height
-    displacement_x = total_ripple * width * 0.2
-    
-    new_y = (y_coords + displacement_y).astype(np.int32)
-    new_x = (x_coords + displacement_x).astype(np.int32)
-    
-    # Clamp coordinates
-    new_y = np.clip(new_y, 0, height - 1)
-    new_x = np.clip(new_x, 0, width - 1)
-    
-    # Create new image
-    result = img_array[new_y, new_x]
-    
-    return Image.fromarray(result)
+    return apply_warp(image, 'rippling', ripple_amplitude, ripple_frequency, sampling=sampling)
 
 
-def apply_wave_swirling(image: Image.Image, swirl_strength: float = 0.2, swirl_center_x: float = 0.5, swirl_center_y: float = 0.5) -> Image.Image:
+def apply_wave_swirling(image: Image.Image, swirl_strength: float = 0.2, swirl_center_x: float = 0.5,
+                        swirl_center_y: float = 0.5, sampling: str = 'nearest') -> Image.Image:
     """Apply swirling/liquid flow effect."""
-    img_array = np.array(image)
-    height, width = img_array.shape[:2]
-    
-    # Create coordinate grids
-    y_coords, x_coords = np.ogrid[:height, :width]
-    
-    # Normalize coordinates
-    y_norm = y_coords / height
-    x_norm = x_coords / width
-    
-    # Calculate distance and angle from swirl center
-    center_x = swirl_center_x
-    center_y = swirl_center_y
-    
-    dx = x_norm - center_x
-    dy = y_norm - center_y
-    distance = np.sqrt(dx**2 + dy**2)
-    angle = np.arctan2(dy, dx)
-    
-    # Create swirling displacement
-    swirl_factor = swirl_strength * (1 - distance)  # Stronger closer to center
-    swirl_factor = np.clip(swirl_factor, 0, 1)
-    
-    # Apply rotation based on distance from center
-    rotation_angle = swirl_factor * np.pi * 2  # Full rotation at center
-    new_angle = angle + rotation_angle
-    
-    # Convert back to coordinates
-    new_dx = distance * np.cos(new_angle)
-    new_dy = distance * np.sin(new_angle)
-    
-    new_x = ((center_x + new_dx) * width).astype(np.int32)
-    new_y = ((center_y + new_dy) * height).astype(np.int32)
-    
-    # Clamp coordinates
-    new_x = np.clip(new_x, 0, width - 1)
-    new_y = np.clip(new_y, 0, height - 1)
-    
-    # Create new image
-    result = img_array[new_y, new_x]
-    
-    return Image.fromarray(result)
+    return apply_warp(image, 'swirling', swirl_strength, swirl_center_x, swirl_center_y, sampling=sampling)
 
 
 def analyze_gradient_colors(image_path: str, num_samples: int = 16) -> List[str]:
@@ -532,6 +329,15 @@ def extract_row_colors(image_path: str) -> List[str]:
         return []
 
 
+class WarpAction(argparse.Action):
+    """Collect --wave-* warps in command-line order, since warps do not commute."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        # A repeated flag keeps its last values and position, as a plain option would
+        warps = [warp for warp in namespace.warps if warp[0] != self.const]
+        namespace.warps = warps + [(self.const, values)]
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate gradient images from hex colors')
     parser.add_argument('--mode', choices=['straight-wave', 'progressive-wave', 'combined-wave'], 
@@ -554,14 +360,25 @@ def main():
                        default='vertical', help='Direction for grain gradient')
     parser.add_argument('--grain-centered', nargs=2, type=float, metavar=('MAX', 'MIN'),
                        help='Grain with centered intensity (max min)')
+    parser.add_argument('--grain-seed', type=int, help='Seed for reproducible grain')
+    parser.add_argument('--noise-dir', default=os.environ.get('HYPERFCK_NOISE_DIR'),
+                       help='Noise bank directory for precomputed grain (default: $HYPERFCK_NOISE_DIR)')
+    parser.set_defaults(warps=[])
     parser.add_argument('--wave-rolling', nargs=2, type=float, metavar=('AMPLITUDE', 'FREQUENCY'),
+                       action=WarpAction, const='rolling', dest='warps',
                        help='Apply rolling wave effect (amplitude frequency)')
     parser.add_argument('--wave-pooling', nargs=2, type=float, metavar=('STRENGTH', 'CENTER_Y'),
+                       action=WarpAction, const='pooling', dest='warps',
                        help='Apply pooling wave effect (strength center_y)')
     parser.add_argument('--wave-rippling', nargs=2, type=float, metavar=('AMPLITUDE', 'FREQUENCY'),
+                       action=WarpAction, const='rippling', dest='warps',
                        help='Apply rippling wave effect (amplitude frequency)')
     parser.add_argument('--wave-swirling', nargs=3, type=float, metavar=('STRENGTH', 'CENTER_X', 'CENTER_Y'),
-                       help='Apply swirling wave effect (strength center_x center_y)')
+                       action=WarpAction, const='swirling', dest='warps',
+                       help='Apply swirling wave effect (strength center_x center_y); '
+                            'several --wave-* effects are applied in command-line order')
+    parser.add_argument('--warp-sampling', choices=['nearest', 'bilinear'], default='nearest',
+                       help='Sampling used by the wave warp effects')
     parser.add_argument('--wave-type', type=str, help='Override wave type (e.g., 1A..4B)')
     parser.add_argument('--preset', type=str, help='Preset name from presets/wave_styles.json')
     parser.add_argument('--wave-amplitude', type=float, default=0.3, help='Wave amplitude for wave mode (0.0-1.0)')
@@ -571,6 +388,9 @@ def main():
     
     args = parser.parse_args()
     
+    if args.noise_dir:
+        use_noise_bank(NoiseBank(args.noise_dir))
+    
     # Get colors
     colors = []
     if args.colors:
@@ -592,6 +412,7 @@ def main():
     
     # Generate gradient using comprehensive wave generator
     from comprehensive_wave_generator import generate_wave_variation
+    from render_pipeline import RenderPipeline
     
     # Map old modes to new wave types
     if args.wave_type:
@@ -603,32 +424,30 @@ def main():
     else:  # combined-wave mode
         wave_type = '3A'  # Default to 3A for combined-wave
     
-    # Pass amplitude through; keep default amplitude_scale=1.0
-    img = generate_wave_variation(args.width, args.height, colors, args.steps,
-                                 wave_type, args.border, args.border_color, args.wave_amplitude)
+    # Apply wave effects if specified, in command-line order; several warps are composed
+    # into a single resampling pass
+    warps = args.warps
     
-    # Apply grain if specified
-    if args.grain:
-        img = apply_grain(img, args.grain, args.grain_mono)
-    elif args.grain_gradient:
-        img = apply_grain_gradient(img, args.grain_gradient[0], args.grain_gradient[1], 
-                                 args.grain_direction, args.grain_mono)
-    elif args.grain_centered:
-        img = apply_grain_centered(img, args.grain_centered[0], args.grain_centered[1], 
-                                 args.grain_mono)
-    
-    # Apply wave effects if specified
-    if args.wave_rolling:
-        img = apply_wave_rolling(img, args.wave_rolling[0], args.wave_rolling[1])
-    elif args.wave_pooling:
-        img = apply_wave_pooling(img, args.wave_pooling[0], args.wave_pooling[1])
-    elif args.wave_rippling:
-        img = apply_wave_rippling(img, args.wave_rippling[0], args.wave_rippling[1])
-    elif args.wave_swirling:
-        img = apply_wave_swirling(img, args.wave_swirling[0], args.wave_swirling[1], args.wave_swirling[2])
-    
-    # Save image
-    img.save(args.output)
+    if not (args.grain or args.grain_gradient or args.grain_centered or warps):
+        # Without grain or warp effects the bands can be saved as a compact palette PNG
+        img = generate_wave_variation(args.width, args.height, colors, args.steps,
+                                     wave_type, args.border, args.border_color, args.wave_amplitude,
+                                     palette_mode=args.output.lower().endswith('.png'))
+        img.save(args.output)
+    else:
+        # Generation, grain and warps all work on one canvas, converted to PIL only for saving
+        pipeline = RenderPipeline(args.width, args.height, args.border, args.border_color)
+        pipeline.generate(colors, args.steps, wave_type, args.wave_amplitude)
+        if args.grain:
+            pipeline.apply(add_grain, args.grain, args.grain_mono, rng=args.grain_seed)
+        elif args.grain_gradient:
+            pipeline.apply(add_grain_gradient, args.grain_gradient[0], args.grain_gradient[1],
+                           args.grain_direction, args.grain_mono, rng=args.grain_seed)
+        elif args.grain_centered:
+            pipeline.apply(add_grain_centered, args.grain_centered[0], args.grain_centered[1],
+                           args.grain_mono, rng=args.grain_seed)
+        pipeline.warp(warps, args.warp_sampling)
+        pipeline.save(args.output)
     print(f"Gradient saved as '{args.output}'")
     
     # Handle analysis/extraction
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Grain Engine - Shared Float32 Noise for Grain and Painting Effects
+
+All Gaussian grain effects draw float32 standard-normal noise from an explicit
+Generator, only for the region inside the border. Coarse grain is sampled at
+the reduced resolution and expanded into the full-resolution buffer without
+intermediate copies, and noise is accumulated into the image in place. When a
+noise bank is enabled the noise is assembled from precomputed textures, and
+intensity masks are memoized per (size, params).
+"""
+
+import math
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+from noise_bank import NoiseBank
+from random_streams import RngLike, make_rng
+
+
+# Luminance weights used by the monochrome grain modes
+LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+# Process-wide source of precomputed noise (None draws fresh samples from the Generator)
+_noise_bank: Optional[NoiseBank] = None
+
+
+def use_noise_bank(bank: Optional[NoiseBank]) -> None:
+    """Assemble all grain from a NoiseBank (or pass None to draw fresh noise again)."""
+    global _noise_bank
+    _noise_bank = bank
+
+
+def standard_normal(shape: Tuple[int, ...], rng: RngLike = None) -> np.ndarray:
+    """Float32 N(0, 1) samples from the noise bank if enabled, else from the Generator."""
+    rng = make_rng(rng)
+    if _noise_bank is not None:
+        return _noise_bank.sample(shape, rng)
+    return rng.standard_normal(shape, dtype=np.float32)
+
+
+def interior(img_array: np.ndarray, border_size: int = 0) -> np.ndarray:
+    """View of the array inside a border of border_size pixels (may be empty)."""
+    if border_size <= 0:
+        return img_array
+    height, width = img_array.shape[:2]
+    return img_array[border_size:max(border_size, height - border_size),
+                     border_size:max(border_size, width - border_size)]
+
+
+def combined_sigma(*sigmas: float) -> float:
+    """Standard deviation of the sum of independent zero-mean Gaussians."""
+    return math.sqrt(sum(s * s for s in sigmas))
+
+
+def gaussian_noise(shape: Tuple[int, ...], sigma: float = 1.0, grain_size: int = 1,
+                   rng: RngLike = None) -> np.ndarray:
+    """
+    Float32 N(0, sigma) noise of the given (height, width[, channels]) shape.
+
+    With grain_size > 1 one sample is drawn per grain_size x grain_size block and
+    broadcast into the full-resolution buffer, so only the coarse samples are drawn.
+    """
+    rng = make_rng(rng)
+    grain_size = max(1, int(grain_size))
+    if grain_size == 1:
+        noise = standard_normal(shape, rng)
+    else:
+        height, width = shape[:2]
+        rest = tuple(shape[2:])
+        coarse_h = -(-height // grain_size)
+        coarse_w = -(-width // grain_size)
+        coarse = standard_normal((coarse_h, coarse_w) + rest, rng)
+        padded = np.empty((coarse_h * grain_size, coarse_w * grain_size) + rest, dtype=np.float32)
+        blocks = padded.reshape((coarse_h, grain_size, coarse_w, grain_size) + rest)
+        blocks[...] = coarse[:, None, :, None]
+        noise = padded[:height, :width]
+    if sigma != 1.0:
+        noise *= np.float32(sigma)
+    return noise
+
+
+@lru_cache(maxsize=16)
+def linear_mask(height: int, width: int, start: float, stop: float,
+                direction: str = 'vertical') -> np.ndarray:
+    """
+    Read-only float32 intensity ramp from start to stop, top to bottom ('vertical') or
+    left to right ('horizontal'), shaped to broadcast over (height, width, channels).
+    """
+    if direction == 'vertical':
+        mask = np.linspace(start, stop, height, dtype=np.float32).reshape(-1, 1, 1)
+    else:
+        mask = np.linspace(start, stop, width, dtype=np.float32).reshape(1, -1, 1)
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=16)
+def radial_mask(height: int, width: int, max_intensity: float, min_intensity: float) -> np.ndarray:
+    """
+    Read-only float32 (height, width, 1) intensity map peaking at max_intensity in the
+    center and fading linearly with normalized distance, floored at min_intensity.
+    """
+    y_center, x_center = height // 2, width // 2
+    y_coords, x_coords = np.ogrid[:height, :width]
+    
+    # Distance from center, normalized so the edge midpoints are at 1
+    distance = np.sqrt(((y_coords - y_center) / y_center) ** 2 +
+                       ((x_coords - x_center) / x_center) ** 2)
+    mask = np.clip(max_intensity * (1 - distance), min_intensity, max_intensity)
+    mask = mask.astype(np.float32).reshape(height, width, 1)
+    mask.setflags(write=False)
+    return mask
+
+
+def add_noise(region: np.ndarray, noise: np.ndarray, dtype=np.float32) -> None:
+    """
+    Add noise to a uint8 region in place, clipping to 0-255.
+
+    With dtype=np.float32 the sum is truncated when written back; with np.int16 the noise
+    itself is truncated first. Noise with the region's shape is reused as the accumulator
+    (and overwritten); single-channel noise is broadcast across channels.
+    """
+    if dtype == np.int16:
+        accumulator = noise.astype(np.int16)
+    else:
+        accumulator = noise
+    if accumulator.shape != region.shape:
+        accumulator = accumulator + region.astype(accumulator.dtype)
+    else:
+        accumulator += region
+    np.clip(accumulator, 0, 255, out=accumulator)
+    region[...] = accumulator
+
+
+def add_gaussian_grain(img_array: np.ndarray, sigma: float, border_size: int = 0,
+                       grain_size: int = 1, monochrome: bool = False,
+                       weights: Optional[np.ndarray] = None, dtype=np.float32,
+                       rng: RngLike = None) -> None:
+    """
+    Add Gaussian grain to a uint8 (height, width, channels) array in place.
+
+    Args:
+        img_array: Image array, modified in place
+        sigma: Noise standard deviation in 0-255 units
+        border_size: Border excluded from the grain (no noise is drawn for it)
+        grain_size: Grain block size in pixels (noise drawn at reduced resolution)
+        monochrome: Same noise for every channel
+        weights: Optional per-pixel intensity factors broadcastable to the interior
+        dtype: Accumulation type, np.float32 or np.int16 (see add_noise)
+        rng: Seed or numpy Generator for the random draws
+    """
+    region = interior(img_array, border_size)
+    if region.size == 0:
+        return
+    height, width, channels = region.shape
+    noise = gaussian_noise((height, width, 1 if monochrome else channels), sigma, grain_size, rng)
+    if weights is not None:
+        noise *= weights
+    add_noise(region, noise, dtype)
+
+
+def add_luminance_grain(img_array: np.ndarray, sigma: float, border_size: int = 0,
+                        grain_size: int = 1, luma: Sequence[float] = LUMA_WEIGHTS,
+                        rng: RngLike = None) -> None:
+    """
+    Replace the interior with its grayscale luminance plus Gaussian grain, in place.
+    """
+    region = interior(img_array, border_size)
+    if region.size == 0:
+        return
+    gray = region[..., :3] @ np.asarray(luma, dtype=np.float32)
+    gray += gaussian_noise(gray.shape, sigma, grain_size, rng)
+    np.clip(gray, 0, 255, out=gray)
+    region[...] = gray[..., None]
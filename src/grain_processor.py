@@ -4,14 +4,33 @@ Grain Processor - Dithering and Grain Effects
 Post-processing module for adding grain effects without modifying original wave generation.
 """
 
+import math
+import time
+from typing import Sequence, Tuple
 import numpy as np
 from PIL import Image
-import random
+
+from grain_engine import LUMA_WEIGHTS, add_gaussian_grain, add_luminance_grain, combined_sigma
+from ordered_dither import LUT_BITS, apply_ordered_dithering, palette_lut
+from random_streams import RngLike
+
+try:
+    from numba import njit
+except ImportError:  # without numba, error diffusion uses the NumPy wavefront pass (no serpentine)
+    njit = None
+
+
+# Error diffusion kernels as ((row offset, column offset), weight) for a left-to-right scan
+DIFFUSION_KERNELS = {
+    'floyd_steinberg': (((0, 1), 7 / 16), ((1, -1), 3 / 16), ((1, 0), 5 / 16), ((1, 1), 1 / 16)),
+    'atkinson': (((0, 1), 1 / 8), ((0, 2), 1 / 8), ((1, -1), 1 / 8), ((1, 0), 1 / 8),
+                 ((1, 1), 1 / 8), ((2, 0), 1 / 8)),
+}
 
 
 def apply_dithering_grain(image: Image.Image, intensity: float = 0.1, 
                          grain_size: float = 1.0, monochrome: bool = False,
-                         border_size: int = 0) -> Image.Image:
+                         border_size: int = 0, rng: RngLike = None) -> Image.Image:
     """
     Apply dithering-style grain to an image.
     
@@ -20,92 +39,53 @@ def apply_dithering_grain(image: Image.Image, intensity: float = 0.1,
         intensity: Grain intensity (0.0 to 1.0)
         grain_size: Size of grain particles (0.5 to 3.0)
         monochrome: If True, apply grain to luminance only
+        rng: Seed or numpy Generator for the random draws
     
     Returns:
         PIL Image with grain applied
     """
-    # Convert to numpy array
     img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Create grain pattern
-    grain = np.random.normal(0, intensity * 255, (height, width, channels))
-    
-    # Exclude border from grain if border_size is specified
-    if border_size > 0:
-        grain[:border_size, :] = 0  # Top border
-        grain[-border_size:, :] = 0  # Bottom border
-        grain[:, :border_size] = 0  # Left border
-        grain[:, -border_size:] = 0  # Right border
-    
-    # Apply grain size scaling
-    if grain_size != 1.0:
-        # Simple grain size effect by scaling the noise
-        scale_factor = int(grain_size)
-        if scale_factor > 1:
-            # Upsample grain and downsample
-            grain_large = np.repeat(np.repeat(grain, scale_factor, axis=0), scale_factor, axis=1)
-            grain = grain_large[:height, :width]
-    
-    # Apply grain
-    result = img_array.astype(np.float32) + grain
-    
-    # Handle monochrome grain
-    if monochrome:
-        # Convert to grayscale for grain calculation
-        gray = np.dot(result[...,:3], [0.299, 0.587, 0.114])
-        gray_grain = np.random.normal(0, intensity * 255, (height, width))
-        gray_result = gray + gray_grain
-        # Convert back to RGB
-        result = np.stack([gray_result, gray_result, gray_result], axis=2)
-    
-    # Clamp values to valid range
-    result = np.clip(result, 0, 255)
+    add_dithering_grain(img_array, intensity, grain_size, monochrome, border_size, rng)
+    return Image.fromarray(img_array)
+
+
+def add_dithering_grain(img_array: np.ndarray, intensity: float = 0.1,
+                        grain_size: float = 1.0, monochrome: bool = False,
+                        border_size: int = 0, rng: RngLike = None) -> None:
+    """
+    In-place version of apply_dithering_grain for a uint8 (height, width, channels) array.
+    """
+    sigma = intensity * 255
+    # Grain sizes below 2 keep per-pixel grain
+    grain_size = max(1, int(grain_size))
     
-    return Image.fromarray(result.astype(np.uint8))
+    if monochrome:
+        # Luminance of the color-grained image plus gray grain is itself Gaussian:
+        # draw it once with the combined spread
+        luma_sigma = sigma * math.sqrt(sum(w * w for w in LUMA_WEIGHTS))
+        add_luminance_grain(img_array, combined_sigma(sigma, luma_sigma), border_size,
+                            grain_size, rng=rng)
+    else:
+        add_gaussian_grain(img_array, sigma, border_size, grain_size, rng=rng)
 
 
-def apply_bayer_dithering(image: Image.Image, levels: int = 8) -> Image.Image:
+def apply_bayer_dithering(image: Image.Image, levels: int = 8, matrix_size: int = 4) -> Image.Image:
     """
     Apply Bayer matrix dithering for retro/digital look.
     
     Args:
         image: PIL Image to process
         levels: Number of color levels (2-256)
+        matrix_size: Bayer matrix size (2, 4, 8 or 16)
     
     Returns:
         PIL Image with Bayer dithering applied
     """
-    img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Create Bayer matrix (4x4)
-    bayer_matrix = np.array([
-        [0, 8, 2, 10],
-        [12, 4, 14, 6],
-        [3, 11, 1, 9],
-        [15, 7, 13, 5]
-    ]) / 16.0
-    
-    # Tile the Bayer matrix across the image
-    bayer_tiled = np.tile(bayer_matrix, (height // 4 + 1, width // 4 + 1))
-    bayer_tiled = bayer_tiled[:height, :width]
-    
-    # Apply dithering
-    result = img_array.astype(np.float32)
-    for c in range(channels):
-        channel = result[:, :, c]
-        # Add Bayer matrix
-        dithered = channel + (bayer_tiled - 0.5) * (255 / levels)
-        # Quantize to levels
-        dithered = np.round(dithered / (255 / levels)) * (255 / levels)
-        result[:, :, c] = dithered
-    
-    return Image.fromarray(np.clip(result, 0, 255).astype(np.uint8))
+    return apply_ordered_dithering(image, levels, f'bayer{matrix_size}')
 
 
 def apply_film_grain(image: Image.Image, intensity: float = 0.15, 
-                    color_noise: bool = True) -> Image.Image:
+                    color_noise: bool = True, rng: RngLike = None) -> Image.Image:
     """
     Apply film-style grain with color noise.
     
@@ -113,26 +93,173 @@ def apply_film_grain(image: Image.Image, intensity: float = 0.15,
         image: PIL Image to process
         intensity: Grain intensity (0.0 to 1.0)
         color_noise: If True, apply different noise to each channel
+        rng: Seed or numpy Generator for the random draws
     
     Returns:
         PIL Image with film grain applied
     """
     img_array = np.array(image)
-    height, width, channels = img_array.shape
+    add_gaussian_grain(img_array, intensity * 255, monochrome=not color_noise, rng=rng)
+    return Image.fromarray(img_array)
+
+
+def _diffusion_tables(palette: Sequence[Tuple[int, int, int]], method: str):
+    if method not in DIFFUSION_KERNELS:
+        raise ValueError(f"Unknown error diffusion method '{method}'")
+    palette = tuple(tuple(int(c) for c in color) for color in palette)
+    kernel = DIFFUSION_KERNELS[method]
+    offsets = np.array([offset for offset, _ in kernel], dtype=np.int64)
+    weights = np.array([weight for _, weight in kernel], dtype=np.float32)
+    return palette_lut(palette), np.asarray(palette, dtype=np.float32), offsets, weights
+
+
+def _diffuse_wavefront(img_array: np.ndarray, lut: np.ndarray, colors: np.ndarray,
+                       offsets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Raster-order error diffusion, vectorized along wavefronts.
     
-    if color_noise:
-        # Different noise for each channel
-        grain = np.random.normal(0, intensity * 255, (height, width, channels))
-    else:
-        # Same noise for all channels
-        grain_base = np.random.normal(0, intensity * 255, (height, width))
-        grain = np.stack([grain_base, grain_base, grain_base], axis=2)
+    A pixel only receives error from pixels above it or to its left, so with
+    t = x + slope * y every pixel depends on pixels with a smaller t only; all pixels
+    on one wavefront t are independent and are quantized in a single NumPy step.
+    Each pixel gathers its error from its source pixels in raster order, the order in
+    which the serial kernel adds it, so both backends give identical float32 results.
+    """
+    height, width = img_array.shape[:2]
+    slope = max(int(-dx // dy) + 1 for dy, dx in offsets if dy > 0)
+    pad_y = int(offsets[:, 0].max())
+    pad_x = int(np.abs(offsets[:, 1]).max())
+    residual = np.zeros((height + pad_y, width + 2 * pad_x, 3), dtype=np.float32)
+    indices = np.empty((height, width), dtype=lut.dtype)
+    shift = 8 - LUT_BITS
+    rows = np.arange(height)
+    # Sources in raster order: earlier rows (larger dy) first, then further left (larger dx)
+    order = np.lexsort((-offsets[:, 1], -offsets[:, 0]))
+    sources = [(int(offsets[k, 0]), int(offsets[k, 1]), weights[k]) for k in order]
+    for t in range(width + slope * (height - 1)):
+        y0 = max(0, -(-(t - width + 1) // slope))
+        y1 = min(height - 1, t // slope)
+        ys = rows[y0:y1 + 1]
+        xs = t - slope * ys
+        error = np.zeros((len(ys), 3), dtype=np.float32)
+        for dy, dx, weight in sources:
+            error += residual[ys + pad_y - dy, xs + pad_x - dx] * weight
+        value = img_array[ys, xs, :3] + error
+        np.clip(value, 0, 255, out=value)
+        cells = value.astype(np.uint8) >> shift
+        chosen = lut[cells[:, 0], cells[:, 1], cells[:, 2]]
+        indices[ys, xs] = chosen
+        value -= colors[chosen]
+        residual[ys + pad_y, xs + pad_x] = value
+    return indices
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _diffuse_compiled(img_array, lut, colors, offsets, weights, serpentine):
+        height, width = img_array.shape[:2]
+        shift = 8 - LUT_BITS
+        pad_y = 0
+        pad_x = 0
+        for k in range(len(weights)):
+            pad_y = max(pad_y, offsets[k, 0])
+            pad_x = max(pad_x, abs(offsets[k, 1]))
+        error = np.zeros((height + pad_y, width + 2 * pad_x, 3), dtype=np.float32)
+        indices = np.empty((height, width), dtype=lut.dtype)
+        value = np.empty(3, dtype=np.float32)
+        for y in range(height):
+            reverse = serpentine and y % 2 == 1
+            for i in range(width):
+                x = width - 1 - i if reverse else i
+                for c in range(3):
+                    v = img_array[y, x, c] + error[y, x + pad_x, c]
+                    value[c] = min(max(v, 0.0), 255.0)
+                chosen = lut[np.uint8(value[0]) >> shift, np.uint8(value[1]) >> shift,
+                             np.uint8(value[2]) >> shift]
+                indices[y, x] = chosen
+                for c in range(3):
+                    residual = value[c] - colors[chosen, c]
+                    for k in range(len(weights)):
+                        dx = -offsets[k, 1] if reverse else offsets[k, 1]
+                        error[y + offsets[k, 0], x + dx + pad_x, c] += residual * weights[k]
+        return indices
+
+
+def error_diffusion_dither(img_array: np.ndarray, palette: Sequence[Tuple[int, int, int]],
+                           method: str = 'floyd_steinberg', serpentine: bool = False,
+                           backend: str = 'auto') -> np.ndarray:
+    """
+    Dither an RGB array to a palette with error diffusion.
     
-    # Apply grain
-    result = img_array.astype(np.float32) + grain
-    result = np.clip(result, 0, 255)
+    Args:
+        img_array: uint8 (height, width, 3) array
+        palette: RGB colors, e.g. the band color table
+        method: 'floyd_steinberg' or 'atkinson'
+        serpentine: Alternate the scan direction per row (numba backend only: every row
+            then waits on the whole row above, so there are no wavefronts to vectorize)
+        backend: 'numba', 'numpy' or 'auto' (numba when installed); both give identical
+            results for raster scans
     
-    return Image.fromarray(result.astype(np.uint8))
+    Returns:
+        (height, width) array of palette indices
+    """
+    if backend == 'auto':
+        backend = 'numba' if njit is not None else 'numpy'
+    if backend == 'numba' and njit is None:
+        raise ValueError("The numba backend needs numba installed")
+    if backend == 'numpy' and serpentine:
+        raise ValueError("Serpentine scanning needs the numba backend")
+    lut, colors, offsets, weights = _diffusion_tables(palette, method)
+    if backend == 'numba':
+        return _diffuse_compiled(np.ascontiguousarray(img_array[..., :3]), lut, colors, offsets,
+                                 weights, serpentine)
+    if backend != 'numpy':
+        raise ValueError(f"Unknown error diffusion backend '{backend}'")
+    return _diffuse_wavefront(img_array, lut, colors, offsets, weights)
+
+
+def apply_error_diffusion(image: Image.Image, palette: Sequence[Tuple[int, int, int]],
+                          method: str = 'floyd_steinberg', serpentine: bool = False,
+                          backend: str = 'auto') -> Image.Image:
+    """
+    Dither an image back to a palette (e.g. a grained render to its band colors).
+    
+    Returns:
+        'P' mode image using the palette (RGB above 256 colors)
+    """
+    indices = error_diffusion_dither(np.array(image.convert('RGB')), palette, method,
+                                     serpentine, backend)
+    table = np.asarray(palette, dtype=np.uint8)
+    if len(table) > 256:
+        return Image.fromarray(table[indices])
+    result = Image.fromarray(indices.astype(np.uint8), mode='L')
+    result.putpalette(table.tobytes())
+    return result
+
+
+def benchmark_error_diffusion(width: int = 2000, height: int = 3000, steps: int = 20,
+                              repeats: int = 3) -> None:
+    """Print error diffusion throughput (megapixels per second) for every available backend."""
+    from comprehensive_wave_generator import band_color_table, generate_wave_variation
+    
+    colors = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B', '#F6E27F']
+    palette = [tuple(int(c) for c in row) for row in band_color_table(colors, steps)]
+    image = apply_dithering_grain(generate_wave_variation(width, height, colors, steps, '2A'),
+                                  0.08, rng=0)
+    img_array = np.array(image)
+    backends = ['numpy'] + (['numba'] if njit is not None else [])
+    megapixels = width * height / 1e6
+    for method in DIFFUSION_KERNELS:
+        for backend in backends:
+            # Warm up (numba compiles on first use; the LUT is built once per palette)
+            error_diffusion_dither(img_array[:8, :8], palette, method, backend=backend)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                error_diffusion_dither(img_array, palette, method, backend=backend)
+            elapsed = (time.perf_counter() - start) / repeats
+            print(f"{method:16s} {backend:6s} {width}x{height}: {elapsed:6.2f} s "
+                  f"({megapixels / elapsed:6.1f} MP/s)")
+    if njit is None:
+        print("numba not installed: compiled backend skipped")
 
 
 def main():
@@ -140,9 +267,9 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Apply grain effects to images')
-    parser.add_argument('--input', required=True, help='Input image file')
-    parser.add_argument('--output', required=True, help='Output image file')
-    parser.add_argument('--grain-type', choices=['dithering', 'bayer', 'film'], 
+    parser.add_argument('--input', help='Input image file')
+    parser.add_argument('--output', help='Output image file')
+    parser.add_argument('--grain-type', choices=['dithering', 'bayer', 'film', 'diffusion'], 
                        default='dithering', help='Type of grain to apply')
     parser.add_argument('--intensity', type=float, default=0.1, 
                        help='Grain intensity (0.0-1.0)')
@@ -152,21 +279,49 @@ def main():
                        help='Apply grain to luminance only')
     parser.add_argument('--border-size', type=int, default=0, 
                        help='Border size to exclude from grain (0 = no exclusion)')
+    parser.add_argument('--seed', type=int, 
+                       help='Seed for reproducible output')
     parser.add_argument('--levels', type=int, default=8, 
                        help='Color levels for Bayer dithering')
+    parser.add_argument('--matrix-size', type=int, choices=[2, 4, 8, 16], default=4, 
+                       help='Bayer matrix size')
+    parser.add_argument('--palette-file', 
+                       help='Palette whose band colors error diffusion dithers to')
+    parser.add_argument('--steps', type=int, default=20, 
+                       help='Number of bands for --palette-file')
+    parser.add_argument('--method', choices=list(DIFFUSION_KERNELS), default='floyd_steinberg', 
+                       help='Error diffusion kernel')
+    parser.add_argument('--serpentine', action='store_true', 
+                       help='Serpentine scan for error diffusion (needs numba)')
+    parser.add_argument('--benchmark', action='store_true', 
+                       help='Print error diffusion throughput and exit')
     
     args = parser.parse_args()
     
+    if args.benchmark:
+        benchmark_error_diffusion()
+        return
+    if not (args.input and args.output):
+        parser.error('--input and --output are required')
+    
     # Load image
     image = Image.open(args.input)
     
     # Apply grain based on type
     if args.grain_type == 'dithering':
-        result = apply_dithering_grain(image, args.intensity, args.grain_size, args.monochrome, args.border_size)
+        result = apply_dithering_grain(image, args.intensity, args.grain_size, args.monochrome, args.border_size, rng=args.seed)
     elif args.grain_type == 'bayer':
-        result = apply_bayer_dithering(image, args.levels)
+        result = apply_bayer_dithering(image, args.levels, args.matrix_size)
     elif args.grain_type == 'film':
-        result = apply_film_grain(image, args.intensity, not args.monochrome)
+        result = apply_film_grain(image, args.intensity, not args.monochrome, rng=args.seed)
+    elif args.grain_type == 'diffusion':
+        if not args.palette_file:
+            parser.error('--grain-type diffusion needs --palette-file')
+        from comprehensive_wave_generator import band_color_table
+        with open(args.palette_file, 'r') as f:
+            colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+        palette = [tuple(int(c) for c in row) for row in band_color_table(colors, args.steps)]
+        result = apply_error_diffusion(image, palette, args.method, args.serpentine)
     
     # Save result
     result.save(args.output)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Noise Bank - Precomputed Tileable Grain Textures
+
+A small bank of float32 standard-normal textures stored as .npy files and
+memory-mapped on use. Independent per-pixel noise tiles seamlessly, so a
+render's grain is assembled from blocks of bank textures at random offsets
+with random flips and channel orders, instead of drawing millions of fresh
+normal samples per render. Textures are generated deterministically from the
+bank seed the first time they are needed.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+from typing import Dict, Tuple
+import numpy as np
+
+from random_streams import RngLike, make_rng
+
+
+DEFAULT_TEXTURE_SIZE = 1024
+DEFAULT_TEXTURE_COUNT = 8
+TEXTURE_CHANNELS = 3
+
+
+class NoiseBank:
+    """Directory of memory-mapped (size, size, 3) float32 N(0, 1) textures."""
+
+    def __init__(self, directory: str, size: int = DEFAULT_TEXTURE_SIZE,
+                 count: int = DEFAULT_TEXTURE_COUNT, seed: int = 0):
+        if size < 2 or count < 1:
+            raise ValueError("Noise bank needs a texture size of at least 2 and at least one texture")
+        self.directory = directory
+        self.size = size
+        self.count = count
+        self.seed = seed
+        self._textures: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, index: int) -> str:
+        return os.path.join(self.directory,
+                            f"noise_{self.size}x{self.size}x{TEXTURE_CHANNELS}_s{self.seed}_{index}.npy")
+
+    def texture(self, index: int) -> np.ndarray:
+        """Return texture index as a read-only memory map, generating it if missing."""
+        texture = self._textures.get(index)
+        if texture is not None:
+            return texture
+        with self._lock:
+            if index not in self._textures:
+                path = self.path_for(index)
+                if not os.path.exists(path):
+                    self._write_texture(index, path)
+                self._textures[index] = np.load(path, mmap_mode='r')
+            return self._textures[index]
+
+    def _write_texture(self, index: int, path: str) -> None:
+        rng = np.random.default_rng(np.random.SeedSequence([self.seed, index]))
+        data = rng.standard_normal((self.size, self.size, TEXTURE_CHANNELS), dtype=np.float32)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def build(self) -> None:
+        """Generate every texture of the bank up front."""
+        for index in range(self.count):
+            self.texture(index)
+
+    def sample(self, shape: Tuple[int, ...], rng: RngLike = None) -> np.ndarray:
+        """
+        Assemble N(0, 1) float32 noise of shape (height, width[, channels]) from the bank.
+
+        The output is filled in blocks of half a texture; each block copies a window of a
+        random texture at a random offset, flipped at random, with a random channel order.
+        """
+        rng = make_rng(rng)
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        if channels > TEXTURE_CHANNELS:
+            raise ValueError(f"Noise bank textures have at most {TEXTURE_CHANNELS} channels")
+        noise = np.empty((height, width, channels), dtype=np.float32)
+        block = self.size // 2
+        for y in range(0, height, block):
+            block_h = min(block, height - y)
+            for x in range(0, width, block):
+                block_w = min(block, width - x)
+                texture = self.texture(int(rng.integers(self.count)))
+                offset_y, offset_x = rng.integers(0, self.size - block + 1, size=2)
+                flip_y, flip_x = rng.integers(0, 2, size=2) * 2 - 1
+                window = texture[offset_y:offset_y + block_h, offset_x:offset_x + block_w][::flip_y, ::flip_x]
+                for channel, source in enumerate(rng.permutation(TEXTURE_CHANNELS)[:channels]):
+                    noise[y:y + block_h, x:x + block_w, channel] = window[..., source]
+        return noise if len(shape) > 2 else noise[..., 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the grain noise bank')
+    parser.add_argument('--noise-dir', required=True, help='Noise bank directory')
+    parser.add_argument('--size', type=int, default=DEFAULT_TEXTURE_SIZE, help='Texture edge length in pixels')
+    parser.add_argument('--count', type=int, default=DEFAULT_TEXTURE_COUNT, help='Number of textures')
+    parser.add_argument('--seed', type=int, default=0, help='Bank seed')
+
+    args = parser.parse_args()
+
+    bank = NoiseBank(args.noise_dir, args.size, args.count, args.seed)
+    bank.build()
+    total = sum(os.path.getsize(bank.path_for(i)) for i in range(bank.count))
+    print(f"Noise bank in '{args.noise_dir}': {bank.count} textures, {total / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Ordered Dither - Bayer and Blue-Noise Threshold Dithering
+
+Ordered dithering with 2x2 to 16x16 Bayer matrices or a blue-noise threshold
+map. All channels are dithered in one broadcasted pass per row chunk; the
+threshold map is indexed with modular row/column indices instead of being
+tiled to full size. Images can be quantized to evenly spaced levels or to the
+exact colors of a band palette through a memoized RGB lookup table.
+"""
+
+import argparse
+from functools import lru_cache
+from typing import Sequence, Tuple
+import numpy as np
+from PIL import Image
+
+from comprehensive_wave_generator import band_color_table
+
+
+DITHER_MATRICES = ('bayer2', 'bayer4', 'bayer8', 'bayer16', 'blue_noise')
+DEFAULT_CHUNK_ROWS = 256
+LUT_BITS = 6
+
+
+@lru_cache(maxsize=None)
+def bayer_matrix(size: int) -> np.ndarray:
+    """Read-only float32 Bayer threshold matrix (size 2, 4, 8 or 16) with values k / size^2."""
+    if size not in (2, 4, 8, 16):
+        raise ValueError("Bayer matrices come in sizes 2, 4, 8 and 16")
+    matrix = np.zeros((1, 1), dtype=np.int64)
+    while len(matrix) < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2],
+                           [4 * matrix + 3, 4 * matrix + 1]])
+    thresholds = (matrix / matrix.size).astype(np.float32)
+    thresholds.setflags(write=False)
+    return thresholds
+
+
+@lru_cache(maxsize=None)
+def blue_noise_matrix(size: int = 64, sigma: float = 1.5, seed: int = 0) -> np.ndarray:
+    """
+    Read-only float32 blue-noise threshold map (values k / size^2) built with the
+    void-and-cluster method on a torus. Computed once per process.
+    """
+    count = size * size
+    rng = np.random.default_rng(seed)
+    offsets = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(offsets[:, None] ** 2 + offsets[None, :] ** 2) / (2 * sigma ** 2))
+    kernel_f = np.fft.rfft2(kernel)
+
+    def energy_of(pattern):
+        return np.fft.irfft2(np.fft.rfft2(pattern) * kernel_f, s=(size, size))
+
+    def toggle(pattern, energy, index, value):
+        pattern.flat[index] = value
+        y, x = divmod(int(index), size)
+        energy += (1 if value else -1) * np.roll(kernel, (y, x), axis=(0, 1))
+
+    def tightest_cluster(pattern, energy):
+        return np.argmax(np.where(pattern, energy, -np.inf))
+
+    def largest_void(pattern, energy):
+        return np.argmin(np.where(pattern, np.inf, energy))
+
+    # Initial pattern: a tenth of the pixels, relaxed until it is evenly spread
+    initial_count = max(1, count // 10)
+    pattern = np.zeros((size, size), dtype=bool)
+    pattern.flat[rng.choice(count, initial_count, replace=False)] = True
+    energy = energy_of(pattern)
+    while True:
+        cluster = tightest_cluster(pattern, energy)
+        toggle(pattern, energy, cluster, False)
+        void = largest_void(pattern, energy)
+        if void == cluster:
+            toggle(pattern, energy, cluster, True)
+            break
+        toggle(pattern, energy, void, True)
+
+    ranks = np.empty(count, dtype=np.int64)
+    # Rank the initial pixels by removing the tightest clusters first
+    removing, removing_energy = pattern.copy(), energy.copy()
+    for rank in range(initial_count - 1, -1, -1):
+        cluster = tightest_cluster(removing, removing_energy)
+        ranks[cluster] = rank
+        toggle(removing, removing_energy, cluster, False)
+    # The remaining pixels fill the largest voids in turn
+    for rank in range(initial_count, count):
+        void = largest_void(pattern, energy)
+        ranks[void] = rank
+        toggle(pattern, energy, void, True)
+
+    thresholds = (ranks.reshape(size, size) / count).astype(np.float32)
+    thresholds.setflags(write=False)
+    return thresholds
+
+
+def threshold_matrix(name: str) -> np.ndarray:
+    """Threshold map for one of DITHER_MATRICES."""
+    if name == 'blue_noise':
+        return blue_noise_matrix()
+    if name in DITHER_MATRICES:
+        return bayer_matrix(int(name[len('bayer'):]))
+    raise ValueError(f"Unknown dither matrix '{name}'")
+
+
+def _threshold_rows(matrix: np.ndarray, row_start: int, row_stop: int, width: int) -> np.ndarray:
+    """(rows, width, 1) threshold offsets in [-0.5, 0.5) for a row chunk, via modular indices."""
+    size_y, size_x = matrix.shape
+    rows = matrix[np.arange(row_start, row_stop) % size_y]
+    return (rows[:, np.arange(width) % size_x] - 0.5)[..., None]
+
+
+def ordered_dither(img_array: np.ndarray, levels: int = 8, matrix: str = 'bayer4',
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS) -> None:
+    """
+    Quantize a uint8 (height, width, channels) array in place to multiples of 255 / levels,
+    offsetting every pixel by its threshold first.
+    """
+    thresholds = threshold_matrix(matrix)
+    height, width = img_array.shape[:2]
+    step = np.float32(255 / levels)
+    for row in range(0, height, chunk_rows):
+        stop = min(row + chunk_rows, height)
+        chunk = img_array[row:stop] / step
+        chunk += _threshold_rows(thresholds, row, stop, width)
+        np.rint(chunk, out=chunk)
+        chunk *= step
+        np.clip(chunk, 0, 255, out=chunk)
+        img_array[row:stop] = chunk
+
+
+@lru_cache(maxsize=32)
+def palette_lut(palette: Tuple[Tuple[int, int, int], ...], bits: int = LUT_BITS) -> np.ndarray:
+    """
+    Read-only (2^bits)^3 table mapping a quantized RGB value to the index of the nearest
+    palette color.
+    """
+    cells = 1 << bits
+    centers = (np.arange(cells) * 256 + 128) // cells
+    grid = np.stack(np.meshgrid(centers, centers, centers, indexing='ij'), axis=-1).reshape(-1, 1, 3)
+    colors = np.asarray(palette, dtype=np.int32).reshape(1, -1, 3)
+    lut = np.empty(cells ** 3, dtype=np.uint8 if len(palette) <= 256 else np.uint16)
+    for start in range(0, cells ** 3, 4096):
+        distance = ((grid[start:start + 4096] - colors) ** 2).sum(axis=2)
+        lut[start:start + 4096] = np.argmin(distance, axis=1)
+    lut = lut.reshape(cells, cells, cells)
+    lut.setflags(write=False)
+    return lut
+
+
+def palette_spread(palette: Sequence[Tuple[int, int, int]]) -> float:
+    """Mean distance from each distinct palette color to its nearest neighbour, per channel."""
+    colors = np.unique(np.asarray(palette, dtype=np.float64), axis=0)
+    if len(colors) < 2:
+        return 0.0
+    distance = np.sqrt(((colors[:, None] - colors[None]) ** 2).sum(axis=2))
+    np.fill_diagonal(distance, np.inf)
+    return float(distance.min(axis=1).mean() / np.sqrt(3))
+
+
+def palette_dither(img_array: np.ndarray, palette: Sequence[Tuple[int, int, int]],
+                   matrix: str = 'bayer4', spread: float = None,
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+    """
+    Dither an RGB array to the exact colors of a palette.
+
+    Args:
+        img_array: uint8 (height, width, 3) array
+        palette: RGB colors, e.g. the band color table
+        matrix: One of DITHER_MATRICES
+        spread: Threshold amplitude in 0-255 units (default: the palette's color spacing)
+        chunk_rows: Rows processed per chunk
+
+    Returns:
+        (height, width) array of palette indices
+    """
+    palette = tuple(tuple(int(c) for c in color) for color in palette)
+    lut = palette_lut(palette)
+    thresholds = threshold_matrix(matrix)
+    spread = np.float32(palette_spread(palette) if spread is None else spread)
+    shift = 8 - LUT_BITS
+    height, width = img_array.shape[:2]
+    indices = np.empty((height, width), dtype=lut.dtype)
+    for row in range(0, height, chunk_rows):
+        stop = min(row + chunk_rows, height)
+        chunk = _threshold_rows(thresholds, row, stop, width) * spread
+        chunk = chunk + img_array[row:stop, :, :3]
+        np.clip(chunk, 0, 255, out=chunk)
+        cells = chunk.astype(np.uint8) >> shift
+        indices[row:stop] = lut[cells[..., 0], cells[..., 1], cells[..., 2]]
+    return indices
+
+
+def apply_ordered_dithering(image: Image.Image, levels: int = 8, matrix: str = 'bayer4',
+                            palette: Sequence[Tuple[int, int, int]] = None) -> Image.Image:
+    """
+    Ordered-dither an image to evenly spaced levels, or to a palette ('P' mode result).
+    """
+    img_array = np.array(image.convert('RGB'))
+    if palette is None:
+        ordered_dither(img_array, levels, matrix)
+        return Image.fromarray(img_array)
+    indices = palette_dither(img_array, palette, matrix)
+    if len(palette) > 256:
+        return Image.fromarray(np.asarray(palette, dtype=np.uint8)[indices])
+    result = Image.fromarray(indices.astype(np.uint8), mode='L')
+    result.putpalette(np.asarray(palette, dtype=np.uint8).tobytes())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply ordered (Bayer / blue-noise) dithering')
+    parser.add_argument('--input', required=True, help='Input image file')
+    parser.add_argument('--output', required=True, help='Output image file')
+    parser.add_argument('--matrix', choices=DITHER_MATRICES, default='bayer4', help='Threshold matrix')
+    parser.add_argument('--levels', type=int, default=8, help='Color levels when no palette is given')
+    parser.add_argument('--palette-file', help='Dither to the band colors of this palette')
+    parser.add_argument('--steps', type=int, default=20, help='Number of bands for --palette-file')
+
+    args = parser.parse_args()
+
+    palette = None
+    if args.palette_file:
+        with open(args.palette_file, 'r') as f:
+            colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+        palette = [tuple(int(c) for c in row) for row in band_color_table(colors, args.steps)]
+
+    result = apply_ordered_dithering(Image.open(args.input), args.levels, args.matrix, palette)
+    result.save(args.output)
+    print(f"Ordered dithering ({args.matrix}) applied and saved as '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
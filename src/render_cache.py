@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Render Cache - Content-addressed Cache for Rendered Images
+
+Stores rendered PNGs under a hash of every parameter that affects the pixels
+(generator arguments, palette contents, grain settings and seeds). Entries are
+evicted least-recently-used once the cache exceeds its size cap, and each PNG
+carries its parameters in a text chunk so the cache can be rebuilt from
+existing outputs.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Iterable, Optional
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+
+CACHE_FORMAT_VERSION = 4
+PARAMS_TEXT_KEY = 'hyperfck-params'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def _canonical_value(value):
+    if isinstance(value, str):
+        # Hex colors are case-insensitive
+        return value.lower() if value.startswith('#') else value
+    if isinstance(value, bool) or value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical_value(v) for k, v in value.items()}
+    if hasattr(value, 'item'):  # NumPy scalars
+        return _canonical_value(value.item())
+    raise TypeError(f"Unsupported cache parameter type: {type(value).__name__}")
+
+
+def canonical_params(params: dict) -> dict:
+    """Normalize parameters so equivalent renders hash the same."""
+    canonical = _canonical_value(dict(params))
+    canonical['cache_version'] = CACHE_FORMAT_VERSION
+    return canonical
+
+
+def render_key(params: dict) -> str:
+    """Return the content hash (hex SHA-256) for a set of render parameters."""
+    payload = json.dumps(canonical_params(params), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def seed_from_key(key: str) -> int:
+    """Derive a deterministic 32-bit seed from a render key (for grain on cached renders)."""
+    return int(key[:8], 16)
+
+
+class RenderCache:
+    """On-disk LRU cache of rendered PNGs keyed by render_key()."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, params: dict) -> Optional[str]:
+        """Return the cached file path for params, or None on a miss."""
+        path = self.path_for(render_key(params))
+        try:
+            # Touch the entry so eviction treats it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, params: dict, image: Image.Image) -> str:
+        """Store an image for params (with params embedded as a PNG text chunk)."""
+        key = render_key(params)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        try:
+            image.save(tmp_path, format='PNG', pnginfo=_png_info(params))
+            os.replace(tmp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+        return self.path_for(key)
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.png'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def rebuild(self, paths: Iterable[str]) -> int:
+        """
+        Import existing PNG outputs that carry embedded render parameters.
+
+        Args:
+            paths: PNG files or directories to scan
+
+        Returns:
+            Number of entries added to the cache
+        """
+        added = 0
+        for path in paths:
+            files = [path]
+            if os.path.isdir(path):
+                files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+            for file_path in files:
+                if not file_path.lower().endswith('.png'):
+                    continue
+                params = read_embedded_params(file_path)
+                if params is None:
+                    continue
+                target = self.path_for(render_key(params))
+                if not os.path.exists(target) and os.path.abspath(file_path) != os.path.abspath(target):
+                    shutil.copyfile(file_path, target)
+                    added += 1
+        self.evict()
+        return added
+
+
+def read_embedded_params(path: str) -> Optional[dict]:
+    """
+    Read render parameters embedded in a PNG.
+
+    Returns None if the PNG has none, if they are malformed, or if they were written
+    for another CACHE_FORMAT_VERSION (the same parameters no longer give the same pixels).
+    """
+    try:
+        with Image.open(path) as image:
+            text = getattr(image, 'text', {}).get(PARAMS_TEXT_KEY)
+    except OSError:
+        return None
+    if not text:
+        return None
+    try:
+        params = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(params, dict) or params.pop('cache_version', None) != CACHE_FORMAT_VERSION:
+        return None
+    return params
+
+
+def _png_info(params: dict) -> PngInfo:
+    info = PngInfo()
+    info.add_text(PARAMS_TEXT_KEY, json.dumps(canonical_params(params), sort_keys=True))
+    return info
+
+
+def save_with_params(image: Image.Image, path: str, params: dict) -> None:
+    """Save an image, embedding render parameters when the output is a PNG."""
+    if path.lower().endswith('.png'):
+        image.save(path, pnginfo=_png_info(params))
+    else:
+        image.save(path)
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """Hard-link a cached file to target, falling back to a copy across filesystems."""
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the on-disk render cache')
+    parser.add_argument('--cache-dir', required=True, help='Cache directory')
+    parser.add_argument('--max-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help='Cache size cap in megabytes')
+    parser.add_argument('--rebuild', nargs='+', metavar='PATH',
+                        help='Import PNG outputs (files or directories) with embedded parameters')
+
+    args = parser.parse_args()
+
+    cache = RenderCache(args.cache_dir, args.max_mb * 1024 ** 2)
+    if args.rebuild:
+        added = cache.rebuild(args.rebuild)
+        print(f"Imported {added} renders into '{args.cache_dir}'")
+    else:
+        cache.evict()
+        print(f"Cache '{args.cache_dir}' trimmed to {args.max_mb} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Render Pipeline - One Canvas from Generation to Encode
+
+A RenderPipeline owns a single preallocated uint8 RGB canvas, border included.
+Band generation writes straight into the interior view, grain stages modify
+the canvas in place and warps ping-pong between the canvas and one spare
+buffer. The canvas is converted to a PIL Image only when it is encoded, instead
+of a PIL/NumPy round trip (and fresh full-size buffers) at every stage.
+"""
+
+import argparse
+import os
+from typing import Callable, Dict, List
+import numpy as np
+from PIL import Image
+
+from comprehensive_wave_generator import (antialiased_band_image, band_color_table, band_index_map,
+                                          compute_column_offsets, compute_column_shift, hex_to_rgb)
+from grain_engine import use_noise_bank
+from grain_processor import DIFFUSION_KERNELS, add_dithering_grain, error_diffusion_dither
+from noise_bank import NoiseBank
+from white_grain import add_white_grain
+from warp_engine import DEFAULT_CHUNK_ROWS, normalize_chain, remap_chain
+
+
+# In-place grain stages by the names the web interface uses; each takes the canvas array first
+GRAIN_STAGES: Dict[str, Callable] = {
+    'dithering': add_dithering_grain,
+    'white_grain': add_white_grain,
+}
+
+
+class RenderPipeline:
+    """
+    Canvas shared by every render stage; stage methods return self so calls chain.
+
+    Like generate_wave_variation, a border without a border color gives a canvas of
+    the interior only.
+    """
+
+    def __init__(self, width: int, height: int, border: int = 0, border_color: str = None):
+        grad_width = width - 2 * border
+        grad_height = height - 2 * border
+        if grad_width <= 0 or grad_height <= 0:
+            raise ValueError("Border too large for image dimensions")
+        self.grad_width = grad_width
+        self.grad_height = grad_height
+        if border > 0 and border_color:
+            self.border = border
+            self.canvas = np.empty((height, width, 3), dtype=np.uint8)
+            self.canvas[...] = hex_to_rgb(border_color)
+        else:
+            self.border = 0
+            self.canvas = np.empty((grad_height, grad_width, 3), dtype=np.uint8)
+        self._spare = None
+        self.color_table = None
+
+    @property
+    def interior(self) -> np.ndarray:
+        """Writable view of the gradient area inside the border."""
+        b = self.border
+        return self.canvas[b:b + self.grad_height, b:b + self.grad_width]
+
+    def generate(self, colors: List[str], steps: int, wave_type: str, wave_amplitude: float = 0.2,
+                 amplitude_scale: float = 1.0, center_shift: float = 0.0, asymmetry: float = 0.0,
+                 organic_jitter: float = 0.0, random_seed: int = None, anti_alias: bool = False,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS) -> 'RenderPipeline':
+        """Draw the wave bands into the interior (same pixels as generate_wave_variation)."""
+        color_table = band_color_table(colors, steps)
+        self.color_table = color_table
+        wave_args = (self.grad_width, self.grad_height, wave_type, wave_amplitude, amplitude_scale,
+                     center_shift, asymmetry, organic_jitter, random_seed)
+        interior = self.interior
+        if anti_alias:
+            interior[...] = antialiased_band_image(self.grad_height, color_table,
+                                                   compute_column_shift(*wave_args))
+            return self
+
+        # Bands are gathered from the color table a few rows at a time, straight into the canvas
+        offsets = compute_column_offsets(*wave_args)
+        for row in range(0, self.grad_height, chunk_rows):
+            stop = min(row + chunk_rows, self.grad_height)
+            interior[row:stop] = color_table[band_index_map(self.grad_height, steps, offsets, row, stop)]
+        return self
+
+    def apply(self, stage: Callable, *args, **kwargs) -> 'RenderPipeline':
+        """Run an in-place stage (e.g. add_grain) on the whole canvas."""
+        stage(self.canvas, *args, **kwargs)
+        return self
+
+    def grain(self, effect: str, rng=None, **params) -> 'RenderPipeline':
+        """Apply one of the GRAIN_STAGES in place; 'none' is a no-op."""
+        if effect == 'none':
+            return self
+        if effect not in GRAIN_STAGES:
+            raise ValueError(f"Unknown grain effect '{effect}'")
+        GRAIN_STAGES[effect](self.canvas, **params, rng=rng)
+        return self
+
+    def diffuse(self, method: str = 'floyd_steinberg', serpentine: bool = False) -> 'RenderPipeline':
+        """Error-diffuse the interior back to the band colors of the last generate() call."""
+        if self.color_table is None:
+            raise ValueError("diffuse() needs the band colors from generate()")
+        palette = [tuple(int(c) for c in row) for row in self.color_table]
+        interior = self.interior
+        interior[...] = self.color_table[error_diffusion_dither(interior, palette, method, serpentine)]
+        return self
+
+    def warp(self, warps, sampling: str = 'nearest', chunk_rows: int = DEFAULT_CHUNK_ROWS,
+             cache: bool = False) -> 'RenderPipeline':
+        """Apply a warp chain to the whole canvas in one resampling pass (see remap_chain)."""
+        chain = normalize_chain(warps)
+        if not chain:
+            return self
+        if self._spare is None:
+            self._spare = np.empty_like(self.canvas)
+        remap_chain(self.canvas, chain, sampling, chunk_rows, out=self._spare, cache=cache)
+        self.canvas, self._spare = self._spare, self.canvas
+        return self
+
+    def to_image(self) -> Image.Image:
+        """Convert the canvas to a PIL Image (only needed for encoding)."""
+        return Image.fromarray(self.canvas)
+
+    def save(self, path: str, **kwargs) -> None:
+        """Encode the canvas to a file."""
+        self.to_image().save(path, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a wave with grain through a single canvas')
+    parser.add_argument('--palette-file', required=True, help='Path to palette file')
+    parser.add_argument('--wave-type', required=True, help='Wave variation type')
+    parser.add_argument('--steps', type=int, default=20, help='Number of gradient steps')
+    parser.add_argument('--width', type=int, default=2000, help='Image width')
+    parser.add_argument('--height', type=int, default=3000, help='Image height')
+    parser.add_argument('--border', type=int, default=100, help='Border size')
+    parser.add_argument('--border-color', default='#FFFFFF', help='Border color')
+    parser.add_argument('--wave-amplitude', type=float, default=0.2, help='Wave amplitude (0.0 to 1.0)')
+    parser.add_argument('--anti-alias', action='store_true', help='Blend band edges by sub-pixel coverage')
+    parser.add_argument('--grain-effect', choices=['none', *GRAIN_STAGES], default='none', help='Grain effect')
+    parser.add_argument('--intensity', type=float, default=0.1, help='Grain intensity for dithering')
+    parser.add_argument('--seed', type=int, help='Seed for reproducible grain')
+    parser.add_argument('--noise-dir', default=os.environ.get('HYPERFCK_NOISE_DIR'),
+                        help='Noise bank directory for precomputed grain (default: $HYPERFCK_NOISE_DIR)')
+    parser.add_argument('--diffuse', choices=list(DIFFUSION_KERNELS),
+                        help='Error-diffuse the grained render back to the band colors')
+    parser.add_argument('--output', required=True, help='Output file path')
+
+    args = parser.parse_args()
+
+    if args.noise_dir:
+        use_noise_bank(NoiseBank(args.noise_dir))
+
+    with open(args.palette_file, 'r') as f:
+        colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+
+    grain_params = {'border_size': args.border}
+    if args.grain_effect == 'dithering':
+        grain_params['intensity'] = args.intensity
+    pipeline = RenderPipeline(args.width, args.height, args.border, args.border_color)
+    pipeline.generate(colors, args.steps, args.wave_type, args.wave_amplitude, anti_alias=args.anti_alias)
+    pipeline.grain(args.grain_effect, rng=args.seed, **grain_params)
+    if args.diffuse:
+        pipeline.diffuse(args.diffuse)
+    pipeline.save(args.output)
+    print(f"Wave {args.wave_type} saved as '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Stream Renderer - Out-of-core Rendering in Horizontal Strips
+
+Renders, grains and encodes a wave image one strip at a time, feeding each
+strip straight into an incremental PNG or TIFF writer. Peak memory is bounded
+by the strip height instead of the image size.
+"""
+
+import argparse
+import struct
+import zlib
+from typing import List
+import numpy as np
+
+from comprehensive_wave_generator import band_color_table, compute_column_offsets, hex_to_rgb
+from tiled_renderer import GRAIN_SETTINGS, render_region, tile_bounds
+
+
+class PNGStripWriter:
+    """Write an 8-bit RGB PNG incrementally, one block of rows at a time."""
+
+    def __init__(self, path: str, width: int, height: int, compress_level: int = 6,
+                 chunk_size: int = 1 << 20):
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.chunk_size = chunk_size
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+        self._file = open(path, 'wb')
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+    def _write_chunk(self, tag: bytes, data: bytes) -> None:
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(tag)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+    def _queue(self, data: bytes, flush: bool = False) -> None:
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending and (flush or self._pending_size >= self.chunk_size):
+            self._write_chunk(b'IDAT', b''.join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Append a (n, width, 3) uint8 block of rows."""
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError("Row block does not match the image width")
+        # Every scanline is prefixed with filter type 0 (None)
+        scanlines = np.empty((rows.shape[0], self.width * 3 + 1), dtype=np.uint8)
+        scanlines[:, 0] = 0
+        scanlines[:, 1:] = rows.reshape(rows.shape[0], -1)
+        self._queue(self._compressor.compress(scanlines.tobytes()))
+        self.rows_written += rows.shape[0]
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self.rows_written != self.height:
+            self._file.close()
+            raise ValueError(f"Expected {self.height} rows, got {self.rows_written}")
+        self._queue(self._compressor.flush(), flush=True)
+        self._write_chunk(b'IEND', b'')
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class TIFFStripWriter:
+    """Write an uncompressed 8-bit RGB baseline TIFF incrementally."""
+
+    def __init__(self, path: str, width: int, height: int, rows_per_strip: int = 64):
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        row_bytes = width * 3
+        if row_bytes * height >= 1 << 32:
+            raise ValueError("Image too large for a classic TIFF; use PNG output")
+
+        # Layout: header, IFD, out-of-line tag values, then the pixel data
+        n_strips = (height + rows_per_strip - 1) // rows_per_strip
+        n_entries = 13
+        ifd_size = 2 + 12 * n_entries + 4
+        extra_offset = 8 + ifd_size
+        bits_offset = extra_offset
+        xres_offset = bits_offset + 6
+        yres_offset = xres_offset + 8
+        offsets_offset = yres_offset + 8
+        counts_offset = offsets_offset + 4 * n_strips
+        data_offset = counts_offset + 4 * n_strips
+
+        strip_offsets = [data_offset + i * rows_per_strip * row_bytes for i in range(n_strips)]
+        strip_counts = [min(rows_per_strip, height - i * rows_per_strip) * row_bytes
+                        for i in range(n_strips)]
+
+        def entry(tag, typ, count, value):
+            if typ == 3 and count == 1:
+                return struct.pack('<HHIHH', tag, typ, count, value, 0)
+            return struct.pack('<HHII', tag, typ, count, value)
+
+        # Single strips store their offset/count inline in the entry
+        offsets_value = strip_offsets[0] if n_strips == 1 else offsets_offset
+        counts_value = strip_counts[0] if n_strips == 1 else counts_offset
+        entries = [
+            entry(256, 4, 1, width),                     # ImageWidth
+            entry(257, 4, 1, height),                    # ImageLength
+            entry(258, 3, 3, bits_offset),               # BitsPerSample
+            entry(259, 3, 1, 1),                         # Compression: none
+            entry(262, 3, 1, 2),                         # PhotometricInterpretation: RGB
+            entry(273, 4, n_strips, offsets_value),      # StripOffsets
+            entry(277, 3, 1, 3),                         # SamplesPerPixel
+            entry(278, 4, 1, rows_per_strip),            # RowsPerStrip
+            entry(279, 4, n_strips, counts_value),       # StripByteCounts
+            entry(282, 5, 1, xres_offset),               # XResolution
+            entry(283, 5, 1, yres_offset),               # YResolution
+            entry(284, 3, 1, 1),                         # PlanarConfiguration: chunky
+            entry(296, 3, 1, 2),                         # ResolutionUnit: inch
+        ]
+
+        self._file = open(path, 'wb')
+        self._file.write(b'II*\x00' + struct.pack('<I', 8))
+        self._file.write(struct.pack('<H', n_entries) + b''.join(entries) + struct.pack('<I', 0))
+        self._file.write(struct.pack('<HHH', 8, 8, 8))
+        self._file.write(struct.pack('<II', 72, 1) * 2)
+        self._file.write(struct.pack(f'<{n_strips}I', *strip_offsets))
+        self._file.write(struct.pack(f'<{n_strips}I', *strip_counts))
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Append a (n, width, 3) uint8 block of rows."""
+        if rows.shape[1:] != (self.width, 3):
+            raise ValueError("Row block does not match the image width")
+        self._file.write(np.ascontiguousarray(rows, dtype=np.uint8).tobytes())
+        self.rows_written += rows.shape[0]
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if self.rows_written != self.height:
+            raise ValueError(f"Expected {self.height} rows, got {self.rows_written}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+def open_strip_writer(path: str, width: int, height: int):
+    """Pick an incremental writer from the output file extension."""
+    if path.lower().endswith(('.tif', '.tiff')):
+        return TIFFStripWriter(path, width, height)
+    if path.lower().endswith('.png'):
+        return PNGStripWriter(path, width, height)
+    raise ValueError("Streaming output must be a .png, .tif or .tiff file")
+
+
+def render_streaming(output_path: str, width: int, height: int, colors: List[str], steps: int,
+                     wave_type: str, border: int = 0, border_color: str = None,
+                     wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                     center_shift: float = 0.0, asymmetry: float = 0.0,
+                     organic_jitter: float = 0.0, random_seed: int = None,
+                     grain_effect: str = 'none', grain_params: dict = None,
+                     grain_seed: int = None, strip_height: int = 256) -> None:
+    """
+    Render a wave variation straight to disk in horizontal strips.
+
+    Strips use the same grid and grain streams as render_tiled with axis='rows' and
+    tile_size=strip_height, so both produce the same image for the same grain_seed.
+    """
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+
+    offsets = compute_column_offsets(grad_width, grad_height, wave_type, wave_amplitude,
+                                     amplitude_scale, center_shift, asymmetry,
+                                     organic_jitter, random_seed)
+    color_table = band_color_table(colors, steps)
+    if border > 0 and border_color:
+        border_rgb = hex_to_rgb(border_color)
+    else:
+        # Like generate_wave_variation, a border without a color gives the interior only
+        width, height, border, border_rgb = grad_width, grad_height, 0, (0, 0, 0)
+    if grain_seed is None:
+        grain_seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    strip = np.empty((strip_height, width, 3), dtype=np.uint8)
+    with open_strip_writer(output_path, width, height) as writer:
+        for index, tile in enumerate(tile_bounds(height, width, strip_height, 'rows')):
+            rows = strip[:tile[1] - tile[0]]
+            render_region(rows, tile, index, (height, width), border, border_rgb, offsets,
+                          color_table, grain_effect, grain_params, grain_seed)
+            writer.write_rows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render very large wave images in streamed strips')
+    parser.add_argument('--palette-file', required=True, help='Path to palette file')
+    parser.add_argument('--wave-type', required=True, help='Wave variation type')
+    parser.add_argument('--steps', type=int, default=20, help='Number of gradient steps')
+    parser.add_argument('--width', type=int, default=2000, help='Image width')
+    parser.add_argument('--height', type=int, default=3000, help='Image height')
+    parser.add_argument('--border', type=int, default=100, help='Border size')
+    parser.add_argument('--border-color', default='#FFFFFF', help='Border color')
+    parser.add_argument('--wave-amplitude', type=float, default=0.2, help='Wave amplitude (0.0 to 1.0)')
+    parser.add_argument('--amplitude-scale', type=float, default=1.0, help='Scale factor for legacy wave families')
+    parser.add_argument('--grain-effect', choices=list(GRAIN_SETTINGS), default='none',
+                        help='Grain effect applied per strip')
+    parser.add_argument('--grain-seed', type=int, help='Seed for reproducible grain')
+    parser.add_argument('--strip-height', type=int, default=256, help='Rows rendered per strip')
+    parser.add_argument('--output', required=True, help='Output .png or .tif file')
+
+    args = parser.parse_args()
+
+    with open(args.palette_file, 'r') as f:
+        colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+
+    render_streaming(args.output, args.width, args.height, colors, args.steps, args.wave_type,
+                     args.border, args.border_color, args.wave_amplitude, args.amplitude_scale,
+                     grain_effect=args.grain_effect, grain_params=GRAIN_SETTINGS[args.grain_effect],
+                     grain_seed=args.grain_seed, strip_height=args.strip_height)
+    print(f"Wave {args.wave_type} streamed to '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
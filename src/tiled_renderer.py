@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tiled Renderer - Multi-core Rendering for Large Prints
+
+Splits the canvas into row or column tiles and renders wave bands plus grain
+with a process pool. Every tile is written straight into a shared-memory
+canvas, so only tile coordinates travel between processes.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+
+from comprehensive_wave_generator import (band_color_table, band_index_map,
+                                          compute_column_offsets, hex_to_rgb)
+from grain_processor import apply_dithering_grain
+from random_streams import derive_rng
+from white_grain import apply_white_grain
+
+
+def tile_bounds(height: int, width: int, tile_size: int = 256,
+                axis: str = 'rows') -> List[Tuple[int, int, int, int]]:
+    """
+    Split a canvas into (y0, y1, x0, x1) tiles.
+
+    The grid depends only on the canvas size and tile size, never on the worker
+    count, so per-tile random streams give the same image for any pool size.
+    """
+    if axis == 'rows':
+        return [(y0, min(y0 + tile_size, height), 0, width) for y0 in range(0, height, tile_size)]
+    if axis == 'columns':
+        return [(0, height, x0, min(x0 + tile_size, width)) for x0 in range(0, width, tile_size)]
+    raise ValueError(f"Unknown tile axis '{axis}'")
+
+
+# Grain settings of the tiled and streamed CLIs, kept in one place so both render alike
+GRAIN_SETTINGS = {
+    'none': {},
+    'dithering': {'intensity': 0.15, 'grain_size': 1.2},
+    'white_grain': {'base_intensity': 0.01, 'density_variation': 0.2, 'size_variation': 0.3},
+}
+
+
+def render_region(out: np.ndarray, tile: Tuple[int, int, int, int], index: int, shape: Tuple[int, int],
+                  border: int, border_rgb: Tuple[int, int, int], offsets: np.ndarray,
+                  color_table: np.ndarray, grain_effect: str = 'none', grain_params: dict = None,
+                  seed: int = 0) -> None:
+    """
+    Render canvas region (y0, y1, x0, x1) of a bordered wave image into `out`.
+
+    Args:
+        out: uint8 array of shape (y1 - y0, x1 - x0, 3) receiving the region
+        tile: Region bounds in canvas coordinates
+        index: Region index in the tile grid, used to derive its grain stream
+        shape: Full canvas (height, width)
+        border, border_rgb: Border size and color
+        offsets, color_table: Per-column band offsets and per-step colors of the gradient area
+        grain_effect: 'none', 'dithering' or 'white_grain'
+        grain_params: Keyword arguments for the grain function
+        seed: Base grain seed shared by all regions of the canvas
+    """
+    y0, y1, x0, x1 = tile
+    height, width = shape
+    out[...] = border_rgb
+
+    # Intersect the tile with the gradient area
+    iy0, iy1 = max(y0, border), min(y1, height - border)
+    ix0, ix1 = max(x0, border), min(x1, width - border)
+    if iy0 >= iy1 or ix0 >= ix1:
+        return
+
+    bands = band_index_map(height - 2 * border, len(color_table), offsets[ix0 - border:ix1 - border],
+                           iy0 - border, iy1 - border)
+    region = color_table[bands]
+
+    if grain_effect != 'none':
+        # Each tile draws from its own stream derived from (seed, tile index)
+        tile_image = Image.fromarray(region)
+        grain_params = dict(grain_params or {}, border_size=0, rng=derive_rng(seed, index))
+        if grain_effect == 'dithering':
+            tile_image = apply_dithering_grain(tile_image, **grain_params)
+        elif grain_effect == 'white_grain':
+            tile_image = apply_white_grain(tile_image, **grain_params)
+        else:
+            raise ValueError(f"Unknown grain effect '{grain_effect}'")
+        region = np.asarray(tile_image)
+
+    out[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = region
+
+
+def _render_tile(job: dict) -> None:
+    """Render one tile of the canvas in place inside the shared-memory buffer."""
+    shm = shared_memory.SharedMemory(name=job['shm_name'])
+    try:
+        canvas = np.ndarray(job['shape'], dtype=np.uint8, buffer=shm.buf)
+        y0, y1, x0, x1 = job['tile']
+        render_region(canvas[y0:y1, x0:x1], job['tile'], job['index'], job['shape'][:2],
+                      job['border'], job['border_rgb'], job['offsets'], job['color_table'],
+                      job['grain_effect'], job['grain_params'], job['seed'])
+        del canvas
+    finally:
+        shm.close()
+
+
+def render_tiled(width: int, height: int, colors: List[str], steps: int, wave_type: str,
+                 border: int = 0, border_color: str = None, wave_amplitude: float = 0.2,
+                 amplitude_scale: float = 1.0, center_shift: float = 0.0,
+                 asymmetry: float = 0.0, organic_jitter: float = 0.0, random_seed: int = None,
+                 grain_effect: str = 'none', grain_params: dict = None, grain_seed: int = None,
+                 workers: int = None, tile_size: int = 256, axis: str = 'rows') -> Image.Image:
+    """
+    Render a wave variation (optionally grained) with a pool of worker processes.
+
+    Args:
+        width, height ... random_seed: Same as generate_wave_variation
+        grain_effect: 'none', 'dithering' or 'white_grain'
+        grain_params: Keyword arguments for the grain function (border is handled per tile)
+        grain_seed: Seed for the per-tile grain streams (random if None)
+        workers: Number of worker processes (defaults to the CPU count; 1 renders serially)
+        tile_size: Tile height (rows) or width (columns) in pixels
+        axis: 'rows' or 'columns'
+
+    Returns:
+        PIL Image; the wave bands are identical to generate_wave_variation, and grained
+        output is identical for any worker count with the same grain_seed and tile grid.
+    """
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+
+    offsets = compute_column_offsets(grad_width, grad_height, wave_type, wave_amplitude,
+                                     amplitude_scale, center_shift, asymmetry,
+                                     organic_jitter, random_seed)
+    color_table = band_color_table(colors, steps)
+    if border > 0 and border_color:
+        border_rgb = hex_to_rgb(border_color)
+    else:
+        # Like generate_wave_variation, a border without a color gives the interior only
+        width, height, border, border_rgb = grad_width, grad_height, 0, (0, 0, 0)
+    if grain_seed is None:
+        grain_seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    shape = (height, width, 3)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+    try:
+        jobs = [{
+            'shm_name': shm.name, 'shape': shape, 'tile': tile, 'index': index,
+            'border': border, 'border_rgb': border_rgb, 'offsets': offsets,
+            'color_table': color_table, 'grain_effect': grain_effect,
+            'grain_params': grain_params, 'seed': grain_seed,
+        } for index, tile in enumerate(tile_bounds(height, width, tile_size, axis))]
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for job in jobs:
+                _render_tile(job)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Consume results so worker exceptions propagate
+                list(pool.map(_render_tile, jobs))
+
+        canvas = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        image = Image.fromarray(canvas)
+        del canvas
+        return image
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render wave variations with multiple processes')
+    parser.add_argument('--palette-file', required=True, help='Path to palette file')
+    parser.add_argument('--wave-type', required=True, help='Wave variation type')
+    parser.add_argument('--steps', type=int, default=20, help='Number of gradient steps')
+    parser.add_argument('--width', type=int, default=2000, help='Image width')
+    parser.add_argument('--height', type=int, default=3000, help='Image height')
+    parser.add_argument('--border', type=int, default=100, help='Border size')
+    parser.add_argument('--border-color', default='#FFFFFF', help='Border color')
+    parser.add_argument('--wave-amplitude', type=float, default=0.2, help='Wave amplitude (0.0 to 1.0)')
+    parser.add_argument('--amplitude-scale', type=float, default=1.0, help='Scale factor for legacy wave families')
+    parser.add_argument('--grain-effect', choices=list(GRAIN_SETTINGS), default='none',
+                        help='Grain effect applied per tile')
+    parser.add_argument('--grain-seed', type=int, help='Seed for reproducible grain')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--tile-size', type=int, default=256, help='Tile size in pixels')
+    parser.add_argument('--tile-axis', choices=['rows', 'columns'], default='rows', help='Tile direction')
+    parser.add_argument('--output', required=True, help='Output file path')
+
+    args = parser.parse_args()
+
+    with open(args.palette_file, 'r') as f:
+        colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+
+    image = render_tiled(args.width, args.height, colors, args.steps, args.wave_type,
+                         args.border, args.border_color, args.wave_amplitude, args.amplitude_scale,
+                         grain_effect=args.grain_effect, grain_params=GRAIN_SETTINGS[args.grain_effect],
+                         grain_seed=args.grain_seed, workers=args.workers,
+                         tile_size=args.tile_size, axis=args.tile_axis)
+    image.save(args.output)
+    print(f"Wave {args.wave_type} rendered in tiles and saved as '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Vector Exporter - SVG/PDF Export of Wave Band Geometry
+
+Every band of a wave variation is a polygon bounded by per-column offset
+curves. This module traces those curves from the same wave math as
+generate_wave_variation, simplifies them to a bounded number of vertices and
+writes them as SVG or PDF paths, so prints of any size stay a few KB.
+"""
+
+import argparse
+import zlib
+from typing import List, Tuple
+import numpy as np
+
+from comprehensive_wave_generator import band_color_table, compute_column_shift, hex_to_rgb
+
+
+Shape = Tuple[Tuple[int, int, int], np.ndarray]
+
+
+def simplify_polyline(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker simplification of an (n, 2) polyline (endpoints kept)."""
+    if len(points) <= 2:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        rel = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distance = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            distance = np.abs(segment[0] * rel[:, 1] - segment[1] * rel[:, 0]) / length
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def _simplify_bounded(points: np.ndarray, tolerance: float, max_vertices: int,
+                      max_rounds: int = 64) -> np.ndarray:
+    """
+    Simplify, loosening the tolerance until the curve fits in max_vertices (at least 2).
+
+    After max_rounds doublings the curve is thinned to evenly spaced vertices instead.
+    """
+    simplified = simplify_polyline(points, tolerance)
+    tolerance = max(tolerance, 1e-3)
+    for _ in range(max_rounds):
+        if len(simplified) <= max_vertices:
+            return simplified
+        tolerance *= 2
+        simplified = simplify_polyline(points, tolerance)
+    if len(simplified) <= max_vertices:
+        return simplified
+    keep = np.unique(np.linspace(0, len(simplified) - 1, max(2, max_vertices)).round().astype(int))
+    return simplified[keep]
+
+
+def band_shapes(width: int, height: int, colors: List[str], steps: int, wave_type: str,
+                border: int = 0, border_color: str = None, wave_amplitude: float = 0.2,
+                amplitude_scale: float = 1.0, center_shift: float = 0.0, asymmetry: float = 0.0,
+                organic_jitter: float = 0.0, random_seed: int = None, tolerance: float = 0.5,
+                max_vertices: int = 512) -> List[Shape]:
+    """
+    Trace a wave variation as filled polygons in canvas pixel coordinates.
+
+    Shapes are painted in order: the border (if any), then every band from its top edge
+    down to the bottom of the gradient area, so later bands cover earlier ones and
+    neighbouring bands never leave hairline gaps.
+
+    Args:
+        width ... random_seed: Same as generate_wave_variation
+        tolerance: Maximum deviation of a simplified edge from the exact curve, in pixels
+            (must be positive)
+        max_vertices: Upper bound on vertices per band edge (at least 2)
+
+    Returns:
+        List of (rgb, points) with points an (n, 2) float array of closed polygon vertices
+    """
+    if tolerance <= 0:
+        raise ValueError("Simplification tolerance must be positive")
+    if max_vertices < 2:
+        raise ValueError("Band edges need at least 2 vertices")
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+
+    shift = compute_column_shift(grad_width, grad_height, wave_type, wave_amplitude,
+                                 amplitude_scale, center_shift, asymmetry,
+                                 organic_jitter, random_seed)
+    color_table = band_color_table(colors, steps)
+
+    shapes = []
+    if border > 0 and border_color:
+        shapes.append((hex_to_rgb(border_color),
+                       np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=float)))
+
+    # Edge curves are sampled at column centers and extended to the area's sides
+    xs = np.concatenate([[0.0], np.arange(grad_width) + 0.5, [float(grad_width)]])
+    shift = np.concatenate([shift[:1], shift, shift[-1:]])
+    bottom = np.array([[grad_width, grad_height], [0, grad_height]], dtype=float)
+    for step in range(steps):
+        edge = np.clip(step * grad_height / steps - shift, 0, grad_height)
+        if step > 0 and np.all(edge >= grad_height):
+            continue
+        curve = _simplify_bounded(np.column_stack([xs, edge]), tolerance, max_vertices)
+        polygon = np.vstack([curve, bottom]) + border
+        shapes.append((tuple(int(c) for c in color_table[step]), polygon))
+    return shapes
+
+
+def _fmt(value: float) -> str:
+    text = f"{value:.2f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def write_svg(path: str, width: int, height: int, shapes: List[Shape]) -> None:
+    """Write shapes as an SVG document sized in pixels."""
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" shape-rendering="crispEdges">']
+    for (r, g, b), points in shapes:
+        coords = ' '.join(f"{_fmt(x)},{_fmt(y)}" for x, y in points)
+        lines.append(f'<polygon fill="#{r:02x}{g:02x}{b:02x}" points="{coords}"/>')
+    lines.append('</svg>')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_pdf(path: str, width: int, height: int, shapes: List[Shape], dpi: float = 72.0) -> None:
+    """Write shapes as a single-page PDF (one pixel is 72/dpi points)."""
+    scale = 72.0 / dpi
+    page_w, page_h = width * scale, height * scale
+    ops = []
+    for (r, g, b), points in shapes:
+        # PDF user space has its origin at the bottom-left
+        pdf_points = np.column_stack([points[:, 0] * scale, page_h - points[:, 1] * scale])
+        ops.append(f"{_fmt(r / 255)} {_fmt(g / 255)} {_fmt(b / 255)} rg")
+        ops.append(f"{_fmt(pdf_points[0, 0])} {_fmt(pdf_points[0, 1])} m")
+        ops.extend(f"{_fmt(x)} {_fmt(y)} l" for x, y in pdf_points[1:])
+        ops.append("h f")
+    content = zlib.compress('\n'.join(ops).encode('ascii'))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_fmt(page_w)} {_fmt(page_h)}] "
+        f"/Contents 4 0 R /Resources << >> >>".encode('ascii'),
+        f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode('ascii')
+        + content + b"\nendstream",
+    ]
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n")
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii'))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode('ascii'))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+                f"startxref\n{xref_offset}\n%%EOF\n".encode('ascii'))
+
+
+def export_vector(output_path: str, width: int, height: int, colors: List[str], steps: int,
+                  wave_type: str, border: int = 0, border_color: str = None,
+                  dpi: float = 72.0, **kwargs) -> None:
+    """Trace a wave variation and write it as .svg or .pdf (picked from the extension)."""
+    shapes = band_shapes(width, height, colors, steps, wave_type, border, border_color, **kwargs)
+    if output_path.lower().endswith('.svg'):
+        write_svg(output_path, width, height, shapes)
+    elif output_path.lower().endswith('.pdf'):
+        write_pdf(output_path, width, height, shapes, dpi)
+    else:
+        raise ValueError("Vector output must be a .svg or .pdf file")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export wave variations as SVG/PDF vector art')
+    parser.add_argument('--palette-file', required=True, help='Path to palette file')
+    parser.add_argument('--wave-type', required=True, help='Wave variation type')
+    parser.add_argument('--steps', type=int, default=20, help='Number of gradient steps')
+    parser.add_argument('--width', type=int, default=2000, help='Image width')
+    parser.add_argument('--height', type=int, default=3000, help='Image height')
+    parser.add_argument('--border', type=int, default=100, help='Border size')
+    parser.add_argument('--border-color', default='#FFFFFF', help='Border color')
+    parser.add_argument('--wave-amplitude', type=float, default=0.2, help='Wave amplitude (0.0 to 1.0)')
+    parser.add_argument('--amplitude-scale', type=float, default=1.0, help='Scale factor for legacy wave families')
+    parser.add_argument('--center-shift', type=float, default=0.0, help='Shift the wave center horizontally')
+    parser.add_argument('--asymmetry', type=float, default=0.0, help='Asymmetry exponent control')
+    parser.add_argument('--organic-jitter', type=float, default=0.0, help='Organic jitter amount')
+    parser.add_argument('--random-seed', type=int, help='Seed for reproducible organic jitter')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Edge simplification tolerance in pixels')
+    parser.add_argument('--max-vertices', type=int, default=512, help='Maximum vertices per band edge')
+    parser.add_argument('--dpi', type=float, default=72.0, help='Pixels per inch for PDF page size')
+    parser.add_argument('--output', required=True, help='Output .svg or .pdf file')
+
+    args = parser.parse_args()
+    if args.tolerance <= 0:
+        parser.error('--tolerance must be positive')
+    if args.max_vertices < 2:
+        parser.error('--max-vertices must be at least 2')
+
+    with open(args.palette_file, 'r') as f:
+        colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+
+    export_vector(args.output, args.width, args.height, colors, args.steps, args.wave_type,
+                  args.border, args.border_color, dpi=args.dpi,
+                  wave_amplitude=args.wave_amplitude, amplitude_scale=args.amplitude_scale,
+                  center_shift=args.center_shift, asymmetry=args.asymmetry,
+                  organic_jitter=args.organic_jitter, random_seed=args.random_seed,
+                  tolerance=args.tolerance, max_vertices=args.max_vertices)
+    print(f"Wave {args.wave_type} exported as '{args.output}'")
+
+
+if __name__ == '__main__':
+    main()
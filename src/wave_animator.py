@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Wave Animator - Looping Wave Animations
+
+Renders looping sequences where the wave phase, amplitude or organic jitter
+drifts over time. The color table, border and amplitude envelope are built
+once; every frame only recomputes the per-column offsets and the band index
+map, and frames are streamed to a GIF/APNG writer or a numbered frame folder.
+"""
+
+import argparse
+import os
+import time
+from typing import Iterator, List
+import numpy as np
+from PIL import Image
+
+from comprehensive_wave_generator import organic_noise, band_color_table, band_index_map, hex_to_rgb
+from wave_registry import compile_wave_style, is_flipped
+
+
+def animation_frames(width: int, height: int, colors: List[str], steps: int, wave_type: str,
+                     border: int = 0, border_color: str = None, frames: int = 48,
+                     wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                     center_shift: float = 0.0, asymmetry: float = 0.0,
+                     organic_jitter: float = 0.0, random_seed: int = None,
+                     phase_cycles: float = 1.0, amplitude_drift: float = 0.0,
+                     jitter_drift: float = 0.0) -> Iterator[Image.Image]:
+    """
+    Yield the frames of a seamlessly looping wave animation as palette images.
+
+    Args:
+        width ... random_seed: Same as generate_wave_variation
+        frames: Number of frames in one loop
+        phase_cycles: Full 2*pi phase turns of the wave per loop (0 keeps the phase still)
+        amplitude_drift: Relative amplitude swing, e.g. 0.3 breathes between 70% and 130%
+        jitter_drift: How far the organic jitter wanders per loop (0 keeps it fixed, 1 blends
+            fully into a second noise field and back)
+
+    Yields:
+        'P' mode frames sharing one palette (band colors plus the border color)
+    """
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+
+    # Everything that does not change between frames is computed once
+    normalized_x = np.arange(grad_width) / grad_width
+    amplitude, frequency = compile_wave_style(wave_type)(normalized_x, wave_amplitude, amplitude_scale,
+                                                         center_shift, asymmetry)
+    wave_extent = amplitude * grad_height
+    angle = 2 * np.pi * frequency * normalized_x
+    sign = -1 if is_flipped(wave_type) else 1
+
+    jitter = None
+    if organic_jitter and grad_width > 1:
+        base_noise = organic_noise(grad_width, random_seed)
+        drift_noise = organic_noise(grad_width, None if random_seed is None else int(random_seed) + 1)
+        jitter = (organic_jitter * grad_height * base_noise,
+                  organic_jitter * grad_height * drift_noise)
+
+    color_table = band_color_table(colors, steps)
+    if border > 0 and border_color:
+        color_table = np.vstack([color_table, np.array(hex_to_rgb(border_color), dtype=np.uint8)])
+    else:
+        # Like generate_wave_variation, a border without a color yields the interior only
+        width, height, border = grad_width, grad_height, 0
+    palette = color_table.tobytes()
+    canvas = np.full((height, width), steps, dtype=np.uint8 if len(color_table) <= 256 else np.uint16)
+
+    for frame in range(frames):
+        loop = 2 * np.pi * frame / frames
+        scale = 1.0 + amplitude_drift * np.sin(loop)
+        offsets = np.trunc(scale * wave_extent * np.sin(angle + phase_cycles * loop)).astype(np.int64)
+        if jitter is not None:
+            # Blend towards the second noise field and back, so the loop closes
+            mix = jitter_drift * (1 - np.cos(loop)) / 2
+            offsets += np.trunc((1 - mix) * jitter[0] + mix * jitter[1]).astype(np.int64)
+        canvas[border:border + grad_height, border:border + grad_width] = \
+            band_index_map(grad_height, steps, sign * offsets)
+
+        if len(color_table) <= 256:
+            image = Image.frombytes('P', (width, height), canvas.tobytes())
+            image.putpalette(palette)
+        else:
+            image = Image.fromarray(color_table[canvas])
+        yield image
+
+
+def render_animation(output_path: str, width: int, height: int, colors: List[str], steps: int,
+                     wave_type: str, border: int = 0, border_color: str = None,
+                     frames: int = 48, fps: float = 24.0, **kwargs) -> float:
+    """
+    Render an animation to .gif, .png (APNG) or a directory of numbered PNG frames.
+
+    Returns:
+        Rendering speed in frames per second (including encoding)
+    """
+    start = time.perf_counter()
+    sequence = animation_frames(width, height, colors, steps, wave_type, border, border_color,
+                                frames, **kwargs)
+    lower = output_path.lower()
+    if lower.endswith(('.gif', '.png', '.apng')):
+        first = next(sequence)
+        if lower.endswith('.gif'):
+            append_images = sequence
+        else:
+            # The APNG encoder walks append_images twice, so it needs a list
+            # (palette frames are one byte per pixel)
+            append_images = list(sequence)
+        first.save(output_path, format='GIF' if lower.endswith('.gif') else 'PNG', save_all=True,
+                   append_images=append_images, duration=int(round(1000 / fps)), loop=0)
+    else:
+        os.makedirs(output_path, exist_ok=True)
+        for index, image in enumerate(sequence):
+            image.save(os.path.join(output_path, f"frame_{index:04d}.png"))
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render looping wave animations')
+    parser.add_argument('--palette-file', required=True, help='Path to palette file')
+    parser.add_argument('--wave-type', required=True, help='Wave variation type')
+    parser.add_argument('--steps', type=int, default=20, help='Number of gradient steps')
+    parser.add_argument('--width', type=int, default=600, help='Frame width')
+    parser.add_argument('--height', type=int, default=900, help='Frame height')
+    parser.add_argument('--border', type=int, default=30, help='Border size')
+    parser.add_argument('--border-color', default='#FFFFFF', help='Border color')
+    parser.add_argument('--wave-amplitude', type=float, default=0.2, help='Wave amplitude (0.0 to 1.0)')
+    parser.add_argument('--amplitude-scale', type=float, default=1.0, help='Scale factor for legacy wave families')
+    parser.add_argument('--center-shift', type=float, default=0.0, help='Shift the wave center horizontally')
+    parser.add_argument('--asymmetry', type=float, default=0.0, help='Asymmetry exponent control')
+    parser.add_argument('--organic-jitter', type=float, default=0.0, help='Organic jitter amount')
+    parser.add_argument('--random-seed', type=int, help='Seed for reproducible organic jitter')
+    parser.add_argument('--frames', type=int, default=48, help='Frames per loop')
+    parser.add_argument('--fps', type=float, default=24.0, help='Playback frame rate')
+    parser.add_argument('--phase-cycles', type=float, default=1.0, help='Wave phase turns per loop')
+    parser.add_argument('--amplitude-drift', type=float, default=0.0, help='Relative amplitude swing per loop')
+    parser.add_argument('--jitter-drift', type=float, default=0.0, help='Organic jitter drift per loop (0-1)')
+    parser.add_argument('--output', required=True, help='Output .gif/.png (APNG) file or frame directory')
+
+    args = parser.parse_args()
+
+    with open(args.palette_file, 'r') as f:
+        colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+
+    speed = render_animation(args.output, args.width, args.height, colors, args.steps, args.wave_type,
+                             args.border, args.border_color, args.frames, args.fps,
+                             wave_amplitude=args.wave_amplitude, amplitude_scale=args.amplitude_scale,
+                             center_shift=args.center_shift, asymmetry=args.asymmetry,
+                             organic_jitter=args.organic_jitter, random_seed=args.random_seed,
+                             phase_cycles=args.phase_cycles, amplitude_drift=args.amplitude_drift,
+                             jitter_drift=args.jitter_drift)
+    print(f"{args.frames} frames of wave {args.wave_type} saved to '{args.output}' ({speed:.1f} frames/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Wave Registry - Declarative Wave Type Definitions
+
+Describes every wave family as data (amplitude envelope segments, frequency and
+vertical flip) and compiles each one into a cached NumPy profile over x.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+
+# Envelope segments cover [start, start + width] of the normalized x axis.
+#   shape 'fall'   - peak at start, linear decay to 0 at the end
+#   shape 'rise'   - 0 at start, linear growth to peak at the end
+#   shape 'bell'   - (1 - d)^2 around the (shifted) center, supports asymmetry
+#   shape 'valley' - d^2 around the (shifted) center, supports asymmetry
+# Legacy shapes scale their peak by amplitude_scale; bell/valley use wave_amplitude.
+_WAVE_1X_LEFT = {'shape': 'fall', 'start': 0.0, 'width': 0.3, 'peak': 0.25, 'frequency': 1.5}
+_WAVE_1X_RIGHT = {'shape': 'rise', 'start': 0.7, 'width': 0.3, 'peak': 0.25, 'frequency': 1.5}
+_WAVE_2X_RIGHT = {'shape': 'rise', 'start': 0.5, 'width': 0.5, 'peak': 0.2, 'frequency': 1.0}
+_WAVE_2X_LEFT = {'shape': 'fall', 'start': 0.0, 'width': 0.5, 'peak': 0.2, 'frequency': 1.0}
+
+WAVE_STYLES: Dict[str, dict] = {
+    '0.0': {'description': 'Straight gradient (no waves)', 'segments': []},
+    '1A': {'description': 'Wave on left, straight on right', 'segments': [_WAVE_1X_LEFT]},
+    '1B': {'description': 'Straight on left, wave on right', 'segments': [_WAVE_1X_RIGHT]},
+    '1C': {'description': '1A flipped vertically', 'segments': [_WAVE_1X_LEFT], 'flip': True},
+    '1D': {'description': '1B flipped vertically', 'segments': [_WAVE_1X_RIGHT], 'flip': True},
+    '2A': {'description': '50/50 transition, wave on right', 'segments': [_WAVE_2X_RIGHT]},
+    '2B': {'description': '50/50 transition, wave on left', 'segments': [_WAVE_2X_LEFT]},
+    '2C': {'description': '2A flipped vertically', 'segments': [_WAVE_2X_RIGHT], 'flip': True},
+    '2D': {'description': '2B flipped vertically', 'segments': [_WAVE_2X_LEFT], 'flip': True},
+    '2E': {'description': 'Single 2B-style wave shifted to center (0.25-0.75)',
+           'segments': [{'shape': 'fall', 'start': 0.25, 'width': 0.5, 'peak': 0.2, 'frequency': 1.0}]},
+    '3A': {'description': '1A on the left half, 2A on the right half',
+           'segments': [_WAVE_1X_LEFT, _WAVE_2X_RIGHT]},
+    '3B': {'description': '1C on the left half, 2C on the right half',
+           'segments': [_WAVE_1X_LEFT, _WAVE_2X_RIGHT], 'flip': True},
+    '3C': {'description': '1C on the left half, 2C on the right half (unflipped)',
+           'segments': [_WAVE_1X_LEFT, _WAVE_2X_RIGHT]},
+    # 1D only waves past 0.7 and 2D only before 0.5, so restricted to their halves both are flat
+    '3D': {'description': '1D on the left half, 2D on the right half', 'segments': [], 'flip': True},
+    '4A': {'description': 'Prime wave (bell curve intensity)',
+           'segments': [{'shape': 'bell', 'start': 0.0, 'width': 1.0, 'frequency': 1.0}]},
+    '4B': {'description': 'Inverted prime wave (valley curve intensity)',
+           'segments': [{'shape': 'valley', 'start': 0.0, 'width': 1.0, 'frequency': 1.0}]},
+}
+
+
+def is_flipped(wave_type: str) -> bool:
+    """Return True if the wave type is drawn flipped vertically."""
+    return bool(get_wave_style(wave_type).get('flip', False))
+
+
+def get_wave_style(wave_type: str) -> dict:
+    """Look up a wave style definition."""
+    if wave_type not in WAVE_STYLES:
+        raise ValueError(f"Unknown wave type '{wave_type}'")
+    return WAVE_STYLES[wave_type]
+
+
+def _segment_profile(segment: dict) -> Callable:
+    """Compile one envelope segment into f(nx, wave_amplitude, amplitude_scale, center_shift, asymmetry)."""
+    shape = segment['shape']
+    start = segment['start']
+    width = segment['width']
+
+    if shape in ('fall', 'rise'):
+        peak = segment['peak']
+
+        def profile(nx, wave_amplitude, amplitude_scale, center_shift, asymmetry):
+            progress = (nx - start) / width
+            term = (1 - progress) if shape == 'fall' else progress
+            return (peak * amplitude_scale) * term
+        return profile
+
+    if shape in ('bell', 'valley'):
+        def profile(nx, wave_amplitude, amplitude_scale, center_shift, asymmetry):
+            # Apply center shift (positive shifts center to the right)
+            shifted_x = np.minimum(1.0, np.maximum(0.0, nx - center_shift))
+            center_distance = np.abs(shifted_x - 0.5) * 2
+            if shape == 'bell':
+                wave_intensity = (1 - center_distance) ** 2
+            else:
+                wave_intensity = center_distance ** 2
+            # Apply asymmetry exponent: >0 emphasizes left, <0 emphasizes right
+            if asymmetry != 0.0:
+                left_p = 1.0 + abs(asymmetry)
+                right_p = 1.0 + abs(asymmetry) if asymmetry < 0 else 1.0
+                wave_intensity = np.where(shifted_x < 0.5, wave_intensity ** left_p,
+                                          wave_intensity ** right_p)
+            return wave_amplitude * wave_intensity
+        return profile
+
+    raise ValueError(f"Unknown envelope shape '{shape}'")
+
+
+@lru_cache(maxsize=None)
+def compile_wave_style(wave_type: str) -> Callable:
+    """
+    Compile a wave style into a vectorized amplitude profile.
+
+    Returns:
+        Function (normalized_x, wave_amplitude, amplitude_scale, center_shift, asymmetry)
+        returning per-column (amplitude, frequency) arrays.
+    """
+    segments = [(seg, _segment_profile(seg)) for seg in get_wave_style(wave_type)['segments']]
+
+    def amplitude_profile(normalized_x: np.ndarray, wave_amplitude: float = 0.2,
+                          amplitude_scale: float = 1.0, center_shift: float = 0.0,
+                          asymmetry: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        amplitude = np.zeros_like(normalized_x)
+        frequency = np.ones_like(normalized_x)
+        for seg, profile in segments:
+            inside = (normalized_x >= seg['start']) & (normalized_x <= seg['start'] + seg['width'])
+            values = profile(normalized_x[inside], wave_amplitude, amplitude_scale,
+                             center_shift, asymmetry)
+            amplitude[inside] = values
+            frequency[inside] = seg.get('frequency', 1.0)
+        return amplitude, frequency
+
+    return amplitude_profile
@@ -2,17 +2,27 @@
 """
 White Grain Generator
 Creates random white grain patterns with varying density and size.
+Grain seeds and particles are drawn as arrays and stamped with scatter operations.
 """
 
+from functools import lru_cache
+from typing import Tuple
 import numpy as np
 from PIL import Image
-import random
 import math
 
+from grain_engine import interior
+from random_streams import RngLike, make_rng
+
+
+DEFAULT_CHUNK_ROWS = 256
+DEFAULT_CHUNK_PARTICLES = 1 << 16
+SPRITES = ('square', 'round')
+
 
 def apply_white_grain(image: Image.Image, base_intensity: float = 0.1, 
                       density_variation: float = 0.5, size_variation: float = 0.8,
-                      border_size: int = 0) -> Image.Image:
+                      border_size: int = 0, rng: RngLike = None) -> Image.Image:
     """
     Apply random white grain with varying density and size.
     
@@ -22,62 +32,166 @@ def apply_white_grain(image: Image.Image, base_intensity: float = 0.1,
         density_variation: How much density varies across image (0.0 to 1.0)
         size_variation: How much grain size varies (0.0 to 1.0)
         border_size: Border size to exclude from grain
+        rng: Seed or numpy Generator for the random draws
     
     Returns:
         PIL Image with white grain applied
     """
     img_array = np.array(image)
-    height, width, channels = img_array.shape
+    add_white_grain(img_array, base_intensity, density_variation, size_variation, border_size, rng)
+    return Image.fromarray(img_array)
+
+
+def white_grain_hits(height: int, width: int, base_intensity: float = 0.1,
+                     density_variation: float = 0.5, size_variation: float = 0.8,
+                     rng: RngLike = None, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """
+    Draw the grain seeds of a height x width area.
     
-    # Create white grain pattern
-    white_grain = np.zeros((height, width, channels))
+    Every pixel gets a random density and size factor; it seeds a grain with probability
+    base_intensity * density_factor * size_factor, and the grain is
+    max(1, int(size_factor * 2)) pixels square. The density, size and hit fields are
+    drawn a few rows at a time, so only the (sparse) seeds are kept.
     
-    # Work only on the gradient area (exclude borders)
-    start_y = border_size
-    end_y = height - border_size
-    start_x = border_size
-    end_x = width - border_size
+    Returns:
+        (ys, xs, sizes) of the seeds, in raster order
+    """
+    rng = make_rng(rng)
+    ys, xs, sizes = [], [], []
+    for row in range(0, height, chunk_rows):
+        stop = min(row + chunk_rows, height)
+        density_draws, size_draws, hit_draws = rng.random((3, stop - row, width), dtype=np.float32)
+        density_factor = 1.0 + density_variation * (density_draws - 0.5) * 2
+        size_factor = 1.0 + size_variation * (size_draws - 0.5) * 2
+        chunk_ys, chunk_xs = np.nonzero(hit_draws < base_intensity * density_factor * size_factor)
+        ys.append(chunk_ys + row)
+        xs.append(chunk_xs)
+        sizes.append(np.maximum(1, (size_factor[chunk_ys, chunk_xs] * 2).astype(np.int64)))
+    return np.concatenate(ys), np.concatenate(xs), np.concatenate(sizes)
+
+
+@lru_cache(maxsize=None)
+def sprite_offsets(size: int, sprite: str = 'square') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read-only int32 (dy, dx) offsets of the pixels a sprite of the given size covers.
     
-    if start_y >= end_y or start_x >= end_x:
-        return image
+    A 'square' sprite covers size x size pixels to the lower right of its position; a
+    'round' sprite covers the pixel centers inside a circle of diameter size centered on it.
+    """
+    if sprite not in SPRITES:
+        raise ValueError(f"Unknown sprite '{sprite}'")
+    dy, dx = np.divmod(np.arange(size * size, dtype=np.int32), np.int32(size))
+    if sprite == 'round':
+        # Pixel centers inside the circle, in doubled integer coordinates
+        inside = (2 * dy + 1 - size) ** 2 + (2 * dx + 1 - size) ** 2 < size ** 2
+        dy, dx = dy[inside] - size // 2, dx[inside] - size // 2
+    dy.setflags(write=False)
+    dx.setflags(write=False)
+    return dy, dx
+
+
+def sprite_pixels(ys: np.ndarray, xs: np.ndarray, sizes: np.ndarray, height: int, width: int,
+                  sprite: str = 'square'):
+    """
+    Expand particles into the pixels their sprites cover, clamped to a height x width area
+    (pixels falling outside are clamped onto its edge).
     
-    # Generate random grain with varying density and size
-    for y in range(start_y, end_y):
-        for x in range(start_x, end_x):
-            # Random density variation across the image
-            density_factor = 1.0 + density_variation * (random.random() - 0.5) * 2
-            
-            # Random size variation
-            size_factor = 1.0 + size_variation * (random.random() - 0.5) * 2
-            
-            # Calculate grain intensity for this pixel
-            grain_intensity = base_intensity * density_factor * size_factor
-            
-            # Generate white grain
-            if random.random() < grain_intensity:
-                # Random grain size (1x1 to 3x3 pixels)
-                grain_size = max(1, int(size_factor * 2))
-                
-                # Add white grain
-                for dy in range(grain_size):
-                    for dx in range(grain_size):
-                        gy = min(y + dy, end_y - 1)
-                        gx = min(x + dx, end_x - 1)
-                        
-                        # White grain intensity
-                        white_value = random.uniform(50, 255)
-                        white_grain[gy, gx] = [white_value, white_value, white_value]
-    
-    # Apply white grain to image
-    result = img_array.astype(np.float32) + white_grain.astype(np.float32)
-    result = np.clip(result, 0, 255)
-    
-    return Image.fromarray(result.astype(np.uint8))
+    Yields:
+        (particles, flat) per distinct size: the indices of the particles of that size and
+        a (particles, sprite pixels) array of flat pixel indices y * width + x
+    """
+    ys = np.asarray(ys, dtype=np.int32)
+    xs = np.asarray(xs, dtype=np.int32)
+    sizes = np.asarray(sizes)
+    for size in np.unique(sizes):
+        particles = np.flatnonzero(sizes == size)
+        dy, dx = sprite_offsets(int(size), sprite)
+        gy = ys[particles, None] + dy
+        np.clip(gy, 0, height - 1, out=gy)
+        gx = xs[particles, None] + dx
+        np.clip(gx, 0, width - 1, out=gx)
+        gy *= np.int32(width)
+        gy += gx
+        yield particles, gy
+
+
+def stamp_grains(ys: np.ndarray, xs: np.ndarray, sizes: np.ndarray, height: int, width: int):
+    """
+    Expand grain seeds into the pixels they cover, as sparse coordinates.
+    
+    Each seed covers a sizes x sizes square to its lower right, clamped to the area.
+    Overlapping squares write a pixel once: painted one after another, only the last
+    write would survive, and every write carries an independent value anyway.
+    
+    Returns:
+        Sorted flat indices (y * width + x) of the covered pixels
+    """
+    # Deduplicate through a one-byte coverage mask (cheaper than sorting the writes)
+    hit = np.zeros(height * width, dtype=bool)
+    for _, flat in sprite_pixels(ys, xs, sizes, height, width):
+        hit[flat] = True
+    return np.flatnonzero(hit)
+
+
+def stamp_particles(region: np.ndarray, ys: np.ndarray, xs: np.ndarray, sizes: np.ndarray,
+                    intensities: np.ndarray, sprite: str = 'square',
+                    chunk_particles: int = DEFAULT_CHUNK_PARTICLES) -> None:
+    """
+    Paint gray particles into a uint8 (height, width, channels) region in place.
+    
+    Particles are scattered a chunk at a time (one scatter per sprite size) into a
+    single-channel paint layer, later chunks painting over earlier ones, and the layer is
+    copied onto the region in one masked pass. Within a chunk, overlapping particles
+    resolve in scatter order; the intensities are independent draws, so which one wins
+    does not change the look.
+    """
+    height, width = region.shape[:2]
+    # 0 marks unpainted pixels, intensity + 1 painted ones
+    paint = np.zeros(height * width, dtype=np.uint16)
+    intensities = np.clip(intensities, 0, 255).astype(np.uint16) + 1
+    for start in range(0, len(ys), chunk_particles):
+        stop = start + chunk_particles
+        chunk_intensities = intensities[start:stop]
+        for particles, flat in sprite_pixels(ys[start:stop], xs[start:stop], sizes[start:stop],
+                                             height, width, sprite):
+            paint[flat] = chunk_intensities[particles, None]
+    paint = paint.reshape(height, width)
+    painted = paint > 0
+    paint -= 1
+    np.copyto(region, paint.astype(region.dtype)[..., None], where=painted[..., None])
+
+
+def add_white_grain(img_array: np.ndarray, base_intensity: float = 0.1,
+                    density_variation: float = 0.5, size_variation: float = 0.8,
+                    border_size: int = 0, rng: RngLike = None) -> None:
+    """
+    In-place version of apply_white_grain for a uint8 (height, width, channels) array.
+    """
+    rng = make_rng(rng)
+    region = interior(img_array, border_size)
+    if region.size == 0:
+        return
+    height, width = region.shape[:2]
+    
+    # 1x1 to 3x3 pixel grains, kept as coordinates rather than a dense grain layer
+    ys, xs, sizes = white_grain_hits(height, width, base_intensity, density_variation,
+                                     size_variation, rng)
+    pixel = stamp_grains(ys, xs, sizes, height, width)
+    
+    # White grain intensity, one value per covered pixel
+    white_values = rng.uniform(50, 255, size=len(pixel)).astype(np.float32)
+    
+    # Add the white grain to the gradient area in place
+    gy, gx = np.divmod(pixel, width)
+    result = region[gy, gx] + white_values[:, None]
+    np.clip(result, 0, 255, out=result)
+    region[gy, gx] = result
 
 
 def apply_scattered_white_grain(image: Image.Image, num_grains: int = 1000,
                                min_size: int = 1, max_size: int = 5,
-                               border_size: int = 0) -> Image.Image:
+                               border_size: int = 0, rng: RngLike = None,
+                               sprite: str = 'square') -> Image.Image:
     """
     Apply scattered white grain particles of random sizes.
     
@@ -87,49 +201,33 @@ def apply_scattered_white_grain(image: Image.Image, num_grains: int = 1000,
         min_size: Minimum grain particle size
         max_size: Maximum grain particle size
         border_size: Border size to exclude from grain
+        rng: Seed or numpy Generator for the random draws
+        sprite: Particle shape, 'square' or 'round'
     
     Returns:
         PIL Image with scattered white grain applied
     """
+    rng = make_rng(rng)
     img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Work only on the gradient area (exclude borders)
-    start_y = border_size
-    end_y = height - border_size
-    start_x = border_size
-    end_x = width - border_size
-    
-    if start_y >= end_y or start_x >= end_x:
+    region = interior(img_array, border_size)
+    if region.size == 0:
         return image
+    height, width = region.shape[:2]
     
-    # Create white grain particles
-    for _ in range(num_grains):
-        # Random position
-        x = random.randint(start_x, end_x - 1)
-        y = random.randint(start_y, end_y - 1)
-        
-        # Random size
-        size = random.randint(min_size, max_size)
-        
-        # Random intensity
-        intensity = random.uniform(100, 255)
-        
-        # Add grain particle
-        for dy in range(size):
-            for dx in range(size):
-                gy = min(y + dy, end_y - 1)
-                gx = min(x + dx, end_x - 1)
-                
-                # Add white grain
-                img_array[gy, gx] = [intensity, intensity, intensity]
+    # Random positions, sizes and intensities for all particles in one draw each
+    ys = rng.integers(0, height, size=num_grains)
+    xs = rng.integers(0, width, size=num_grains)
+    sizes = rng.integers(min_size, max_size + 1, size=num_grains)
+    intensities = rng.uniform(100, 255, size=num_grains)
     
+    stamp_particles(region, ys, xs, sizes, intensities, sprite)
     return Image.fromarray(img_array.astype(np.uint8))
 
 
 def apply_clustered_white_grain(image: Image.Image, num_clusters: int = 50,
                                cluster_size: int = 20, grain_density: float = 0.3,
-                               border_size: int = 0) -> Image.Image:
+                               border_size: int = 0, rng: RngLike = None,
+                               sprite: str = 'square', grain_size: int = 1) -> Image.Image:
     """
     Apply clustered white grain patterns.
     
@@ -139,43 +237,36 @@ def apply_clustered_white_grain(image: Image.Image, num_clusters: int = 50,
         cluster_size: Size of each cluster
         grain_density: Density of grains within clusters
         border_size: Border size to exclude from grain
+        rng: Seed or numpy Generator for the random draws
+        sprite: Particle shape, 'square' or 'round'
+        grain_size: Particle size in pixels
     
     Returns:
         PIL Image with clustered white grain applied
     """
+    rng = make_rng(rng)
     img_array = np.array(image)
-    height, width, channels = img_array.shape
-    
-    # Work only on the gradient area (exclude borders)
-    start_y = border_size
-    end_y = height - border_size
-    start_x = border_size
-    end_x = width - border_size
-    
-    if start_y >= end_y or start_x >= end_x:
+    region = interior(img_array, border_size)
+    if region.size == 0:
         return image
+    height, width = region.shape[:2]
+    
+    # Random cluster centers, then every grain's offset from its center in one draw
+    grains_per_cluster = int(cluster_size * grain_density)
+    center_y = rng.integers(0, height, size=(num_clusters, 1))
+    center_x = rng.integers(0, width, size=(num_clusters, 1))
+    offsets = rng.integers(-cluster_size // 2, cluster_size // 2 + 1,
+                           size=(2, num_clusters, grains_per_cluster))
+    ys = (center_y + offsets[0]).ravel()
+    xs = (center_x + offsets[1]).ravel()
     
-    # Create grain clusters
-    for _ in range(num_clusters):
-        # Random cluster center
-        center_x = random.randint(start_x, end_x - 1)
-        center_y = random.randint(start_y, end_y - 1)
-        
-        # Add grains around cluster center
-        for _ in range(int(cluster_size * grain_density)):
-            # Random offset from center
-            offset_x = random.randint(-cluster_size//2, cluster_size//2)
-            offset_y = random.randint(-cluster_size//2, cluster_size//2)
-            
-            gx = center_x + offset_x
-            gy = center_y + offset_y
-            
-            # Check bounds
-            if start_x <= gx < end_x and start_y <= gy < end_y:
-                # Random white intensity
-                intensity = random.uniform(80, 255)
-                img_array[gy, gx] = [intensity, intensity, intensity]
+    # Grains landing outside the gradient area are dropped
+    inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+    ys, xs = ys[inside], xs[inside]
+    intensities = rng.uniform(80, 255, size=len(ys))
+    sizes = np.full(len(ys), grain_size)
     
+    stamp_particles(region, ys, xs, sizes, intensities, sprite)
     return Image.fromarray(img_array.astype(np.uint8))
 
 
@@ -196,6 +287,8 @@ def main():
                        help='Size variation (0.0-1.0)')
     parser.add_argument('--border-size', type=int, default=0, 
                        help='Border size to exclude from grain')
+    parser.add_argument('--seed', type=int, 
+                       help='Seed for reproducible output')
     parser.add_argument('--num-grains', type=int, default=1000, 
                        help='Number of grains for scattered type')
     parser.add_argument('--min-size', type=int, default=1, 
@@ -208,6 +301,10 @@ def main():
                        help='Size of each cluster')
     parser.add_argument('--grain-density', type=float, default=0.3, 
                        help='Density of grains within clusters')
+    parser.add_argument('--sprite', choices=SPRITES, default='square', 
+                       help='Particle shape for scattered and clustered types')
+    parser.add_argument('--grain-size', type=int, default=1, 
+                       help='Particle size for clustered type')
     
     args = parser.parse_args()
     
@@ -217,13 +314,15 @@ def main():
     # Apply grain based on type
     if args.grain_type == 'random':
         result = apply_white_grain(image, args.base_intensity, args.density_variation, 
-                                 args.size_variation, args.border_size)
+                                 args.size_variation, args.border_size, rng=args.seed)
     elif args.grain_type == 'scattered':
         result = apply_scattered_white_grain(image, args.num_grains, args.min_size, 
-                                           args.max_size, args.border_size)
+                                           args.max_size, args.border_size, rng=args.seed,
+                                           sprite=args.sprite)
     elif args.grain_type == 'clustered':
         result = apply_clustered_white_grain(image, args.num_clusters, args.cluster_size, 
-                                           args.grain_density, args.border_size)
+                                           args.grain_density, args.border_size, rng=args.seed,
+                                           sprite=args.sprite, grain_size=args.grain_size)
     
     # Save result
     result.save(args.output)
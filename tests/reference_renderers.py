@@ -0,0 +1,446 @@
+"""
+Reference Renderers - Pre-vectorization Implementations
+
+Verbatim copies of the per-pixel generator, the per-column legacy wave gradient
+and the 4x4 Bayer dithering as they were before the NumPy engines replaced them.
+The regression tests check the current code against these.
+"""
+
+import math
+import random
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+
+
+def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Convert hex color string to RGB tuple."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def wave_variation(width: int, height: int, colors: List[str], steps: int,
+                          wave_type: str, border: int = 0, border_color: str = None, 
+                          wave_amplitude: float = 0.2, amplitude_scale: float = 1.0,
+                          center_shift: float = 0.0, asymmetry: float = 0.0,
+                          organic_jitter: float = 0.0, random_seed: int = None) -> Image.Image:
+    """Per-pixel generate_wave_variation from before vectorization."""
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+    
+    # Helper to average a slice of the provided palette evenly per step
+    def average_palette_slice(start_idx: int, end_idx: int) -> Tuple[int, int, int]:
+        end_idx = max(start_idx + 1, end_idx)
+        slice_colors = colors[start_idx:end_idx]
+        if not slice_colors:
+            return hex_to_rgb(colors[0])  # Fallback to first color
+        rs = 0
+        gs = 0
+        bs = 0
+        for color in slice_colors:
+            r, g, b = hex_to_rgb(color)
+            rs += r
+            gs += g
+            bs += b
+        return (rs // len(slice_colors), gs // len(slice_colors), bs // len(slice_colors))
+    
+    # Calculate colors per step
+    colors_per_step = len(colors) / steps
+    
+    # Create gradient array
+    gradient = np.zeros((grad_height, grad_width, 3), dtype=np.uint8)
+
+    # Prepare organic jitter (smooth noise across x) if requested
+    smooth_noise = None
+    if organic_jitter and organic_jitter != 0.0 and grad_width > 1:
+        if random_seed is not None:
+            np.random.seed(int(random_seed))
+            random.seed(int(random_seed))
+        x_coords = np.arange(grad_width)
+        # Choose knot spacing ~80px, at least 2 knots
+        n_knots = max(2, grad_width // 80)
+        knot_positions = np.linspace(0, grad_width - 1, n_knots)
+        knot_values = np.random.uniform(-1.0, 1.0, size=n_knots)
+        # Interpolate to full width
+        smooth_noise = np.interp(x_coords, knot_positions, knot_values)
+        # Light smoothing
+        kernel = np.array([0.25, 0.5, 0.25])
+        smooth_noise = np.convolve(smooth_noise, kernel, mode='same')
+    
+    # Fill the gradient based on wave type
+    for x in range(grad_width):
+        for y in range(grad_height):
+            # Normalize x position (0 to 1) for horizontal progression
+            normalized_x = x / grad_width
+            # Apply center shift (positive shifts center to the right)
+            shifted_x = min(1.0, max(0.0, normalized_x - center_shift))
+            
+            # Determine wave parameters based on type
+            current_amp = 0.0
+            if wave_type == '0.0':  # Straight gradient (no waves)
+                current_amp = 0.0
+                wave_frequency = 1.0
+            elif wave_type == '4A':  # Prime wave (bell curve intensity)
+                # Calculate distance from center (0 at center, 1 at edges)
+                center_distance = abs(shifted_x - 0.5) * 2
+                # Create bell curve intensity (1 at center, 0 at edges)
+                wave_intensity = (1 - center_distance) ** 2
+                # Apply asymmetry exponent: >0 emphasizes left, <0 emphasizes right
+                if asymmetry != 0.0:
+                    if shifted_x < 0.5:
+                        p = 1.0 + abs(asymmetry)
+                        wave_intensity = wave_intensity ** p
+                    else:
+                        p = 1.0 + abs(asymmetry) if asymmetry < 0 else 1.0
+                        wave_intensity = wave_intensity ** p
+                current_amp = wave_amplitude * wave_intensity  # Prime wave amplitude
+                wave_frequency = 1.0  # Single wave cycle
+            elif wave_type == '4B':  # Inverted prime wave (valley curve intensity)
+                # Calculate distance from center (0 at center, 1 at edges)
+                center_distance = abs(shifted_x - 0.5) * 2
+                # Create inverted bell curve intensity (0 at center, 1 at edges)
+                wave_intensity = center_distance ** 2
+                if asymmetry != 0.0:
+                    if shifted_x < 0.5:
+                        p = 1.0 + abs(asymmetry)
+                        wave_intensity = wave_intensity ** p
+                    else:
+                        p = 1.0 + abs(asymmetry) if asymmetry < 0 else 1.0
+                        wave_intensity = wave_intensity ** p
+                current_amp = wave_amplitude * wave_intensity  # Inverted prime wave amplitude
+                wave_frequency = 1.0  # Single wave cycle
+            elif wave_type in ['1A', '1C']:  # Wave on left, straight on right
+                if normalized_x < 0.3:  # Left 30%: wave
+                    progress = normalized_x / 0.3
+                    current_amp = (0.25 * amplitude_scale) * (1 - progress)
+                else:  # Right 70%: flat
+                    current_amp = 0.0
+                wave_frequency = 1.5
+                
+            elif wave_type in ['1B', '1D']:  # Straight on left, wave on right
+                if normalized_x > 0.7:  # Right 30%: wave
+                    progress = (normalized_x - 0.7) / 0.3
+                    current_amp = (0.25 * amplitude_scale) * progress
+                else:  # Left 70%: flat
+                    current_amp = 0.0
+                wave_frequency = 1.5
+                
+            elif wave_type in ['2A', '2C']:  # 50/50 transition
+                if normalized_x < 0.5:  # Left 50%: flat
+                    current_amp = 0.0
+                else:  # Right 50%: wave
+                    progress = (normalized_x - 0.5) / 0.5
+                    current_amp = (0.2 * amplitude_scale) * progress
+                wave_frequency = 1.0
+                
+            elif wave_type in ['2B', '2D']:  # 50/50 transition flipped
+                if normalized_x > 0.5:  # Right 50%: flat
+                    current_amp = 0.0
+                else:  # Left 50%: wave
+                    progress = normalized_x / 0.5
+                    current_amp = (0.2 * amplitude_scale) * (1 - progress)
+                wave_frequency = 1.0
+
+            elif wave_type == '2E':  # Single 2B-style wave shifted to center (0.25-0.75)
+                if normalized_x < 0.25 or normalized_x > 0.75:
+                    current_amp = 0.0  # Flat edges
+                else:
+                    # Map [0.25, 0.75] -> progress [0, 1]
+                    progress = (normalized_x - 0.25) / 0.5
+                    # Same shape as 2B: max at left of region, decays to 0 at right of region
+                    current_amp = (0.2 * amplitude_scale) * (1 - progress)
+                wave_frequency = 1.0
+                
+            else:  # Combined waves (3A-3B)
+                if normalized_x < 0.5:  # Left half
+                    if wave_type == '3A':  # Left half uses 1A (30% wave, 70% straight)
+                        if normalized_x < 0.3:  # Left 30%: wave
+                            progress = normalized_x / 0.3
+                            current_amp = (0.25 * amplitude_scale) * (1 - progress)
+                        else:  # Right 70%: flat
+                            current_amp = 0.0
+                        wave_frequency = 1.5
+                    elif wave_type == '3B':  # Left half uses 1C (30% wave, 70% straight)
+                        if normalized_x < 0.3:  # Left 30%: wave
+                            progress = normalized_x / 0.3
+                            current_amp = (0.25 * amplitude_scale) * (1 - progress)
+                        else:  # Right 70%: flat
+                            current_amp = 0.0
+                        wave_frequency = 1.5
+                    elif wave_type == '3C':  # Left half uses 1C (30% wave, 70% straight)
+                        if normalized_x < 0.3:  # Left 30%: wave
+                            progress = normalized_x / 0.3
+                            current_amp = (0.25 * amplitude_scale) * (1 - progress)
+                        else:  # Right 70%: flat
+                            current_amp = 0.0
+                        wave_frequency = 1.5
+                    elif wave_type == '3D':  # Left half uses 1D (70% straight, 30% wave)
+                        if normalized_x > 0.7:  # Right 30%: wave
+                            progress = (normalized_x - 0.7) / 0.3
+                            current_amp = (0.25 * amplitude_scale) * progress
+                        else:  # Left 70%: flat
+                            current_amp = 0.0
+                        wave_frequency = 1.5
+                else:  # Right half
+                    if wave_type == '3A':  # Right half uses 2A (50% straight, 50% wave)
+                        if normalized_x < 0.5:  # Left 50%: flat
+                            current_amp = 0.0
+                        else:  # Right 50%: wave
+                            progress = (normalized_x - 0.5) / 0.5
+                            current_amp = (0.2 * amplitude_scale) * progress
+                        wave_frequency = 1.0
+                    elif wave_type == '3B':  # Right half uses 2C (50% straight, 50% wave)
+                        if normalized_x < 0.5:  # Left 50%: flat
+                            current_amp = 0.0
+                        else:  # Right 50%: wave
+                            progress = (normalized_x - 0.5) / 0.5
+                            current_amp = (0.2 * amplitude_scale) * progress
+                        wave_frequency = 1.0
+                    elif wave_type == '3C':  # Right half uses 2C (50% straight, 50% wave)
+                        if normalized_x < 0.5:  # Left 50%: flat
+                            current_amp = 0.0
+                        else:  # Right 50%: wave
+                            progress = (normalized_x - 0.5) / 0.5
+                            current_amp = (0.2 * amplitude_scale) * progress
+                        wave_frequency = 1.0
+                    elif wave_type == '3D':  # Right half uses 2D (50% wave, 50% straight)
+                        if normalized_x > 0.5:  # Right 50%: flat
+                            current_amp = 0.0
+                        else:  # Left 50%: wave
+                            progress = normalized_x / 0.5
+                            current_amp = (0.2 * amplitude_scale) * (1 - progress)
+                        wave_frequency = 1.0
+            
+            # Calculate wave offset
+            wave_offset = int(current_amp * grad_height * math.sin(2 * math.pi * wave_frequency * normalized_x))
+            # Add organic jitter component if enabled
+            if smooth_noise is not None:
+                wave_offset += int(organic_jitter * grad_height * smooth_noise[x])
+            
+            # Apply vertical flip if needed
+            if wave_type in ['1C', '1D', '2C', '2D', '3B', '3D']:
+                adjusted_y = y - wave_offset  # Flip vertically
+            else:
+                adjusted_y = y + wave_offset
+            
+            # Determine which step this pixel should belong to
+            step_y = adjusted_y / grad_height
+            step = int(step_y * steps)
+            step = max(0, min(steps - 1, step))
+            
+            # Get the color for this step
+            start_color_idx = int(step * colors_per_step)
+            end_color_idx = int((step + 1) * colors_per_step)
+            avg_color = average_palette_slice(start_color_idx, end_color_idx)
+            
+            gradient[y, x] = avg_color
+    
+    # Fill any remaining black areas with the top band color (first color)
+    top_color = hex_to_rgb(colors[0])
+    for x in range(grad_width):
+        for y in range(grad_height):
+            if np.all(gradient[y, x] == 0):  # If pixel is black (unfilled)
+                gradient[y, x] = top_color
+    
+    # Create final image with border
+    if border > 0 and border_color:
+        final_image = Image.new('RGB', (width, height), hex_to_rgb(border_color))
+        grad_img = Image.fromarray(gradient)
+        final_image.paste(grad_img, (border, border))
+        return final_image
+    else:
+        return Image.fromarray(gradient)
+
+
+def wave_gradient(width: int, height: int, colors: List[str], steps: int,
+                          wave_amplitude: float = 0.1, wave_frequency: float = 2.0, 
+                          orientation: str = 'horizontal', border: int = 0, border_color: str = None) -> Image.Image:
+    """Per-column gradient_generator.generate_wave_gradient from before vectorization."""
+    grad_width = width - 2 * border
+    grad_height = height - 2 * border
+    
+    if grad_width <= 0 or grad_height <= 0:
+        raise ValueError("Border too large for image dimensions")
+    
+    # Helper to average a slice of the provided palette evenly per step
+    def average_palette_slice(start_idx: int, end_idx: int) -> Tuple[int, int, int]:
+        end_idx = max(start_idx + 1, end_idx)
+        slice_colors = colors[start_idx:end_idx]
+        rs = 0
+        gs = 0
+        bs = 0
+        for color in slice_colors:
+            r, g, b = hex_to_rgb(color)
+            rs += r
+            gs += g
+            bs += b
+        count = len(slice_colors)
+        return (rs // count, gs // count, bs // count)
+    
+    # Calculate how many colors to average per step for even distribution
+    colors_per_step = len(colors) / steps
+    
+    if orientation == 'horizontal':
+        gradient = np.zeros((grad_height, grad_width, 3), dtype=np.uint8)
+        
+        # Create wave function for each column
+        x_coords = np.arange(grad_width)
+        x_norm = x_coords / grad_width
+        
+        # Create gradual wave intensity - fade in from edges
+        # Use a bell curve or similar function to make wave stronger in center
+        center_distance = np.abs(x_norm - 0.5) * 2  # 0 at center, 1 at edges
+        wave_intensity = 1 - center_distance  # 1 at center, 0 at edges
+        wave_intensity = wave_intensity ** 2  # Make the fade more gradual
+        
+        wave_shift = wave_amplitude * np.sin(2 * np.pi * wave_frequency * x_norm) * wave_intensity
+        
+        for step in range(steps):
+            # Calculate which slice of the palette to use for this step
+            start_color_idx = int(step * colors_per_step)
+            end_color_idx = int((step + 1) * colors_per_step)
+            avg_color = average_palette_slice(start_color_idx, end_color_idx)
+            
+            # Calculate the base y position for this step
+            base_y_start = int((step / steps) * grad_height)
+            base_y_end = int(((step + 1) / steps) * grad_height)
+            
+            # Apply wave displacement to each column
+            for x in range(grad_width):
+                # Calculate the wave offset for this column
+                wave_offset = int(wave_shift[x] * grad_height)
+                
+                # Calculate the actual y positions for this column
+                y_start = base_y_start + wave_offset
+                y_end = base_y_end + wave_offset
+                
+                # Clamp to valid range
+                y_start = max(0, min(grad_height - 1, y_start))
+                y_end = max(0, min(grad_height, y_end))
+                
+                # Fill the band for this column
+                if y_end > y_start:
+                    gradient[y_start:y_end, x] = avg_color
+        
+        # Fill any remaining black areas with first and last colors
+        first_color = hex_to_rgb(colors[0])  # First color from palette
+        last_color = hex_to_rgb(colors[-1])  # Last color from palette
+        
+        for x in range(grad_width):
+            for y in range(grad_height):
+                if np.all(gradient[y, x] == 0):  # If pixel is black (unfilled)
+                    # Fill top half with first color, bottom half with last color
+                    if y < grad_height // 2:
+                        gradient[y, x] = first_color
+                    else:
+                        gradient[y, x] = last_color
+        
+        # Ensure the very top and bottom rows are completely filled with correct colors
+        first_color = hex_to_rgb(colors[0])  # First color from palette
+        last_color = hex_to_rgb(colors[-1])  # Last color from palette
+        
+        for x in range(grad_width):
+            # Fill top row with first color from palette
+            gradient[0, x] = first_color
+            # Fill bottom row with last color from palette
+            gradient[grad_height-1, x] = last_color
+        
+        # Fill any remaining gaps with first and last colors
+        for x in range(grad_width):
+            for y in range(grad_height):
+                if np.all(gradient[y, x] == 0):  # If pixel is still black (unfilled)
+                    # Fill top half with first color, bottom half with last color
+                    if y < grad_height // 2:
+                        gradient[y, x] = first_color
+                    else:
+                        gradient[y, x] = last_color
+                    
+    else:  # vertical - similar but with x displacement
+        gradient = np.zeros((grad_height, grad_width, 3), dtype=np.uint8)
+        
+        # Create wave function for each row
+        y_coords = np.arange(grad_height)
+        y_norm = y_coords / grad_height
+        
+        # Create gradual wave intensity - fade in from edges
+        center_distance = np.abs(y_norm - 0.5) * 2  # 0 at center, 1 at edges
+        wave_intensity = 1 - center_distance  # 1 at center, 0 at edges
+        wave_intensity = wave_intensity ** 2  # Make the fade more gradual
+        
+        wave_shift = wave_amplitude * np.sin(2 * np.pi * wave_frequency * y_norm) * wave_intensity
+        
+        for step in range(steps):
+            # Calculate which slice of the palette to use for this step
+            start_color_idx = int(step * colors_per_step)
+            end_color_idx = int((step + 1) * colors_per_step)
+            avg_color = average_palette_slice(start_color_idx, end_color_idx)
+            
+            # Calculate the base x position for this step
+            base_x_start = int((step / steps) * grad_width)
+            base_x_end = int(((step + 1) / steps) * grad_width)
+            
+            # Apply wave displacement to each row
+            for y in range(grad_height):
+                # Calculate the wave offset for this row
+                wave_offset = int(wave_shift[y] * grad_width)
+                
+                # Calculate the actual x positions for this row
+                x_start = base_x_start + wave_offset
+                x_end = base_x_end + wave_offset
+                
+                # Clamp to valid range
+                x_start = max(0, min(grad_width - 1, x_start))
+                x_end = max(0, min(grad_width, x_end))
+                
+                # Fill the band for this row
+                if x_end > x_start:
+                    gradient[y, x_start:x_end] = avg_color
+    
+    # Create final image with border
+    border_rgb = hex_to_rgb(border_color) if border_color else hex_to_rgb(colors[0])
+    img = Image.new('RGB', (width, height), border_rgb)
+    img.paste(Image.fromarray(gradient), (border, border))
+    
+    return img
+
+
+def bayer_dithering(image: Image.Image, levels: int = 8) -> Image.Image:
+    """
+    Apply Bayer matrix dithering for retro/digital look.
+    
+    Args:
+        image: PIL Image to process
+        levels: Number of color levels (2-256)
+    
+    Returns:
+        PIL Image with Bayer dithering applied
+    """
+    img_array = np.array(image)
+    height, width, channels = img_array.shape
+    
+    # Create Bayer matrix (4x4)
+    bayer_matrix = np.array([
+        [0, 8, 2, 10],
+        [12, 4, 14, 6],
+        [3, 11, 1, 9],
+        [15, 7, 13, 5]
+    ]) / 16.0
+    
+    # Tile the Bayer matrix across the image
+    bayer_tiled = np.tile(bayer_matrix, (height // 4 + 1, width // 4 + 1))
+    bayer_tiled = bayer_tiled[:height, :width]
+    
+    # Apply dithering
+    result = img_array.astype(np.float32)
+    for c in range(channels):
+        channel = result[:, :, c]
+        # Add Bayer matrix
+        dithered = channel + (bayer_tiled - 0.5) * (255 / levels)
+        # Quantize to levels
+        dithered = np.round(dithered / (255 / levels)) * (255 / levels)
+        result[:, :, c] = dithered
+    
+    return Image.fromarray(np.clip(result, 0, 255).astype(np.uint8))
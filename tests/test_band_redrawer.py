@@ -0,0 +1,52 @@
+import numpy as np
+from PIL import Image
+
+from band_redrawer import detect_band_map
+from comprehensive_wave_generator import generate_wave_variation
+
+COLORS = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B', '#2A9D8F', '#E9C46A', '#264653']
+
+
+def column_image(values):
+    """Three-column grey image whose rows take the given values."""
+    column = np.array(values, dtype=np.uint8)[:, None, None]
+    return Image.fromarray(np.repeat(np.repeat(column, 3, axis=1), 3, axis=2))
+
+
+def distinct_colors(count, seed=1):
+    rng = np.random.default_rng(seed)
+    return ['#%02X%02X%02X' % tuple(rng.integers(20, 256, 3)) for _ in range(count)]
+
+
+def test_blended_pixel_joins_band_above():
+    labels = detect_band_map(column_image([0] * 4 + [100] + [200] * 4), blended_edges=True)
+    assert labels[:, 0].tolist() == [0, 0, 0, 0, 0, 1, 1, 1, 1]
+
+
+def test_one_row_step_is_a_band_by_default():
+    labels = detect_band_map(column_image([0] * 4 + [100] + [200] * 4))
+    assert labels[:, 0].tolist() == [0, 0, 0, 0, 1, 2, 2, 2, 2]
+
+
+def test_one_row_bands_are_kept():
+    colors = distinct_colors(60)
+    image = generate_wave_variation(200, 60, colors, 60, '1A', 0, None)
+    assert detect_band_map(image).max() + 1 == 60
+
+
+def test_partial_end_bands_are_kept():
+    colors = distinct_colors(50)
+    image = generate_wave_variation(200, 100, colors, 50, '1A', 0, None)
+    assert detect_band_map(image).max() + 1 == 50
+
+
+def test_antialiased_render_matches_hard_band_map():
+    for wave_type in ('1A', '2B', '4A'):
+        image, bands = generate_wave_variation(1200, 900, COLORS, 7, wave_type, 0, None,
+                                               wave_amplitude=0.5, anti_alias=True,
+                                               return_bands=True)
+        labels = detect_band_map(image, blended_edges=True)
+        expected = bands['labels'].astype(np.int32)
+        assert labels.max() + 1 == 7
+        # Straddling pixels colored almost entirely by the band below cannot be told apart
+        assert (labels == expected - expected.min()).mean() > 0.998
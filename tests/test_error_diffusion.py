@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from comprehensive_wave_generator import band_color_table, generate_wave_variation
+from grain_processor import DIFFUSION_KERNELS, apply_dithering_grain, error_diffusion_dither, njit
+
+COLORS = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B', '#F6E27F']
+
+
+def palette(steps=20):
+    return [tuple(int(c) for c in row) for row in band_color_table(COLORS, steps)]
+
+
+@pytest.mark.skipif(njit is None, reason='numba not installed')
+@pytest.mark.parametrize('method', list(DIFFUSION_KERNELS))
+def test_backends_are_pixel_identical(method):
+    noise = np.random.default_rng(0).integers(0, 256, (61, 83, 3), dtype=np.uint8)
+    render = np.array(apply_dithering_grain(generate_wave_variation(160, 240, COLORS, 20, '2A'),
+                                            0.08, rng=0))
+    for img_array in (noise, render):
+        compiled = error_diffusion_dither(img_array, palette(), method, backend='numba')
+        wavefront = error_diffusion_dither(img_array, palette(), method, backend='numpy')
+        assert np.array_equal(compiled, wavefront)
+
+
+def test_flat_palette_color_is_kept():
+    colors = palette()
+    img_array = np.empty((16, 24, 3), dtype=np.uint8)
+    img_array[...] = colors[3]
+    indices = error_diffusion_dither(img_array, colors, backend='numpy')
+    assert (np.asarray(colors)[indices] == colors[3]).all()
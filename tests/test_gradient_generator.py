@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import reference_renderers
+from gradient_generator import generate_wave_gradient
+
+COLORS = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B', '#F6E27F']
+
+
+@pytest.mark.parametrize('orientation', ['horizontal', 'vertical'])
+@pytest.mark.parametrize('steps', [4, 11])
+def test_wave_gradient_matches_reference(orientation, steps):
+    args = (150, 110, COLORS, steps, 0.2, 2.0, orientation, 5, '#FFFFFF')
+    expected = np.array(reference_renderers.wave_gradient(*args))
+    assert np.array_equal(np.array(generate_wave_gradient(*args)), expected)
+
+
+def test_wave_gradient_without_border_color_matches_reference():
+    args = (90, 140, COLORS, 6, 0.35, 1.0, 'horizontal', 8, None)
+    expected = np.array(reference_renderers.wave_gradient(*args))
+    assert np.array_equal(np.array(generate_wave_gradient(*args)), expected)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import reference_renderers
+from comprehensive_wave_generator import band_color_table, generate_wave_variation
+from grain_processor import apply_bayer_dithering
+from ordered_dither import apply_ordered_dithering, bayer_matrix, blue_noise_matrix
+
+COLORS = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B']
+BASELINE_BAYER4 = np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]) / 16.0
+
+
+def test_bayer4_is_the_baseline_matrix():
+    assert np.array_equal(bayer_matrix(4), BASELINE_BAYER4.astype(np.float32))
+
+
+@pytest.mark.parametrize('size', [2, 4, 8, 16])
+def test_bayer_matrices_hold_every_threshold_once(size):
+    matrix = bayer_matrix(size)
+    assert np.array_equal(np.sort((matrix * size * size).ravel()), np.arange(size * size))
+    if size > 2:
+        # Every Bayer matrix grows from the one half its size
+        assert np.array_equal(matrix[:size // 2, :size // 2], bayer_matrix(size // 2))
+
+
+def test_blue_noise_holds_every_threshold_once():
+    matrix = blue_noise_matrix(16)
+    assert np.array_equal(np.sort((matrix * 256).ravel()), np.arange(256))
+
+
+@pytest.mark.parametrize('levels', [2, 4, 8, 16, 255])
+def test_bayer4_dithering_matches_reference(levels):
+    noise = Image.fromarray(np.random.default_rng(0).integers(0, 256, (97, 131, 3), dtype=np.uint8))
+    wave = generate_wave_variation(131, 97, COLORS, 9, '2A')
+    for image in (noise, wave):
+        expected = np.array(reference_renderers.bayer_dithering(image, levels))
+        assert np.array_equal(np.array(apply_bayer_dithering(image, levels)), expected)
+
+
+def test_palette_dithering_uses_only_palette_colors():
+    palette = [tuple(int(c) for c in row) for row in band_color_table(COLORS, 4)]
+    image = Image.fromarray(np.random.default_rng(1).integers(0, 256, (40, 50, 3), dtype=np.uint8))
+    result = np.array(apply_ordered_dithering(image, matrix='bayer8', palette=palette).convert('RGB'))
+    assert set(map(tuple, result.reshape(-1, 3))) <= set(palette)
@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from render_cache import (CACHE_FORMAT_VERSION, PARAMS_TEXT_KEY, RenderCache, read_embedded_params,
+                          render_key, save_with_params)
+
+PARAMS = {'width': 40, 'height': 30, 'colors': ['#1B1F3B', '#F28F3B'], 'steps': 4,
+          'wave_type': '2A', 'grain_effect': 'none', 'grain_params': {}}
+
+
+def image(value=90):
+    return Image.fromarray(np.full((30, 40, 3), value, dtype=np.uint8))
+
+
+def save_with_text(path, text):
+    info = PngInfo()
+    info.add_text(PARAMS_TEXT_KEY, text)
+    image().save(path, pnginfo=info)
+
+
+def test_key_ignores_hex_case():
+    assert render_key(PARAMS) == render_key(dict(PARAMS, colors=['#1b1f3b', '#f28f3b']))
+    assert render_key(PARAMS) != render_key(dict(PARAMS, steps=5))
+
+
+def test_round_trip(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    assert cache.get(PARAMS) is None
+    path = cache.put(PARAMS, image())
+    assert cache.get(PARAMS) == path
+    with Image.open(path) as cached:
+        assert np.array_equal(np.array(cached), np.array(image()))
+    assert read_embedded_params(path) == dict(PARAMS, colors=['#1b1f3b', '#f28f3b'])
+
+
+def test_rebuild_imports_current_outputs(tmp_path):
+    outputs = tmp_path / 'outputs'
+    outputs.mkdir()
+    save_with_params(image(), str(outputs / 'render.png'), PARAMS)
+    cache = RenderCache(str(tmp_path / 'cache'))
+    assert cache.rebuild([str(outputs)]) == 1
+    assert cache.get(PARAMS) is not None
+    assert cache.rebuild([str(outputs)]) == 0
+
+
+def test_rebuild_skips_stale_and_malformed_params(tmp_path):
+    outputs = tmp_path / 'outputs'
+    outputs.mkdir()
+    stale = dict(PARAMS, cache_version=CACHE_FORMAT_VERSION - 1)
+    save_with_text(str(outputs / 'stale.png'), json.dumps(stale))
+    save_with_text(str(outputs / 'malformed.png'), '{not json')
+    save_with_text(str(outputs / 'list.png'), json.dumps([1, 2]))
+    image().save(str(outputs / 'plain.png'))
+    cache = RenderCache(str(tmp_path / 'cache'))
+    assert cache.rebuild([str(outputs)]) == 0
+    assert cache.get(PARAMS) is None
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    first = cache.put(PARAMS, image(10))
+    second_params = dict(PARAMS, steps=5)
+    second = cache.put(second_params, image(20))
+    os.utime(first, (1, 1))
+    cache.max_bytes = os.path.getsize(second)
+    cache.evict()
+    assert cache.get(PARAMS) is None
+    assert cache.get(second_params) == second
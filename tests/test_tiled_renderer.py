@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from comprehensive_wave_generator import generate_wave_variation
+from stream_renderer import render_streaming
+from tiled_renderer import GRAIN_SETTINGS, render_tiled
+
+COLORS = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B', '#F6E27F']
+SIZE = (230, 300)
+
+
+@pytest.mark.parametrize('border_color', ['#FFFFFF', None])
+def test_bands_match_serial_render(tmp_path, border_color):
+    expected = np.array(generate_wave_variation(*SIZE, COLORS, 8, '2B', 12, border_color))
+    tiled = render_tiled(*SIZE, COLORS, 8, '2B', 12, border_color, workers=1, tile_size=64)
+    assert np.array_equal(np.array(tiled), expected)
+    path = str(tmp_path / 'streamed.png')
+    render_streaming(path, *SIZE, COLORS, 8, '2B', 12, border_color, strip_height=64)
+    with Image.open(path) as streamed:
+        assert np.array_equal(np.array(streamed.convert('RGB')), expected)
+
+
+@pytest.mark.parametrize('grain_effect', list(GRAIN_SETTINGS))
+@pytest.mark.parametrize('suffix', ['.png', '.tif'])
+def test_streamed_output_matches_tiled(tmp_path, grain_effect, suffix):
+    kwargs = dict(grain_effect=grain_effect, grain_params=GRAIN_SETTINGS[grain_effect], grain_seed=11)
+    tiled = render_tiled(*SIZE, COLORS, 8, '4A', 12, '#FFFFFF', workers=1, tile_size=64, **kwargs)
+    path = str(tmp_path / f'streamed{suffix}')
+    render_streaming(path, *SIZE, COLORS, 8, '4A', 12, '#FFFFFF', strip_height=64, **kwargs)
+    with Image.open(path) as streamed:
+        assert np.array_equal(np.array(streamed.convert('RGB')), np.array(tiled))
+
+
+def test_grain_does_not_depend_on_worker_count():
+    kwargs = dict(grain_effect='dithering', grain_params=GRAIN_SETTINGS['dithering'], grain_seed=5,
+                  tile_size=64)
+    serial = render_tiled(*SIZE, COLORS, 8, '1A', 12, '#FFFFFF', workers=1, **kwargs)
+    pooled = render_tiled(*SIZE, COLORS, 8, '1A', 12, '#FFFFFF', workers=2, **kwargs)
+    assert np.array_equal(np.array(serial), np.array(pooled))
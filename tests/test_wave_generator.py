@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import reference_renderers
+from comprehensive_wave_generator import generate_band_map, generate_wave_variation
+from wave_registry import is_flipped
+
+COLORS = ['#1B1F3B', '#5B3A73', '#B5446E', '#F28F3B', '#F6E27F', '#2A9D8F', '#264653']
+WAVE_TYPES = ['0.0', '1A', '1B', '1C', '1D', '2A', '2B', '2C', '2D', '2E',
+              '3A', '3B', '3C', '3D', '4A', '4B']
+
+
+def assert_matches_reference(*args, **kwargs):
+    expected = np.array(reference_renderers.wave_variation(*args, **kwargs))
+    assert np.array_equal(np.array(generate_wave_variation(*args, **kwargs)), expected)
+
+
+@pytest.mark.parametrize('wave_type', WAVE_TYPES)
+def test_matches_reference(wave_type):
+    assert_matches_reference(97, 73, COLORS, 9, wave_type, 6, '#FFFFFF',
+                             wave_amplitude=0.3, amplitude_scale=1.3)
+
+
+@pytest.mark.parametrize('wave_type', ['4A', '4B'])
+@pytest.mark.parametrize('asymmetry', [0.6, -0.6])
+def test_prime_waves_with_shift_asymmetry_and_jitter_match_reference(wave_type, asymmetry):
+    assert_matches_reference(131, 88, COLORS, 12, wave_type, wave_amplitude=0.25,
+                             center_shift=0.1, asymmetry=asymmetry, organic_jitter=0.04,
+                             random_seed=7)
+
+
+def test_border_without_color_gives_interior_only():
+    assert_matches_reference(90, 70, COLORS, 5, '2B', 10, None)
+    assert generate_wave_variation(90, 70, COLORS, 5, '2B', 10, None).size == (70, 50)
+
+
+def test_more_steps_than_colors_matches_reference():
+    assert_matches_reference(64, 120, COLORS[:3], 20, '3B', amplitude_scale=2.0)
+
+
+@pytest.mark.parametrize('wave_type', ['1C', '2D', '3D'])
+def test_flipped_types_match_reference(wave_type):
+    # Flipped types mirror the band shift; 3D has no wave at all but is flagged as flipped
+    assert is_flipped(wave_type)
+    assert_matches_reference(120, 90, COLORS, 7, wave_type, amplitude_scale=2.5)
+
+
+def test_palette_mode_has_the_same_pixels():
+    args = (97, 73, COLORS, 9, '2A', 6, '#FFFFFF')
+    image = generate_wave_variation(*args, palette_mode=True)
+    assert image.mode == 'P'
+    assert np.array_equal(np.array(image.convert('RGB')), np.array(generate_wave_variation(*args)))
+
+
+def test_band_map_indexes_the_rendered_colors():
+    args = (97, 73, COLORS, 9, '1B', 6, '#FFFFFF')
+    index_map, color_table = generate_band_map(*args)
+    assert np.array_equal(color_table[index_map], np.array(generate_wave_variation(*args)))
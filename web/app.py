@@ -5,20 +5,28 @@ NFT-ready generative wave art interface
 """
 
 import os
+import io
 import sys
 import json
+import base64
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, render_template, request, jsonify, send_file
 from PIL import Image
 import uuid
+import time
 from datetime import datetime
 
-# Add parent directory to path to import wave generators
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add src directory to path to import wave generators
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from src.comprehensive_wave_generator import generate_wave_variation
-from src.grain_processor import apply_dithering_grain
-from src.white_grain import apply_white_grain
+from comprehensive_wave_generator import generate_wave_variation, generate_wave_preview
+from render_pipeline import RenderPipeline
+from grain_engine import use_noise_bank
+from noise_bank import NoiseBank
+from wave_registry import WAVE_STYLES
+from render_cache import RenderCache, render_key, seed_from_key, link_or_copy
 
 app = Flask(__name__)
 
@@ -26,9 +34,24 @@ app = Flask(__name__)
 GENERATED_DIR = os.path.join(os.path.dirname(__file__), 'generated')
 PALETTES_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'palettes')
 PRESETS_FILE = os.path.join(os.path.dirname(__file__), '..', 'presets', 'wave_styles.json')
+CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
+NOISE_DIR = os.path.join(os.path.dirname(__file__), 'noise_bank')
 
-# Ensure directories exist
-os.makedirs(GENERATED_DIR, exist_ok=True)
+# Content-addressed cache of finished renders (LRU, 2 GB cap) and the bank of precomputed,
+# memory-mapped noise textures all grain is assembled from. Both are set up on the first
+# request, so importing this module leaves the disk and grain_engine untouched.
+render_cache = None
+noise_bank = None
+storage_lock = threading.Lock()
+
+# Full-resolution renders requested through /preview run here. Every render uses its own
+# random streams, so concurrent renders stay deterministic.
+render_executor = ThreadPoolExecutor(max_workers=2)
+render_jobs = {}
+# Finish time of every finished job; results nobody polled are dropped after RENDER_JOB_TTL seconds
+render_job_finished = {}
+RENDER_JOB_TTL = 600
+PREVIEW_WIDTH = 200
 
 # Load available palettes
 def load_palettes():
@@ -82,29 +105,34 @@ def load_presets():
             return json.load(f)
     return {}
 
-# Available wave types
-WAVE_TYPES = {
-    '0.0': '0.0',
-    '1A': '1A',
-    '1B': '1B',
-    '1C': '1C',
-    '1D': '1D',
-    '2A': '2A',
-    '2B': '2B',
-    '2C': '2C',
-    '2D': '2D',
-    '3A': '3A',
-    '3B': '3B',
-    '3C': '3C',
-    '3D': '3D',
-    '4A': '4A',
-    '4B': '4B',
-    '5A': '5A',
-    '5B': '5B',
-    '5C': '5C',
-    '5D': '5D'
+# Available wave types: registry wave styles plus the 5A-5D organic presets
+PRESET_WAVE_TYPES = ['5A', '5B', '5C', '5D']
+WAVE_TYPES = {name: name for name in list(WAVE_STYLES) + PRESET_WAVE_TYPES}
+
+# Default wave parameters used when a request does not come from a preset
+DEFAULT_WAVE_PARAMS = {
+    'wave_amplitude': 0.2,
+    'amplitude_scale': 1.0,
+    'center_shift': 0.0,
+    'asymmetry': 0.0,
+    'organic_jitter': 0.0,
+    'random_seed': None
 }
 
+
+def resolve_wave_type(wave_type):
+    """Resolve a UI wave type to a registry wave type plus its wave parameters."""
+    params = dict(DEFAULT_WAVE_PARAMS)
+    if wave_type in WAVE_STYLES:
+        return wave_type, params
+    preset = load_presets().get(wave_type)
+    if preset is None or 'wave_type' not in preset:
+        raise ValueError(f"Unknown wave type '{wave_type}'")
+    for key in params:
+        if key in preset:
+            params[key] = preset[key]
+    return preset['wave_type'], params
+
 # Available grain effects
 GRAIN_EFFECTS = {
     'none': 'No Grain',
@@ -112,6 +140,145 @@ GRAIN_EFFECTS = {
     'white_grain': 'White Grain'
 }
 
+# Fixed grain settings used by the interface
+GRAIN_SETTINGS = {
+    'none': {},
+    'dithering': {'intensity': 0.15, 'grain_size': 1.2, 'border_size': 100},
+    'white_grain': {'base_intensity': 0.01, 'density_variation': 0.2, 'size_variation': 0.3, 'border_size': 100}
+}
+
+
+@app.before_request
+def init_storage():
+    """Create the output directories, the render cache and the noise bank once."""
+    global render_cache, noise_bank
+    if render_cache is not None:
+        return
+    with storage_lock:
+        if render_cache is None:
+            os.makedirs(GENERATED_DIR, exist_ok=True)
+            noise_bank = NoiseBank(NOISE_DIR)
+            use_noise_bank(noise_bank)
+            render_cache = RenderCache(CACHE_DIR)
+
+def is_cacheable(render_params):
+    """Organic jitter without a random seed is not reproducible, so it is never cached."""
+    return not (render_params['organic_jitter'] and render_params['random_seed'] is None)
+
+def cache_params(render_params):
+    """Render parameters plus the identity of the noise bank that grain is drawn from."""
+    if render_params['grain_effect'] == 'none':
+        return render_params
+    return {**render_params,
+            'noise_bank': {'size': noise_bank.size, 'count': noise_bank.count, 'seed': noise_bank.seed}}
+
+def cached_render_path(render_params):
+    """Path of the cached full render, or None when missing or not cacheable."""
+    if not is_cacheable(render_params):
+        return None
+    return render_cache.get(cache_params(render_params))
+
+def render_wave_image(render_params, filename_prefix):
+    """
+    Render a wave (plus grain) or fetch it from the render cache.
+    
+    Returns (filename, image_url, cached).
+    """
+    cached_path = cached_render_path(render_params)
+    if cached_path:
+        filename = os.path.basename(cached_path)
+        return filename, f'/cache/{filename}', True
+    
+    grain_effect = render_params['grain_effect']
+    wave_params = dict(
+        wave_amplitude=render_params['wave_amplitude'],
+        amplitude_scale=render_params['amplitude_scale'],
+        center_shift=render_params['center_shift'], asymmetry=render_params['asymmetry'],
+        organic_jitter=render_params['organic_jitter'], random_seed=render_params['random_seed']
+    )
+    if grain_effect == 'none':
+        # Without grain the bands are saved as a compact palette image
+        wave_image = generate_wave_variation(
+            render_params['width'], render_params['height'], render_params['colors'],
+            render_params['steps'], render_params['wave_type'], render_params['border'],
+            render_params['border_color'], palette_mode=True, **wave_params
+        )
+    else:
+        # Generation and grain share one canvas; it becomes a PIL image only for encoding.
+        # Grain is seeded from the render key so identical parameters give identical images
+        pipeline = RenderPipeline(render_params['width'], render_params['height'],
+                                  render_params['border'], render_params['border_color'])
+        pipeline.generate(render_params['colors'], render_params['steps'], render_params['wave_type'],
+                          **wave_params)
+        pipeline.grain(grain_effect, rng=seed_from_key(render_key(render_params)),
+                       **render_params['grain_params'])
+        wave_image = pipeline.to_image()
+    
+    # Generate unique filename for the gallery
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    unique_id = str(uuid.uuid4())[:8]
+    filename = f"{filename_prefix}_{timestamp}_{unique_id}.png"
+    output_path = os.path.join(GENERATED_DIR, filename)
+    
+    if is_cacheable(render_params):
+        link_or_copy(render_cache.put(cache_params(render_params), wave_image), output_path)
+    else:
+        wave_image.save(output_path)
+    return filename, f'/generated/{filename}', False
+
+def submit_render_job(render_params, filename_prefix):
+    """Start a background render and return its job id, dropping stale finished jobs."""
+    now = time.monotonic()
+    for job_id, finished in list(render_job_finished.items()):
+        if now - finished > RENDER_JOB_TTL:
+            render_jobs.pop(job_id, None)
+            render_job_finished.pop(job_id, None)
+    
+    job_id = str(uuid.uuid4())
+    job = render_executor.submit(render_wave_image, render_params, filename_prefix)
+    render_jobs[job_id] = job
+    job.add_done_callback(lambda _: render_job_finished.__setitem__(job_id, time.monotonic()))
+    return job_id
+
+def build_render_params(data):
+    """
+    Turn a /generate or /preview request body into render cache parameters.
+    
+    Returns (render_params, parameters) where parameters echo the request for the UI.
+    """
+    wave_type = data.get('wave_type', '4A')
+    palette_name = data.get('palette', 'blue_to_yellow_50')
+    grain_effect = data.get('grain_effect', 'none')
+    bands = data.get('bands', 20)
+    
+    # Load palettes
+    palettes = load_palettes()
+    if palette_name not in palettes:
+        raise LookupError('Palette not found')
+    
+    palette_file = palettes[palette_name]['file_path']
+    
+    # Load palette colors
+    with open(palette_file, 'r') as f:
+        colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
+    
+    # Presets (5A-5D) supply their own wave parameters; everything else uses defaults
+    base_wave_type, wave_params = resolve_wave_type(wave_type)
+    
+    render_params = {
+        'width': 2000, 'height': 3000, 'colors': colors, 'steps': bands,
+        'wave_type': base_wave_type, 'border': 100, 'border_color': '#FFFFFF',
+        **wave_params,
+        'grain_effect': grain_effect, 'grain_params': GRAIN_SETTINGS.get(grain_effect, {})
+    }
+    parameters = {
+        'wave_type': wave_type,
+        'palette': palette_name,
+        'grain_effect': grain_effect,
+        'bands': bands
+    }
+    return render_params, parameters
+
 @app.route('/')
 def index():
     """Main interface page."""
@@ -126,70 +293,82 @@ def generate_wave():
     """Generate a wave image with specified parameters."""
     try:
         data = request.json
-        wave_type = data.get('wave_type', '4A')
-        palette_name = data.get('palette', 'blue_to_yellow_50')
-        grain_effect = data.get('grain_effect', 'none')
-        bands = data.get('bands', 20)
-        
-        # Load palettes
-        palettes = load_palettes()
-        if palette_name not in palettes:
-            return jsonify({'error': 'Palette not found'}), 400
-        
-        palette_file = palettes[palette_name]['file_path']
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_id = str(uuid.uuid4())[:8]
-        filename = f"wave_{wave_type}_{palette_name}_{grain_effect}_{timestamp}_{unique_id}.png"
-        output_path = os.path.join(GENERATED_DIR, filename)
-        
-        # Load palette colors
-        with open(palette_file, 'r') as f:
-            colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
-        
-        # Use default parameters for all wave types
-        wave_amplitude = 0.2
-        amplitude_scale = 1.0
-        center_shift = 0.0
-        asymmetry = 0.0
-        organic_jitter = 0.0
-        random_seed = None
-        
-        # Generate the wave
-        wave_image = generate_wave_variation(
-            width=2000, height=3000, colors=colors, steps=bands,
-            wave_type=wave_type, border=100, border_color='#FFFFFF',
-            wave_amplitude=wave_amplitude, amplitude_scale=amplitude_scale,
-            center_shift=center_shift, asymmetry=asymmetry,
-            organic_jitter=organic_jitter, random_seed=random_seed
-        )
-        
-        # Apply grain effect if specified
-        if grain_effect == 'dithering':
-            wave_image = apply_dithering_grain(wave_image, intensity=0.15, grain_size=1.2, border_size=100)
-        elif grain_effect == 'white_grain':
-            wave_image = apply_white_grain(wave_image, base_intensity=0.01, density_variation=0.2, size_variation=0.3, border_size=100)
-        
-        # Save image
-        wave_image.save(output_path)
+        render_params, parameters = build_render_params(data)
+        filename, image_url, cached = render_wave_image(
+            render_params, f"wave_{parameters['wave_type']}_{parameters['palette']}_{parameters['grain_effect']}")
         
         # Return success with image info
         return jsonify({
             'success': True,
             'filename': filename,
-            'image_url': f'/generated/{filename}',
-            'parameters': {
-                'wave_type': wave_type,
-                'palette': palette_name,
-                'grain_effect': grain_effect,
-                'bands': bands
-            }
+            'image_url': image_url,
+            'cached': cached,
+            'parameters': parameters
         })
         
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/preview', methods=['POST'])
+def preview_wave():
+    """
+    Return a ~200px preview immediately and start the full-resolution render.
+    
+    The preview is rendered directly at low resolution without grain. Poll
+    /render_status/<job_id> for the full image unless it was already cached.
+    """
+    try:
+        data = request.json
+        render_params, parameters = build_render_params(data)
+        
+        preview = generate_wave_preview(
+            render_params['width'], render_params['height'], render_params['colors'],
+            render_params['steps'], render_params['wave_type'], render_params['border'],
+            render_params['border_color'], preview_width=PREVIEW_WIDTH,
+            wave_amplitude=render_params['wave_amplitude'],
+            amplitude_scale=render_params['amplitude_scale'],
+            center_shift=render_params['center_shift'], asymmetry=render_params['asymmetry'],
+            organic_jitter=render_params['organic_jitter'], random_seed=render_params['random_seed'],
+            palette_mode=True
+        )
+        buffer = io.BytesIO()
+        preview.save(buffer, format='PNG')
+        preview_url = 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+        
+        result = {'success': True, 'preview_url': preview_url, 'parameters': parameters}
+        cached_path = cached_render_path(render_params)
+        if cached_path:
+            result['image_url'] = f'/cache/{os.path.basename(cached_path)}'
+            result['cached'] = True
+        else:
+            result['job_id'] = submit_render_job(
+                render_params,
+                f"wave_{parameters['wave_type']}_{parameters['palette']}_{parameters['grain_effect']}")
+        return jsonify(result)
+        
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/render_status/<job_id>')
+def render_status(job_id):
+    """Report whether a background full-resolution render has finished."""
+    job = render_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown render job'}), 404
+    if not job.done():
+        return jsonify({'done': False})
+    del render_jobs[job_id]
+    render_job_finished.pop(job_id, None)
+    try:
+        filename, image_url, cached = job.result()
+    except Exception as e:
+        return jsonify({'done': True, 'error': str(e)}), 500
+    return jsonify({'done': True, 'filename': filename, 'image_url': image_url, 'cached': cached})
+
 @app.route('/generate_random', methods=['POST'])
 def generate_random_wave():
     """Generate a completely random wave for NFT generation."""
@@ -202,12 +381,15 @@ def generate_random_wave():
         
         # Random organic parameters for 4A/4B/5A-5D
         if wave_type in ['4A', '4B', '5A', '5B', '5C', '5D']:
+            base_wave_type, _ = resolve_wave_type(wave_type)
             wave_amplitude = random.uniform(0.02, 0.3)
+            amplitude_scale = 1.0
             center_shift = random.uniform(-0.2, 0.2)
             asymmetry = random.uniform(-1.0, 1.0)
             organic_jitter = random.uniform(0.0, 0.05)
             random_seed = random.randint(1, 1000000)
         else:
+            base_wave_type = wave_type
             wave_amplitude = random.uniform(0.1, 0.4)
             amplitude_scale = random.uniform(0.3, 1.5)
             center_shift = 0.0
@@ -220,35 +402,23 @@ def generate_random_wave():
         with open(palette_file, 'r') as f:
             colors = [line.strip() for line in f if line.strip() and line.strip().startswith('#')]
         
-        # Generate unique filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_id = str(uuid.uuid4())[:8]
-        filename = f"random_{wave_type}_{palette_name}_{grain_effect}_{timestamp}_{unique_id}.png"
-        output_path = os.path.join(GENERATED_DIR, filename)
-        
-        # Generate the wave
-        wave_image = generate_wave_variation(
-            width=2000, height=3000, colors=colors, steps=20,
-            wave_type=wave_type, border=100, border_color='#FFFFFF',
-            wave_amplitude=wave_amplitude, amplitude_scale=amplitude_scale,
-            center_shift=center_shift, asymmetry=asymmetry,
-            organic_jitter=organic_jitter, random_seed=random_seed
-        )
-        
-        # Apply grain effect with fixed settings
-        if grain_effect == 'dithering':
-            wave_image = apply_dithering_grain(wave_image, intensity=0.15, grain_size=1.2, border_size=100)
-        elif grain_effect == 'white_grain':
-            wave_image = apply_white_grain(wave_image, base_intensity=0.01, density_variation=0.2, size_variation=0.3, border_size=100)
-        
-        # Save image
-        wave_image.save(output_path)
+        render_params = {
+            'width': 2000, 'height': 3000, 'colors': colors, 'steps': 20,
+            'wave_type': base_wave_type, 'border': 100, 'border_color': '#FFFFFF',
+            'wave_amplitude': wave_amplitude, 'amplitude_scale': amplitude_scale,
+            'center_shift': center_shift, 'asymmetry': asymmetry,
+            'organic_jitter': organic_jitter, 'random_seed': random_seed,
+            'grain_effect': grain_effect, 'grain_params': GRAIN_SETTINGS[grain_effect]
+        }
+        filename, image_url, cached = render_wave_image(
+            render_params, f"random_{wave_type}_{palette_name}_{grain_effect}")
         
         # Return success with random parameters
         return jsonify({
             'success': True,
             'filename': filename,
-            'image_url': f'/generated/{filename}',
+            'image_url': image_url,
+            'cached': cached,
             'parameters': {
                 'wave_type': wave_type,
                 'palette': palette_name,
@@ -269,6 +439,11 @@ def serve_generated(filename):
     """Serve generated images."""
     return send_file(os.path.join(GENERATED_DIR, filename))
 
+@app.route('/cache/<filename>')
+def serve_cached(filename):
+    """Serve cached renders."""
+    return send_file(os.path.join(CACHE_DIR, filename))
+
 @app.route('/gallery')
 def get_gallery():
     """Get list of generated images for gallery."""
@@ -5,6 +5,7 @@ class HyperfckGradientsApp {
         this.currentImage = null;
         this.gallery = [];
         this.currentPanel = null;
+        this.pendingJob = null;
         this.init();
     }
 
@@ -68,7 +69,8 @@ class HyperfckGradientsApp {
         this.showLoading();
 
         try {
-            const response = await fetch('/generate', {
+            // The preview arrives in milliseconds; the full render follows in the background
+            const response = await fetch('/preview', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -84,8 +86,12 @@ class HyperfckGradientsApp {
             const result = await response.json();
 
             if (result.success) {
-                this.displayImage(result.image_url, result.parameters);
-                this.loadGallery(); // Refresh gallery
+                this.displayImage(result.preview_url, result.parameters);
+                if (result.image_url) {
+                    this.displayImage(result.image_url, result.parameters);
+                } else {
+                    this.waitForFullRender(result.job_id, result.parameters);
+                }
             } else {
                 this.showError(result.error);
             }
@@ -94,7 +100,38 @@ class HyperfckGradientsApp {
         }
     }
 
+    async waitForFullRender(jobId, parameters) {
+        this.pendingJob = jobId;
+
+        while (this.pendingJob === jobId) {
+            await new Promise(resolve => setTimeout(resolve, 500));
+
+            try {
+                const response = await fetch(`/render_status/${jobId}`);
+                const status = await response.json();
+
+                if (status.error) {
+                    this.showError(status.error);
+                    return;
+                }
+                if (status.done) {
+                    // Ignore renders superseded by a newer request
+                    if (this.pendingJob === jobId) {
+                        this.pendingJob = null;
+                        this.displayImage(status.image_url, parameters);
+                        this.loadGallery(); // Refresh gallery
+                    }
+                    return;
+                }
+            } catch (error) {
+                this.showError('Failed to load full render: ' + error.message);
+                return;
+            }
+        }
+    }
+
     async generateRandomWave() {
+        this.pendingJob = null;
         this.showLoading();
 
         try {